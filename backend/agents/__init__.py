@@ -3,6 +3,7 @@
 from .theme_extractor import extract_themes, extract_themes_sync
 from .poetry_composer import compose_poem
 from .affirmation_generator import generate_affirmations, generate_affirmations_sync
+from .fused_generator import generate_fused
 
 __all__ = [
     "extract_themes",
@@ -10,4 +11,5 @@ __all__ = [
     "compose_poem",
     "generate_affirmations",
     "generate_affirmations_sync",
+    "generate_fused",
 ]
@@ -8,6 +8,8 @@ The affirmations are anchored in the user's values and aspirations,
 avoiding toxic positivity while promoting realistic growth and self-compassion.
 """
 
+from typing import Optional
+
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
@@ -18,30 +20,43 @@ from backend.models.theme import ThemeData
 
 # Import settings for API key configuration
 from backend.config import settings
+from backend.services.http import get_http_client
+from backend.services.metrics import LLMMetricsHandler
+
+# Tail-latency hedging for the upstream LLM call
+from backend.services.hedging import Hedger
+
+# Reuse of earlier outputs for the same inputs
+from backend.services.memo import StageMemo
+
+# Chains are built once per process, not per request
+from backend.agents.registry import registry
+from backend.agents.structured import structured_chain
 
 
 # Initialize the parser with our AffirmationsOutput model
 parser = PydanticOutputParser(pydantic_object=AffirmationsOutput)
 
+# Hedges unusually slow calls to this agent with a duplicate request
+hedger = Hedger("affirm")
+
+# Reuses affirmations generated for the same themes (the only input)
+memo = StageMemo("affirm", AffirmationsOutput, creative=True)
+
 
 # ============================================================================
 # PROMPT TEMPLATE
 # ============================================================================
 # This prompt guides the LLM to create affirmations grounded in CBT and
 # positive psychology, avoiding toxic positivity
+#
+# The principles (system message) are the same for every call and the
+# user's themes come last, so the provider can cache the shared prefix.
 
-AFFIRMATION_PROMPT = ChatPromptTemplate.from_template("""
+AFFIRMATION_INSTRUCTIONS = """
 You are a compassionate psychologist specializing in CBT and positive psychology.
-Your task is to create realistic, psychologically-grounded daily affirmations.
-
-USER'S THEMES AND VALUES:
-- Core Values: {values}
-- Emotional Tone: {emotional_tone}
-- Metaphors: {metaphors}
-- Identity Markers: {identity_markers}
-- Aspirations: {aspirations}
-- Strengths: {strengths}
-- Key Themes: {key_themes}
+Your task is to create realistic, psychologically-grounded daily affirmations
+for the user whose themes and values are given in the user's message.
 
 PRINCIPLES FOR AFFIRMATION CREATION:
 
@@ -81,23 +96,42 @@ Remember: These affirmations should feel authentic and achievable, not like empt
 They should support the user's psychological wellbeing through realistic self-talk.
 
 {format_instructions}
-""").partial(format_instructions=parser.get_format_instructions())
+"""
+
+AFFIRMATION_INPUT = """USER'S THEMES AND VALUES:
+- Core Values: {values}
+- Emotional Tone: {emotional_tone}
+- Metaphors: {metaphors}
+- Identity Markers: {identity_markers}
+- Aspirations: {aspirations}
+- Strengths: {strengths}
+- Key Themes: {key_themes}"""
+
+AFFIRMATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", AFFIRMATION_INSTRUCTIONS),
+    ("human", AFFIRMATION_INPUT),
+]).partial(format_instructions=parser.get_format_instructions())
 
 
 # ============================================================================
 # AGENT CREATION FUNCTION
 # ============================================================================
 
-def create_affirmation_generator():
+def create_affirmation_generator(native: Optional[bool] = None):
     """
     Creates an Affirmation Generator agent with structured output.
 
+    Args:
+        native: Send AffirmationsOutput's schema as native structured output
+            instead of format instructions (default: per STRUCTURED_OUTPUT_AGENTS)
+
     Returns:
         A LangChain chain that takes ThemeData and returns AffirmationsOutput.
 
     The chain uses:
     - ChatOpenAI with gpt-4o-mini for cost-effective generation
-    - PydanticOutputParser to ensure data matches our AffirmationsOutput model
+    - PydanticOutputParser (or native structured output) to ensure data
+      matches our AffirmationsOutput model
     - Temperature of 0.6 for consistent, grounded output with some variation
     """
 
@@ -105,16 +139,22 @@ def create_affirmation_generator():
     llm = ChatOpenAI(
         model="gpt-4o-mini",  # Cost-effective model suitable for affirmation generation
         temperature=0.6,  # Lower temp for consistency while allowing some creative variation
-        api_key=settings.OPENAI_API_KEY  # Load API key from settings
+        api_key=settings.OPENAI_API_KEY,  # Load API key from settings
+        timeout=settings.LLM_REQUEST_TIMEOUT,  # Never wait forever on one upstream call
+        max_retries=settings.LLM_MAX_RETRIES,
+        http_async_client=get_http_client(),  # Shared connection pool
+        callbacks=[LLMMetricsHandler("affirm")]  # Latency and token metrics
     )
 
     # Create the chain: prompt -> LLM -> parser
-    # The pipe operator (|) chains the components together
-    chain = AFFIRMATION_PROMPT | llm | parser
+    chain = structured_chain("affirm", AFFIRMATION_PROMPT, llm, parser, native=native)
 
     return chain
 
 
+registry.register("affirm", create_affirmation_generator)
+
+
 # ============================================================================
 # MAIN GENERATION FUNCTION
 # ============================================================================
@@ -139,8 +179,8 @@ async def generate_affirmations(themes: ThemeData) -> AffirmationsOutput:
         print(affirmations.focus_areas)  # ["self-compassion", "growth mindset"]
     """
 
-    # Create the affirmation generator chain
-    generator = create_affirmation_generator()
+    # Get the affirmation generator chain (built once by the agent registry)
+    generator = registry.get("affirm")
 
     # Prepare the input data by unpacking the theme fields
     # This matches the variables in our prompt template
@@ -156,7 +196,12 @@ async def generate_affirmations(themes: ThemeData) -> AffirmationsOutput:
 
     # Invoke the chain asynchronously
     # The LLM will analyze the themes and return a validated AffirmationsOutput object
-    result = await generator.ainvoke(input_data)
+    # Memoized: affirmations already generated for the same themes are reused
+    # Hedged: a duplicate request is sent if this one is unusually slow
+    result = await memo.call(
+        {"themes": themes},
+        lambda: hedger.call(lambda: generator.ainvoke(input_data))
+    )
 
     return result
 
@@ -179,7 +224,7 @@ def generate_affirmations_sync(themes: ThemeData) -> AffirmationsOutput:
         AffirmationsOutput: Structured affirmations and focus areas
     """
 
-    generator = create_affirmation_generator()
+    generator = registry.get("affirm")
 
     input_data = {
         "values": ", ".join(themes.values),
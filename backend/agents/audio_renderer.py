@@ -4,16 +4,210 @@ Audio Renderer Agent - Converts text to speech using OpenAI TTS.
 This agent takes text (poem + affirmations) and converts it to MP3 audio
 using OpenAI's Text-to-Speech API. It's designed for simplicity and
 provides high-quality audio output suitable for meditation and reflection.
+
+Longer texts are split into segments (one per poem line or affirmation)
+that are synthesized concurrently and joined frame by frame into one MP3,
+with a short pause between lines and a longer one between sections. Each
+segment is cached on its own, so regenerating the affirmations only pays
+for the new ones.
+
+Generation can also start rendering the segments speculatively, as soon
+as each poem line is final (see speculate_audio), so the audio is ready
+or nearly ready when the client asks for it.
+
+Every freshly rendered clip is measured from its MP3 frames, and the
+voice's speaking rate is recalibrated, so duration estimates made before
+synthesis (estimate_duration) get closer to the real thing over time.
 """
 
+import asyncio
 import base64
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+
 from openai import AsyncOpenAI
 from backend.config import settings
+from backend.services.http import get_http_client
+from backend.services.audio_cache import AudioCache, audio_key, normalize_tts_text
+from backend.services.file_store import LocalFileStore, S3FileStore
+from backend.services import mp3
+from backend.services.speech_rate import SpeechRateCalibration
+from backend.services.singleflight import SingleFlight
+from backend.services.speculation import CallBudget, SpeculativeRenderer
+from backend.services.metrics import StageTimer
+from backend.services.tracing import tracer
+from backend.agents.registry import registry
+
+
+def create_tts_client() -> AsyncOpenAI:
+    """
+    The OpenAI client for TTS calls (built once, by the registry).
+
+    Using AsyncOpenAI for non-blocking audio generation, on the shared HTTP pool.
+    """
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        timeout=settings.LLM_REQUEST_TIMEOUT,
+        max_retries=settings.LLM_MAX_RETRIES,
+        http_client=get_http_client()  # Shared connection pool
+    )
+
+
+# Built by the registry, which also warms up its connection
+registry.register("tts-client", create_tts_client)
+
+# TTS settings that, together with the text and voice, determine the audio
+TTS_MODEL = "tts-1"  # "tts-1" is faster, "tts-1-hd" is higher quality
+AUDIO_FORMAT = "mp3"
+
+# Size of the pieces /audio/stream relays to the client
+STREAM_CHUNK_BYTES = 16 * 1024
+
+# Rendered audio on disk, so the same text and voice are only paid for once
+# (indexed at startup by the app lifespan in main.py)
+audio_cache = AudioCache(
+    settings.AUDIO_OUTPUT_DIR,
+    max_bytes=settings.AUDIO_CACHE_MAX_BYTES,
+    enabled=settings.AUDIO_CACHE_ENABLED
+)
+
+# Per-voice words per second measured from rendered clips
+# (loaded and saved at SPEECH_RATE_PATH by the app lifespan in main.py)
+speech_rate = SpeechRateCalibration()
+SPEECH_RATE_PATH = os.path.join(settings.AUDIO_OUTPUT_DIR, "speech_rate.json")
+
+# Segment syntheses in flight, shared by /audio and speculative rendering
+segment_flight = SingleFlight("tts-segment")
+
+# Renders generated lines into the cache before /audio asks for them, at most
+# SPECULATIVE_TTS_MAX_CHARS_PER_MINUTE characters a minute
+speculative_tts = SpeculativeRenderer(
+    lambda segment, voice: _synthesize(segment, voice),
+    lambda segment, voice: audio_cache.contains(audio_key(segment, voice, TTS_MODEL, AUDIO_FORMAT), AUDIO_FORMAT),
+    CallBudget(settings.SPECULATIVE_TTS_MAX_CHARS_PER_MINUTE, window=60.0),
+    enabled=settings.SPECULATIVE_TTS_ENABLED
+)
+
+# Where audio delivered by URL is kept (the local store shares the cache's files)
+if settings.AUDIO_STORE_BACKEND == "s3":
+    audio_store = S3FileStore(
+        settings.AUDIO_S3_BUCKET,
+        endpoint_url=settings.AUDIO_S3_ENDPOINT_URL,
+        region=settings.AUDIO_S3_REGION,
+        access_key_id=settings.AUDIO_S3_ACCESS_KEY_ID,
+        secret_access_key=settings.AUDIO_S3_SECRET_ACCESS_KEY,
+        url_expiry=settings.AUDIO_S3_URL_EXPIRY_SECONDS
+    )
+else:
+    audio_store = LocalFileStore(audio_cache, settings.AUDIO_PUBLIC_BASE_URL)
+
+
+def split_segments(text: str) -> Tuple[List[str], List[float]]:
+    """
+    Splits text into the segments synthesized separately.
+
+    Every non-empty line is a segment. A blank line ends a section (the
+    frontend puts one between the poem and the affirmations).
+
+    Returns:
+        (segments, pauses): the lines, and the seconds of silence after each
+        one - AUDIO_SECTION_PAUSE_SECONDS at the end of a section,
+        AUDIO_LINE_PAUSE_SECONDS otherwise
+    """
+    segments: List[str] = []
+    pauses: List[float] = []
+
+    for block in normalize_tts_text(text).split("\n\n"):
+        lines = [line for line in block.split("\n") if line.strip()]
+        if not lines:
+            continue
+        if pauses:
+            pauses[-1] = settings.AUDIO_SECTION_PAUSE_SECONDS
+        segments.extend(lines)
+        pauses.extend(settings.AUDIO_LINE_PAUSE_SECONDS for _ in lines)
+
+    return segments, pauses
+
+
+async def _synthesize(text: str, voice: str) -> bytes:
+    """
+    One TTS call for text, through the disk cache.
+
+    A call for text that is already being synthesized (e.g. speculatively)
+    joins that call instead of paying for another.
+    """
+
+    # Reuse audio we've already rendered for this text and voice
+    key = audio_key(text, voice, TTS_MODEL, AUDIO_FORMAT)
+    cached = await audio_cache.get(key, AUDIO_FORMAT)
+    if cached is not None:
+        return cached
+
+    return await segment_flight.do(key, lambda: _render(key, text, voice))
+
+
+async def _render(key: str, text: str, voice: str) -> bytes:
+    """Calls the TTS API, caches the clip and recalibrates the voice's speaking rate."""
+
+    # Call OpenAI's Text-to-Speech API
+    # - model: "tts-1" is faster, "tts-1-hd" is higher quality
+    # - voice: One of the six available voices
+    # - input: The text to convert to speech
+    with StageTimer("tts"), tracer.span("tts", model=TTS_MODEL, voice=voice, chars=len(text)) as span:
+        response = await registry.get("tts-client").audio.speech.create(
+            model=TTS_MODEL,  # Using standard model for speed (good for education/demos)
+            voice=voice,      # Voice selection from function parameter
+            input=text,       # The text to speak
+            response_format=AUDIO_FORMAT
+        )
+
+        # The response has a read() method that returns audio bytes
+        # We read the entire audio content into memory
+        audio_bytes = response.read()
+        span.set(bytes=len(audio_bytes))
+
+    await audio_cache.put(key, AUDIO_FORMAT, audio_bytes)
+    speech_rate.observe(voice, len(text.split()), mp3.duration(audio_bytes))
+
+    return audio_bytes
+
+
+async def _synthesize_segments(segments: List[str], voice: str) -> List[bytes]:
+    """
+    Synthesizes segments concurrently, at most AUDIO_SEGMENT_CONCURRENCY at once.
+
+    If one segment fails, the others are cancelled and its error is raised.
+    """
+    limit = asyncio.Semaphore(max(1, settings.AUDIO_SEGMENT_CONCURRENCY))
+
+    async def render(segment: str) -> bytes:
+        async with limit:
+            return await _synthesize(segment, voice)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(render(segment)) for segment in segments]
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0]
+
+    return [task.result() for task in tasks]
 
 
-# Initialize the OpenAI client with API key from settings
-# Using AsyncOpenAI for non-blocking audio generation
-client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+def speculate_audio(text: str, voice: str) -> int:
+    """
+    Starts rendering text's segments in the background, ahead of a request.
+
+    Called by generation as each poem line or affirmation is final. Only
+    useful with segmented rendering (the client's full text is then made of
+    these segments) and the audio cache (where the results wait).
+
+    Returns:
+        Number of segments started (0 if cached, in flight or over budget)
+    """
+    if not (settings.AUDIO_SEGMENTED and audio_cache.enabled and AUDIO_FORMAT == "mp3"):
+        return 0
+    segments, _ = split_segments(text)
+    return speculative_tts.submit(segments, voice)
 
 
 async def generate_audio(text: str, voice: str = "nova") -> bytes:
@@ -40,40 +234,91 @@ async def generate_audio(text: str, voice: str = "nova") -> bytes:
     Raises:
         Exception: If the OpenAI API call fails
 
+    Audio already rendered for the same text and voice is served from the
+    disk cache under AUDIO_OUTPUT_DIR without calling the API.
+
+    With AUDIO_SEGMENTED, text with several lines is rendered line by line
+    in parallel and joined into one MP3 (see split_segments), so latency
+    follows the longest line rather than the whole text.
+
     Example:
         >>> audio_bytes = await generate_audio("You are strong", "nova")
         >>> audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
     """
 
-    # Call OpenAI's Text-to-Speech API
-    # - model: "tts-1" is faster, "tts-1-hd" is higher quality
-    # - voice: One of the six available voices
-    # - input: The text to convert to speech
-    response = await client.audio.speech.create(
-        model="tts-1",  # Using standard model for speed (good for education/demos)
-        voice=voice,     # Voice selection from function parameter
-        input=text       # The text to speak
-    )
+    segments, pauses = split_segments(text)
 
-    # The response has a read() method that returns audio bytes
-    # We read the entire audio content into memory
-    audio_bytes = response.read()
+    with tracer.span("generate_audio", voice=voice, chars=len(text), segments=len(segments)):
+        # Frame-level joining only works for MP3
+        if not settings.AUDIO_SEGMENTED or len(segments) < 2 or AUDIO_FORMAT != "mp3":
+            return await _synthesize(text, voice)
 
-    return audio_bytes
+        # Only the segments are cached: joining them again is cheap, and caching
+        # the result too would store every clip twice
+        clips = await _synthesize_segments(segments, voice)
+        return mp3.concat(clips, pauses)
 
 
-def estimate_duration(text: str) -> float:
+async def stream_audio(text: str, voice: str = "nova") -> AsyncIterator[bytes]:
     """
-    Estimates audio duration based on text length.
+    Streaming version of generate_audio.
+
+    Yields the MP3 in chunks as the TTS API produces them, so playback can
+    start after the first frames instead of after the whole clip. Cached
+    audio is yielded from the disk cache in the same chunk size.
+
+    The audio is only cached once the stream has finished; if the consumer
+    stops early (e.g. the client disconnects), the upstream response is
+    closed and nothing is cached.
+
+    Args:
+        text: The text to convert to speech (poem + affirmations)
+        voice: OpenAI TTS voice name (see generate_audio)
 
-    This is a rough estimation based on average speaking speed.
-    The actual duration will vary based on the voice, pauses, and
-    the specific TTS model's pacing.
+    Yields:
+        bytes: Consecutive pieces of the MP3 file
 
-    Average speaking speed: ~150 words per minute = 2.5 words per second
+    Raises:
+        Exception: If the OpenAI API call fails
+    """
+
+    key = audio_key(text, voice, TTS_MODEL, AUDIO_FORMAT)
+    cached = await audio_cache.get(key, AUDIO_FORMAT)
+    if cached is not None:
+        for start in range(0, len(cached), STREAM_CHUNK_BYTES):
+            yield cached[start:start + STREAM_CHUNK_BYTES]
+        return
+
+    chunks = []
+    async with registry.get("tts-client").audio.speech.with_streaming_response.create(
+        model=TTS_MODEL,
+        voice=voice,
+        input=text,
+        response_format=AUDIO_FORMAT
+    ) as response:
+        async for chunk in response.iter_bytes(STREAM_CHUNK_BYTES):
+            chunks.append(chunk)
+            yield chunk
+
+    audio_bytes = b"".join(chunks)
+    await audio_cache.put(key, AUDIO_FORMAT, audio_bytes)
+    speech_rate.observe(voice, len(text.split()), mp3.duration(audio_bytes))
+
+
+def estimate_duration(text: str, voice: Optional[str] = None) -> float:
+    """
+    Estimates audio duration based on text length.
+
+    This is an estimation based on speaking speed, for use before the
+    audio exists (once it does, mp3.duration() gives the exact value).
+    The voice's speed is learned from the clips it has rendered; until
+    there are enough, the average speaking speed is assumed:
+    ~150 words per minute = 2.5 words per second. The pauses added
+    between segments are included.
 
     Args:
         text: The text that will be converted to speech
+        voice: The TTS voice, for its calibrated speaking speed
 
     Returns:
         float: Estimated duration in seconds
@@ -86,9 +331,13 @@ def estimate_duration(text: str) -> float:
     # Count words by splitting on whitespace
     word_count = len(text.split())
 
-    # Average speaking speed: 2.5 words per second (150 words/minute)
-    # This is a conservative estimate - actual may be slightly different
-    estimated_seconds = word_count / 2.5
+    # Calibrated speaking speed for this voice (2.5 words per second by default)
+    estimated_seconds = word_count / speech_rate.words_per_second(voice)
+
+    # Silence inserted between lines by segmented rendering
+    segments, pauses = split_segments(text)
+    if settings.AUDIO_SEGMENTED and len(segments) > 1 and AUDIO_FORMAT == "mp3":
+        estimated_seconds += sum(pauses[:-1])
 
     return round(estimated_seconds, 1)
 
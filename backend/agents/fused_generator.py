@@ -0,0 +1,197 @@
+"""
+Fused Generator Agent - Single-call alternative to the three-stage pipeline
+
+The default pipeline makes three LLM calls (theme extraction, poem
+composition, affirmation generation), re-sending overlapping context each
+time. This agent asks the model for all three outputs at once and splits
+the combined result back into ThemeData, PoemOutput and AffirmationsOutput.
+
+The prompt is assembled from the existing agents' templates so the guidance
+stays identical. In particular, the cultural-mode poetry instructions from
+poetry_composer.py (including every Yoruba cultural constraint) are used
+verbatim. The only differences are:
+- the poem and affirmations build on the themes written in PART 1 of the
+  response, instead of receiving them
+- the user's message (quiz answers, letter and pronouns) is sent once, last
+- each part's format instructions point at the combined JSON object
+"""
+
+from typing import Dict, Optional
+
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import ChatPromptTemplate
+from langchain.output_parsers import PydanticOutputParser
+
+# Import our models
+from backend.models.fused import FusedGenerationOutput
+from backend.models.quiz import QuizSubmission
+
+# Reuse the existing agents' prompts so the guidance is identical
+from backend.agents.theme_extractor import THEME_EXTRACTION_INPUT, THEME_EXTRACTION_PROMPT, _build_input_data
+from backend.agents.affirmation_generator import AFFIRMATION_PROMPT
+from backend.agents.poetry_composer import _select_prompt, _pronoun_instruction
+from backend.agents.registry import registry
+from backend.agents.structured import structured_chain
+
+# Import settings for API key configuration
+from backend.config import settings
+from backend.services.http import get_http_client
+from backend.services.metrics import LLMMetricsHandler
+
+
+# Initialize the parser with our combined output model
+parser = PydanticOutputParser(pydantic_object=FusedGenerationOutput)
+
+
+# ============================================================================
+# PROMPT ASSEMBLY
+# ============================================================================
+
+def _section_format(field: str) -> str:
+    """Format instructions for one part of the combined response."""
+    return (
+        f'Write the result of this part into the "{field}" field of the single '
+        f"combined JSON object described under OUTPUT FORMAT at the end."
+    )
+
+
+# Everything before the user's message is the same for every request in a
+# cultural mode, so the provider's prompt cache can reuse it; the quiz
+# answers, letter and pronouns are the only user message, sent last.
+FUSED_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """
+You are producing a complete Oriki package in a single response.
+Work through the three parts below in order. PART 2 and PART 3 build on the themes you extract in PART 1.
+In PART 2 and PART 3, the themes are the ones you identified in PART 1 (they are not repeated in the user's message), and the letter is the FREE-WRITE LETTER in the user's message.
+
+=== PART 1: THEME EXTRACTION ===
+{theme_section}
+
+=== PART 2: PRAISE POEM ===
+{poem_section}
+
+=== PART 3: DAILY AFFIRMATIONS ===
+{affirmation_section}
+
+=== OUTPUT FORMAT ===
+Return ONE JSON object with exactly three keys: "themes" (PART 1), "poem" (PART 2) and "affirmations" (PART 3).
+
+{format_instructions}
+"""),
+    ("human", "{user_section}"),
+]).partial(format_instructions=parser.get_format_instructions())
+
+
+def _instructions(prompt: ChatPromptTemplate, field: str) -> str:
+    """An agent prompt's instructions (its system message), pointing at one part of the combined output."""
+    return prompt.messages[0].format(format_instructions=_section_format(field)).content
+
+
+def build_fused_input(quiz: QuizSubmission, cultural_mode: str) -> Dict[str, str]:
+    """
+    Fills the fused prompt's sections from the three agents' prompts.
+
+    Args:
+        quiz: A validated QuizSubmission object
+        cultural_mode: One of "yoruba", "secular", "turkish", or "biblical"
+
+    Returns:
+        Dict of variables for FUSED_PROMPT
+
+    Raises:
+        ValueError: If cultural_mode is not one of the four supported modes
+    """
+
+    # PART 1-3: each agent's instructions, unchanged apart from the format
+    poem_prompt, _ = _select_prompt(cultural_mode)
+    sections = {
+        "theme_section": _instructions(THEME_EXTRACTION_PROMPT, "themes"),
+        "poem_section": _instructions(poem_prompt, "poem"),
+        "affirmation_section": _instructions(AFFIRMATION_PROMPT, "affirmations"),
+    }
+
+    # The user's message: the quiz answers and letter (sent once), and the
+    # pronouns the poem prompt refers to
+    user_section = THEME_EXTRACTION_INPUT.format(**_build_input_data(quiz))
+    pronouns = _pronoun_instruction(quiz.pronouns, quiz.display_name)
+
+    return {**sections, "user_section": f"{user_section}\n\nPRONOUNS: {pronouns}"}
+
+
+# ============================================================================
+# AGENT CREATION FUNCTION
+# ============================================================================
+
+def create_fused_generator(native: Optional[bool] = None):
+    """
+    Creates a Fused Generator agent with structured output.
+
+    Args:
+        native: Send FusedGenerationOutput's schema as native structured
+            output instead of format instructions (default: per
+            STRUCTURED_OUTPUT_AGENTS)
+
+    Returns:
+        A LangChain chain that takes the rendered sections and returns
+        FusedGenerationOutput.
+
+    The chain uses:
+    - ChatOpenAI with the configured OPENAI_MODEL, since the poem is part of
+      the output and the poem normally gets the stronger model
+    - PydanticOutputParser (or native structured output) to ensure data
+      matches FusedGenerationOutput
+    - Temperature of 0.7, the same as the Poetry Composer
+    """
+
+    # Initialize the LLM
+    llm = ChatOpenAI(
+        model=settings.OPENAI_MODEL,  # Same model the Poetry Composer uses
+        temperature=0.7,  # Balanced creativity with cultural safety constraints
+        api_key=settings.OPENAI_API_KEY,  # Load API key from settings
+        timeout=settings.LLM_REQUEST_TIMEOUT,  # Never wait forever on one upstream call
+        max_retries=settings.LLM_MAX_RETRIES,
+        http_async_client=get_http_client(),  # Shared connection pool
+        callbacks=[LLMMetricsHandler("fused")]  # Latency and token metrics
+    )
+
+    # Create the chain: prompt -> LLM -> parser
+    chain = structured_chain("fused", FUSED_PROMPT, llm, parser, native=native)
+
+    return chain
+
+
+registry.register("fused", create_fused_generator)
+
+
+# ============================================================================
+# MAIN GENERATION FUNCTION
+# ============================================================================
+
+async def generate_fused(quiz: QuizSubmission, cultural_mode: str) -> FusedGenerationOutput:
+    """
+    Generates themes, poem and affirmations with a single LLM call.
+
+    Args:
+        quiz: A validated QuizSubmission object containing all user responses
+        cultural_mode: Poetry composer mode: "yoruba", "secular", "turkish", or "biblical"
+
+    Returns:
+        FusedGenerationOutput: The combined result; use .themes, .poem and
+        .affirmations to get the same objects the staged pipeline returns
+
+    Raises:
+        ValueError: If cultural_mode is not one of the four supported modes
+
+    Example:
+        result = await generate_fused(user_quiz, "secular")
+        print(result.poem.poem_lines)
+    """
+
+    # Build the sections first so an invalid mode fails before any API call
+    input_data = build_fused_input(quiz, cultural_mode)
+
+    generator = registry.get("fused")
+
+    result = await generator.ainvoke(input_data)
+
+    return result
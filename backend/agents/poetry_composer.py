@@ -9,24 +9,65 @@ CRITICAL: This agent strictly follows CULTURAL_GUIDELINES.md to avoid
 cultural appropriation and respect living traditions.
 """
 
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
 from langchain.output_parsers import PydanticOutputParser
 
 from backend.models.theme import ThemeData
 from backend.models.poem import PoemOutput
 from backend.config import settings
+from backend.services.http import get_http_client
+from backend.services.metrics import LLMMetricsHandler
+from backend.services.hedging import Hedger
+from backend.services.memo import StageMemo
+from backend.agents.registry import registry
+from backend.agents.structured import structured_chain
 
 
-# Initialize the LLM with structured output capabilities
-# Using temperature 0.7 for balanced creativity with cultural safety
-llm = ChatOpenAI(
-    model=settings.OPENAI_MODEL,
-    temperature=0.7,  # Balanced creativity with cultural safety constraints
-    api_key=settings.OPENAI_API_KEY
-)
+def create_llm() -> ChatOpenAI:
+    """
+    The LLM every cultural mode's chain shares (built once, by the registry).
+
+    Using temperature 0.7 for balanced creativity with cultural safety.
+    """
+    return ChatOpenAI(
+        model=settings.OPENAI_MODEL,
+        temperature=0.7,  # Balanced creativity with cultural safety constraints
+        api_key=settings.OPENAI_API_KEY,
+        timeout=settings.LLM_REQUEST_TIMEOUT,  # Never wait forever on one upstream call
+        max_retries=settings.LLM_MAX_RETRIES,
+        http_async_client=get_http_client(),  # Shared connection pool
+        stream_usage=True,  # Token usage is reported for streamed poems too
+        callbacks=[LLMMetricsHandler("compose")]  # Latency and token metrics
+    )
+
+
+# Hedges unusually slow poem calls with a duplicate request
+hedger = Hedger("compose")
+
+# Reuses poems composed from the same themes, mode, pronouns and letter
+memo = StageMemo("compose", PoemOutput, creative=True)
+
+# The user-specific part of every mode's prompt. It is sent as the last
+# message, after the mode's instructions (system message), so each mode's
+# prompt starts with the same bytes on every call and the provider's prompt
+# cache can reuse that prefix instead of processing it again.
+POEM_INPUT = """THE USER'S LETTER TO THEIR FUTURE SELF:
+{free_write_letter}
+
+EXTRACTED THEMES (supporting material):
+Values: {values}
+Emotional Tone: {emotional_tone}
+Metaphors: {metaphors}
+Identity Markers: {identity_markers}
+Aspirations: {aspirations}
+Strengths: {strengths}
+Key Themes: {key_themes}
+
+PRONOUNS: {pronouns}"""
 
 
 def _create_yoruba_prompt() -> ChatPromptTemplate:
@@ -57,20 +98,10 @@ CRITICAL CULTURAL CONSTRAINTS - FOLLOW EXACTLY:
 6. DO NOT attempt spiritual associations even with approved metaphors
 
 YOUR PRIMARY SOURCE MATERIAL:
-The user wrote this letter to their future self:
-{free_write_letter}
+The user wrote a letter to their future self. It is in the user's message after these instructions, followed by the themes extracted from it.
 
 Read this letter carefully. This is YOUR MAIN SOURCE for understanding who they are, what they value, and what they dream of. The themes below are extracted from this letter, but always return to the actual letter for authentic language and emotional truth.
 
-EXTRACTED THEMES (supporting material):
-Values: {values}
-Emotional Tone: {emotional_tone}
-Metaphors: {metaphors}
-Identity Markers: {identity_markers}
-Aspirations: {aspirations}
-Strengths: {strengths}
-Key Themes: {key_themes}
-
 STRUCTURAL GUIDANCE FOR NARRATIVE FLOW:
 Create a 3-5 line poem with emotional arc and narrative progression:
 
@@ -108,7 +139,7 @@ You are the fire that learns to warm without burning—
 Blessed in becoming, strong in the unfinished work.
 
 PRONOUN USAGE:
-Use {pronouns} pronouns consistently throughout the poem.
+Use the pronouns given under PRONOUNS in the user's message consistently throughout the poem.
 
 LENGTH: 3-5 lines (focused and powerful)
 
@@ -119,7 +150,7 @@ TONE: Unapologetically celebratory, affirming, protective
 Remember: This is INSPIRED by Yoruba tradition, not claiming to be authentic Oríkì.
 Celebrate the aesthetic structure while respecting cultural boundaries."""
 
-    return ChatPromptTemplate.from_template(template).partial(
+    return ChatPromptTemplate.from_messages([("system", template), ("human", POEM_INPUT)]).partial(
         format_instructions=parser.get_format_instructions()
     ), parser
 
@@ -137,20 +168,10 @@ def _create_secular_prompt() -> ChatPromptTemplate:
     template = """You are composing secular praise poetry with modern, psychological depth.
 
 YOUR PRIMARY SOURCE MATERIAL:
-The user wrote this letter to their future self:
-{free_write_letter}
+The user wrote a letter to their future self. It is in the user's message after these instructions, followed by the themes extracted from it.
 
 Read this letter carefully. This is YOUR MAIN SOURCE for understanding who they are, what they value, and what they dream of. The themes below are extracted from this letter, but always return to the actual letter for authentic language and emotional truth.
 
-EXTRACTED THEMES (supporting material):
-Values: {values}
-Emotional Tone: {emotional_tone}
-Metaphors: {metaphors}
-Identity Markers: {identity_markers}
-Aspirations: {aspirations}
-Strengths: {strengths}
-Key Themes: {key_themes}
-
 STRUCTURAL GUIDANCE FOR NARRATIVE FLOW:
 Create a 3-5 line poem with emotional arc and narrative progression:
 
@@ -194,13 +215,13 @@ TONE:
 - Empowering without being mystical
 
 PRONOUN USAGE:
-Use {pronouns} pronouns consistently throughout the poem.
+Use the pronouns given under PRONOUNS in the user's message consistently throughout the poem.
 
 LENGTH: 3-5 lines (focused and powerful)
 
 {format_instructions}"""
 
-    return ChatPromptTemplate.from_template(template).partial(
+    return ChatPromptTemplate.from_messages([("system", template), ("human", POEM_INPUT)]).partial(
         format_instructions=parser.get_format_instructions()
     ), parser
 
@@ -218,20 +239,10 @@ def _create_turkish_prompt() -> ChatPromptTemplate:
     template = """You are composing Turkish-style blessing poetry (Alkış).
 
 YOUR PRIMARY SOURCE MATERIAL:
-The user wrote this letter to their future self:
-{free_write_letter}
+The user wrote a letter to their future self. It is in the user's message after these instructions, followed by the themes extracted from it.
 
 Read this letter carefully. This is YOUR MAIN SOURCE for understanding who they are, what they value, and what they dream of. The themes below are extracted from this letter, but always return to the actual letter for authentic language and emotional truth.
 
-EXTRACTED THEMES (supporting material):
-Values: {values}
-Emotional Tone: {emotional_tone}
-Metaphors: {metaphors}
-Identity Markers: {identity_markers}
-Aspirations: {aspirations}
-Strengths: {strengths}
-Key Themes: {key_themes}
-
 STRUCTURAL GUIDANCE FOR NARRATIVE FLOW:
 Create a 3-5 line blessing poem with emotional arc and progression:
 
@@ -277,13 +288,13 @@ TONE:
 - Grounded in nature and community
 
 PRONOUN USAGE:
-Use {pronouns} pronouns consistently throughout the poem.
+Use the pronouns given under PRONOUNS in the user's message consistently throughout the poem.
 
 LENGTH: 3-5 lines (focused and powerful)
 
 {format_instructions}"""
 
-    return ChatPromptTemplate.from_template(template).partial(
+    return ChatPromptTemplate.from_messages([("system", template), ("human", POEM_INPUT)]).partial(
         format_instructions=parser.get_format_instructions()
     ), parser
 
@@ -301,20 +312,10 @@ def _create_biblical_prompt() -> ChatPromptTemplate:
     template = """You are composing Biblical-style praise poetry.
 
 YOUR PRIMARY SOURCE MATERIAL:
-The user wrote this letter to their future self:
-{free_write_letter}
+The user wrote a letter to their future self. It is in the user's message after these instructions, followed by the themes extracted from it.
 
 Read this letter carefully. This is YOUR MAIN SOURCE for understanding who they are, what they value, and what they dream of. The themes below are extracted from this letter, but always return to the actual letter for authentic language and emotional truth.
 
-EXTRACTED THEMES (supporting material):
-Values: {values}
-Emotional Tone: {emotional_tone}
-Metaphors: {metaphors}
-Identity Markers: {identity_markers}
-Aspirations: {aspirations}
-Strengths: {strengths}
-Key Themes: {key_themes}
-
 STRUCTURAL GUIDANCE FOR NARRATIVE FLOW:
 Create a 3-5 line biblical poem with emotional arc and covenant progression:
 
@@ -360,75 +361,121 @@ TONE:
 - Timeless and grounded
 
 PRONOUN USAGE:
-Use {pronouns} pronouns consistently throughout the poem.
+Use the pronouns given under PRONOUNS in the user's message consistently throughout the poem.
 
 LENGTH: 3-5 lines (focused and powerful)
 
 {format_instructions}"""
 
-    return ChatPromptTemplate.from_template(template).partial(
+    return ChatPromptTemplate.from_messages([("system", template), ("human", POEM_INPUT)]).partial(
         format_instructions=parser.get_format_instructions()
     ), parser
 
 
-async def compose_poem(themes: ThemeData, cultural_mode: str, free_write_letter: str = "", pronouns: str = "they_them", display_name: Optional[str] = None) -> PoemOutput:
-    """
-    Generates praise poetry in the specified cultural mode.
+# Each mode's prompt and parser, built once by the agent registry (rendering
+# the format instructions from PoemOutput's schema is the costly part)
+PROMPT_BUILDERS = {
+    "yoruba": _create_yoruba_prompt,
+    "secular": _create_secular_prompt,
+    "turkish": _create_turkish_prompt,
+    "biblical": _create_biblical_prompt,
+}
 
-    This is the main function that orchestrates poetry generation. It selects
-    the appropriate prompt template based on the cultural mode, then uses
-    LangChain to generate structured poetic output.
+for _mode, _builder in PROMPT_BUILDERS.items():
+    registry.register(f"compose-prompt:{_mode}", _builder)
+
+# Shared by every mode's chain; the registry also warms up its connection
+registry.register("compose-llm", create_llm)
+
+
+def create_poetry_composer(cultural_mode: str, native: Optional[bool] = None, partial: bool = False) -> Runnable:
+    """
+    Creates the Poetry Composer chain for one cultural mode.
 
     Args:
-        themes: ThemeData object containing extracted themes from user's quiz
         cultural_mode: One of "yoruba", "secular", "turkish", or "biblical"
-        free_write_letter: The user's original free-write letter for personalization
-        pronouns: One of "he_him", "she_her", "they_them", or "name_only"
-        display_name: Name to use when pronouns is "name_only" (optional for other modes)
+        native: Send PoemOutput's schema as native structured output instead
+            of format instructions (default: per STRUCTURED_OUTPUT_AGENTS)
+        partial: Yield growing dicts while streaming instead of a PoemOutput
 
     Returns:
-        PoemOutput: Structured poem with lines, mode, and style notes
+        A LangChain chain: prompt -> LLM -> parser (cheap - the prompt,
+        parser and LLM are built once, this just links them)
 
     Raises:
         ValueError: If cultural_mode is not one of the four supported modes
     """
+    prompt, parser = _select_prompt(cultural_mode)
+    llm = registry.get("compose-llm")
+    return structured_chain("compose", prompt, llm, parser, native=native, partial=partial)
+
+
+def _select_prompt(cultural_mode: str) -> Tuple[ChatPromptTemplate, PydanticOutputParser]:
+    """
+    Returns the prompt template and parser for a cultural mode.
+
+    Args:
+        cultural_mode: One of "yoruba", "secular", "turkish", or "biblical"
+
+    Returns:
+        Tuple of (prompt template, PydanticOutputParser for PoemOutput)
 
-    # Select the appropriate prompt template based on cultural mode
+    Raises:
+        ValueError: If cultural_mode is not one of the four supported modes
+    """
     mode = cultural_mode.lower()
 
-    if mode == "yoruba":
-        prompt, parser = _create_yoruba_prompt()
-    elif mode == "secular":
-        prompt, parser = _create_secular_prompt()
-    elif mode == "turkish":
-        prompt, parser = _create_turkish_prompt()
-    elif mode == "biblical":
-        prompt, parser = _create_biblical_prompt()
-    else:
+    if mode not in PROMPT_BUILDERS:
         raise ValueError(
             f"Invalid cultural_mode: {cultural_mode}. "
             f"Must be one of: yoruba, secular, turkish, biblical"
         )
 
-    # Build the LangChain chain: prompt -> LLM -> parser
-    chain = prompt | llm | parser
+    return registry.get(f"compose-prompt:{mode}")
+
+
+def _pronoun_instruction(pronouns: str, display_name: Optional[str]) -> str:
+    """
+    Converts the pronoun choice into the wording used in the prompts.
+
+    Args:
+        pronouns: One of "he_him", "she_her", "they_them", or "name_only"
+        display_name: Name to use when pronouns is "name_only"
+
+    Returns:
+        Human-readable pronoun instruction for the {pronouns} prompt variable
+    """
 
-    # Convert pronouns to readable format for the prompt
     # For name_only, use the actual name if provided
     if pronouns == "name_only" and display_name:
-        pronoun_instruction = f"the name '{display_name}' (no pronouns, just use the name)"
-    else:
-        pronoun_map = {
-            "he_him": "he/him",
-            "she_her": "she/her",
-            "they_them": "they/them",
-            "name_only": "no pronouns (use 'The one who...' style instead)"
-        }
-        pronoun_instruction = pronoun_map.get(pronouns, "they/them")
+        return f"the name '{display_name}' (no pronouns, just use the name)"
+
+    pronoun_map = {
+        "he_him": "he/him",
+        "she_her": "she/her",
+        "they_them": "they/them",
+        "name_only": "no pronouns (use 'The one who...' style instead)"
+    }
+    return pronoun_map.get(pronouns, "they/them")
+
+
+def _build_input_vars(themes: ThemeData, free_write_letter: str, pronouns: str, display_name: Optional[str]) -> Dict[str, str]:
+    """
+    Converts ThemeData and user details into the prompt's input variables.
+
+    Args:
+        themes: ThemeData object containing extracted themes from user's quiz
+        free_write_letter: The user's original free-write letter
+        pronouns: One of "he_him", "she_her", "they_them", or "name_only"
+        display_name: Name to use when pronouns is "name_only"
+
+    Returns:
+        Dict of prompt variables shared by all four cultural mode templates
+    """
 
     # Prepare the input variables from the ThemeData object
     # We convert the ThemeData fields into a dictionary for the prompt
-    input_vars = {
+    return {
         "values": ", ".join(themes.values),
         "emotional_tone": themes.emotional_tone,
         "metaphors": ", ".join(themes.metaphors),
@@ -436,16 +483,119 @@ async def compose_poem(themes: ThemeData, cultural_mode: str, free_write_letter:
         "aspirations": ", ".join(themes.aspirations),
         "strengths": ", ".join(themes.strengths),
         "key_themes": ", ".join(themes.key_themes),
-        "pronouns": pronoun_instruction,
+        "pronouns": _pronoun_instruction(pronouns, display_name),
         "free_write_letter": free_write_letter or "No letter provided."
     }
 
+
+async def compose_poem(themes: ThemeData, cultural_mode: str, free_write_letter: str = "", pronouns: str = "they_them", display_name: Optional[str] = None) -> PoemOutput:
+    """
+    Generates praise poetry in the specified cultural mode.
+
+    This is the main function that orchestrates poetry generation. It selects
+    the appropriate prompt template based on the cultural mode, then uses
+    LangChain to generate structured poetic output.
+
+    Args:
+        themes: ThemeData object containing extracted themes from user's quiz
+        cultural_mode: One of "yoruba", "secular", "turkish", or "biblical"
+        free_write_letter: The user's original free-write letter for personalization
+        pronouns: One of "he_him", "she_her", "they_them", or "name_only"
+        display_name: Name to use when pronouns is "name_only" (optional for other modes)
+
+    Returns:
+        PoemOutput: Structured poem with lines, mode, and style notes
+
+    Raises:
+        ValueError: If cultural_mode is not one of the four supported modes
+    """
+
+    # Build the chain for the cultural mode (its prompt and parser are built
+    # once per process by the agent registry)
+    chain = create_poetry_composer(cultural_mode)
+
+    input_vars = _build_input_vars(themes, free_write_letter, pronouns, display_name)
+
+    # Everything the poem depends on (display_name only matters for "name_only")
+    fingerprint = {
+        "themes": themes,
+        "cultural_mode": cultural_mode,
+        "pronouns": pronouns,
+        "display_name": display_name if pronouns == "name_only" else None,
+        "free_write_letter": " ".join(free_write_letter.split())
+    }
+
     # Invoke the chain and get the structured PoemOutput
-    poem = await chain.ainvoke(input_vars)
+    # Memoized: a poem already composed from the same inputs is reused
+    # Hedged: a duplicate request is sent if this one is unusually slow
+    poem = await memo.call(fingerprint, lambda: hedger.call(lambda: chain.ainvoke(input_vars)))
 
     return poem
 
 
+async def stream_poem(themes: ThemeData, cultural_mode: str, free_write_letter: str = "", pronouns: str = "they_them", display_name: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming version of compose_poem.
+
+    Uses the same prompts as compose_poem, but streams the completion through
+    a JsonOutputParser so each poem line can be handed to the caller as soon
+    as the model has finished writing it. A line counts as finished once the
+    model has started the next line or closed the poem_lines array.
+
+    Args:
+        themes: ThemeData object containing extracted themes from user's quiz
+        cultural_mode: One of "yoruba", "secular", "turkish", or "biblical"
+        free_write_letter: The user's original free-write letter for personalization
+        pronouns: One of "he_him", "she_her", "they_them", or "name_only"
+        display_name: Name to use when pronouns is "name_only" (optional for other modes)
+
+    Yields:
+        ("line", str) for each finished poem line, in order, followed by
+        exactly one ("poem", PoemOutput) once the full poem has been validated
+
+    Raises:
+        ValueError: If cultural_mode is not one of the four supported modes,
+            or if the final output does not match PoemOutput
+    """
+
+    # The chain ends with a JSON parser that yields growing partial dicts while
+    # the model writes, which the PydanticOutputParser can't do (it only
+    # validates complete objects)
+    chain = create_poetry_composer(cultural_mode, partial=True)
+
+    input_vars = _build_input_vars(themes, free_write_letter, pronouns, display_name)
+
+    emitted = 0
+    latest: Dict[str, Any] = {}
+
+    async for partial in chain.astream(input_vars):
+        if not isinstance(partial, dict):
+            continue
+        latest = partial
+
+        if "poem_lines" not in partial:
+            continue
+
+        lines = partial.get("poem_lines") or []
+        # The last line may still be mid-sentence unless another key has
+        # already appeared after poem_lines (meaning the array is closed)
+        array_closed = list(partial.keys())[-1] != "poem_lines"
+        finished = len(lines) if array_closed else len(lines) - 1
+
+        while emitted < finished:
+            yield "line", lines[emitted]
+            emitted += 1
+
+    # Validate the final object against the same model the non-streaming path uses
+    poem = PoemOutput.model_validate(latest)
+
+    # Flush any lines that only became final when the stream ended
+    for line in poem.poem_lines[emitted:]:
+        yield "line", line
+
+    yield "poem", poem
+
+
 # Example usage for testing (commented out for production)
 """
 # To test this agent directly:
@@ -0,0 +1,126 @@
+"""
+Agent Registry - Build chains, prompts and clients once per process
+
+Building an agent is not free: every ChatOpenAI owns its own HTTP client
+(so a new one per request means a new TLS handshake per request), and every
+PydanticOutputParser renders its model's JSON schema into the prompt's
+format instructions. Agents register a builder for each of these objects
+under a name, and the registry builds them once - eagerly in the app
+lifespan, or lazily on first use in scripts and tests. The lifespan
+reset()s the registry when it closes the shared HTTP client, so the next
+lifespan builds them again on a new one.
+
+warm_up() then opens a connection from every OpenAI client the registered
+objects use, so the first real request doesn't pay for DNS + TLS. The
+lifespan awaits it before the server starts accepting requests, so the
+health check can't pass on a cold server.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+from openai import AsyncOpenAI
+
+
+logger = logging.getLogger(__name__)
+
+
+def _async_clients(obj: Any) -> Iterator[AsyncOpenAI]:
+    """Finds the AsyncOpenAI clients inside a chain, model, tuple or client."""
+    if isinstance(obj, AsyncOpenAI):
+        yield obj
+    elif isinstance(getattr(obj, "root_async_client", None), AsyncOpenAI):
+        yield obj.root_async_client  # ChatOpenAI
+    elif isinstance(obj, (tuple, list)):
+        for item in obj:
+            yield from _async_clients(item)
+    elif hasattr(obj, "steps"):
+        for step in obj.steps:  # RunnableSequence (prompt | llm | parser)
+            yield from _async_clients(step)
+
+
+class AgentRegistry:
+    """
+    Named objects built once and shared by every request.
+
+    Usage:
+        registry.register("extract", create_theme_extractor)
+        chain = registry.get("extract")
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, Callable[[], Any]] = {}
+        self._built: Dict[str, Any] = {}
+
+        self.build_seconds = 0.0
+        self.warm_connections = 0
+        self.warmup_errors = 0
+        self.warmup_seconds = 0.0
+
+    def register(self, name: str, builder: Callable[[], Any]) -> None:
+        """Adds a builder; it runs on build() or on the first get(name)."""
+        self._builders[name] = builder
+
+    def get(self, name: str) -> Any:
+        """Returns the object built for name, building it now if needed."""
+        if name not in self._built:
+            started = time.perf_counter()
+            self._built[name] = self._builders[name]()
+            self.build_seconds += time.perf_counter() - started
+        return self._built[name]
+
+    def build(self) -> List[str]:
+        """Builds every registered object (call from the app lifespan)."""
+        for name in self._builders:
+            self.get(name)
+        return list(self._built)
+
+    def reset(self) -> None:
+        """Drops every built object; the next build() or get() builds them again."""
+        self._built.clear()
+
+    async def warm_up(self, timeout: float) -> int:
+        """
+        Opens a pooled connection from each OpenAI client in use.
+
+        Failures are logged and counted but never raised: a provider outage
+        at boot shouldn't stop the server from starting.
+
+        Returns:
+            Number of clients that connected
+        """
+        clients = {id(client): client for obj in self._built.values() for client in _async_clients(obj)}
+
+        async def connect(client: AsyncOpenAI) -> bool:
+            try:
+                # Small authenticated GET; the connection stays in the client's pool
+                await client.with_options(max_retries=0, timeout=timeout).models.list()
+                return True
+            except Exception as e:
+                logger.warning("Connection warm-up failed: %s", e)
+                return False
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(connect(client) for client in clients.values()))
+        self.warmup_seconds = time.perf_counter() - started
+
+        self.warm_connections = sum(results)
+        self.warmup_errors = len(results) - self.warm_connections
+        return self.warm_connections
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns what was built, how long it took, and the warm-up result."""
+        return {
+            "built": len(self._built),
+            "registered": len(self._builders),
+            "build_seconds": round(self.build_seconds, 3),
+            "warm_connections": self.warm_connections,
+            "warmup_errors": self.warmup_errors,
+            "warmup_seconds": round(self.warmup_seconds, 3),
+        }
+
+
+# Shared by every agent module - built and warmed by the app lifespan in main.py
+registry = AgentRegistry()
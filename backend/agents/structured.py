@@ -0,0 +1,199 @@
+"""
+Structured Output - Native JSON-schema output instead of format instructions
+
+By default every agent appends PydanticOutputParser's format instructions
+(its model's whole JSON schema, plus an explanation of JSON schemas) to the
+prompt, and parses whatever text comes back. The model can still write
+something that isn't valid JSON, or misses a field, and the instructions
+cost prompt tokens on every call.
+
+For the agents listed in STRUCTURED_OUTPUT_AGENTS, the schema is instead
+sent as the provider's structured output setting (STRUCTURED_OUTPUT_METHOD):
+
+- "json_schema": OpenAI structured outputs. The completion is constrained
+  to the schema (strict mode), so it is always well-formed. Needs a model
+  that supports it (gpt-4o-mini, gpt-4o-2024-08-06 and later).
+- "function_calling": the model is made to call a tool whose parameters
+  are the schema. Works with older models (e.g. gpt-4-turbo), but the
+  arguments are not guaranteed to match.
+
+Either way the raw JSON is validated with model_validate_json directly,
+and the prompt's {format_instructions} are left empty.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import BaseGenerationOutputParser, JsonOutputParser
+from langchain_core.output_parsers.openai_tools import JsonOutputKeyToolsParser
+from langchain_core.outputs import ChatGeneration, Generation
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from langchain.output_parsers import PydanticOutputParser
+from pydantic import BaseModel, ValidationError
+
+from backend.config import settings
+
+
+AGENTS = ("extract", "compose", "affirm", "fused")
+
+# JSON schema keywords OpenAI's strict mode rejects. The model is still
+# validated against them afterwards, by model_validate_json.
+_UNSUPPORTED_KEYWORDS = ("default", "example", "examples", "format", "minItems", "maxItems", "minLength", "maxLength")
+
+
+def native_agents() -> List[str]:
+    """The agents STRUCTURED_OUTPUT_AGENTS switches to native structured output."""
+    names = [name.strip() for name in settings.STRUCTURED_OUTPUT_AGENTS.split(",") if name.strip()]
+    if "all" in names:
+        return list(AGENTS)
+    return [name for name in AGENTS if name in names]
+
+
+def uses_native(agent: str) -> bool:
+    """Whether an agent asks the provider for structured output."""
+    return agent in native_agents()
+
+
+@lru_cache(maxsize=None)
+def strict_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    The model's JSON schema in the form OpenAI's strict mode accepts: nested
+    models inlined, every property required, no additional properties and
+    no unsupported keywords. Computed once per model; don't modify the result.
+    """
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+
+    def visit(node: Any) -> Any:
+        if isinstance(node, list):
+            return [visit(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+
+        if "$ref" in node:
+            reference = node["$ref"].rsplit("/", 1)[-1]
+            node = {**definitions[reference], **{key: value for key, value in node.items() if key != "$ref"}}
+
+        node = {key: value for key, value in node.items() if key not in _UNSUPPORTED_KEYWORDS}
+        properties = node.get("properties")
+        if properties is not None:
+            node["properties"] = {name: visit(prop) for name, prop in properties.items()}
+            node["required"] = list(properties)
+            node["additionalProperties"] = False
+        for keyword in ("items", "anyOf", "allOf"):
+            if keyword in node:
+                node[keyword] = visit(node[keyword])
+        return node
+
+    return visit(schema)
+
+
+class StructuredOutputParser(BaseGenerationOutputParser[BaseModel]):
+    """
+    Validates a structured-output completion with model_validate_json.
+
+    Reads the message content ("json_schema") or the forced tool call's
+    arguments ("function_calling"), and raises OutputParserException for a
+    refusal, a missing tool call or JSON that doesn't match the model, the
+    same exception PydanticOutputParser raises.
+    """
+
+    pydantic_object: Type[BaseModel]
+    method: str = "json_schema"
+
+    @property
+    def schema_name(self) -> str:
+        return self.pydantic_object.__name__
+
+    def bind_to(self, llm: BaseChatModel) -> Runnable:
+        """The LLM, configured to answer with this parser's model."""
+        schema = strict_schema(self.pydantic_object)
+        description = (self.pydantic_object.__doc__ or "").strip()
+
+        if self.method == "function_calling":
+            tool = {
+                "type": "function",
+                "function": {"name": self.schema_name, "description": description, "parameters": schema},
+            }
+            return llm.bind_tools([tool], tool_choice=self.schema_name)
+
+        return llm.bind(response_format={
+            "type": "json_schema",
+            "json_schema": {"name": self.schema_name, "schema": schema, "strict": True},
+        })
+
+    def partial_parser(self) -> Runnable:
+        """A parser yielding the growing dict while the completion streams."""
+        if self.method == "function_calling":
+            return JsonOutputKeyToolsParser(key_name=self.schema_name, first_tool_only=True)
+        return JsonOutputParser()
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> BaseModel:
+        generation = result[0]
+        if not isinstance(generation, ChatGeneration):
+            raise OutputParserException("Structured output needs a chat model")
+        message = generation.message
+
+        refusal = message.additional_kwargs.get("refusal")
+        if refusal:
+            raise OutputParserException(f"The model refused to answer: {refusal}", llm_output=refusal)
+
+        if self.method == "function_calling":
+            calls = message.additional_kwargs.get("tool_calls") or []
+            if not calls:
+                raise OutputParserException("The model didn't call the output tool", llm_output=str(message.content))
+            text = calls[0]["function"]["arguments"]
+        else:
+            text = str(message.content)
+
+        try:
+            return self.pydantic_object.model_validate_json(text)
+        except ValidationError as e:
+            raise OutputParserException(
+                f"Failed to parse {self.schema_name} from completion: {e}", llm_output=text
+            ) from e
+
+    @property
+    def _type(self) -> str:
+        return "structured_output"
+
+
+def structured_chain(
+    agent: str,
+    prompt: ChatPromptTemplate,
+    llm: BaseChatModel,
+    parser: PydanticOutputParser,
+    native: Optional[bool] = None,
+    partial: bool = False
+) -> Runnable:
+    """
+    Builds an agent's chain: prompt -> LLM -> parser.
+
+    Args:
+        agent: "extract", "compose", "affirm" or "fused"
+        prompt: The agent's prompt, with its format instructions filled in
+        llm: The agent's chat model
+        parser: The agent's PydanticOutputParser
+        native: Use native structured output (default: per STRUCTURED_OUTPUT_AGENTS)
+        partial: End with a parser that yields growing dicts while
+            streaming, instead of the validated model
+
+    Returns:
+        The chain, as the agent used to build it, or with the schema sent
+        as structured output and the format instructions left out
+    """
+    if native is None:
+        native = uses_native(agent)
+
+    if not native:
+        return prompt | llm | (JsonOutputParser() if partial else parser)
+
+    output = StructuredOutputParser(pydantic_object=parser.pydantic_object, method=settings.STRUCTURED_OUTPUT_METHOD)
+    return (
+        prompt.partial(format_instructions="")
+        | output.bind_to(llm)
+        | (output.partial_parser() if partial else output)
+    )
@@ -8,6 +8,9 @@ Uses LangChain with PydanticOutputParser to ensure
 reliable, validated data extraction.
 """
 
+import asyncio
+from typing import Any, Dict, Optional
+
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
@@ -18,33 +21,50 @@ from backend.models.quiz import QuizSubmission
 
 # Import settings for API key configuration
 from backend.config import settings
+from backend.services.http import get_http_client
+from backend.services.metrics import LLMMetricsHandler
+
+# Tail-latency hedging for the upstream LLM call
+from backend.services.hedging import Hedger
+
+# Reuse of earlier outputs for the same (or nearly the same) inputs
+from backend.services.memo import StageMemo, fingerprint
+from backend.services.similarity import LetterIndex
+
+# Chains are built once per process, not per request
+from backend.agents.registry import registry
+from backend.agents.structured import structured_chain
 
 
 # Initialize the parser with our ThemeData model
 parser = PydanticOutputParser(pydantic_object=ThemeData)
 
+# Hedges unusually slow calls to this agent with a duplicate request
+hedger = Hedger("extract")
+
+# Reuses themes extracted for the same answers and letter
+memo = StageMemo("extract", ThemeData)
+
+# Finds earlier letters that are near-copies of a new one (same answers)
+letter_index = LetterIndex(
+    threshold=settings.SIMILAR_LETTER_THRESHOLD,
+    max_entries=settings.SIMILAR_LETTER_MAX_ENTRIES
+)
+
 
 # ============================================================================
 # PROMPT TEMPLATE
 # ============================================================================
 # This prompt guides the LLM to extract themes thoughtfully and accurately
+#
+# The instructions (system message) never change, and the user's answers and
+# letter come last (human message). Every call therefore starts with the
+# same bytes, which the provider's prompt cache can reuse.
 
-THEME_EXTRACTION_PROMPT = ChatPromptTemplate.from_template("""
+THEME_EXTRACTION_INSTRUCTIONS = """
 You are a thoughtful analyst helping to extract meaningful themes from personal reflections.
 
-Analyze the following quiz responses and free-write letter to identify core themes, values, and emotional patterns.
-
-QUIZ RESPONSES:
-- Top Values: {top_values}
-- Greatest Strength: {greatest_strength}
-- Aspirational Trait: {aspirational_trait}
-- Metaphor/Archetype: {metaphor_archetype}
-- Energy Style: {energy_style}
-- Life Focus: {life_focus}
-- Cultural Mode: {cultural_mode}
-
-FREE-WRITE LETTER:
-{free_write_letter}
+Analyze the quiz responses and free-write letter in the user's message to identify core themes, values, and emotional patterns.
 
 Your task is to deeply analyze these responses and extract:
 
@@ -65,23 +85,45 @@ Your task is to deeply analyze these responses and extract:
 Be authentic and specific to this individual. Extract themes from both explicit statements and implicit patterns.
 
 {format_instructions}
-""").partial(format_instructions=parser.get_format_instructions())
+"""
+
+THEME_EXTRACTION_INPUT = """QUIZ RESPONSES:
+- Top Values: {top_values}
+- Greatest Strength: {greatest_strength}
+- Aspirational Trait: {aspirational_trait}
+- Metaphor/Archetype: {metaphor_archetype}
+- Energy Style: {energy_style}
+- Life Focus: {life_focus}
+- Cultural Mode: {cultural_mode}
+
+FREE-WRITE LETTER:
+{free_write_letter}"""
+
+THEME_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", THEME_EXTRACTION_INSTRUCTIONS),
+    ("human", THEME_EXTRACTION_INPUT),
+]).partial(format_instructions=parser.get_format_instructions())
 
 
 # ============================================================================
 # AGENT CREATION FUNCTION
 # ============================================================================
 
-def create_theme_extractor():
+def create_theme_extractor(native: Optional[bool] = None):
     """
     Creates a Theme Extractor agent with structured output.
 
+    Args:
+        native: Send ThemeData's schema as native structured output instead
+            of format instructions (default: per STRUCTURED_OUTPUT_AGENTS)
+
     Returns:
         A LangChain chain that takes quiz data and returns ThemeData.
 
     The chain uses:
     - ChatOpenAI with gpt-4o-mini for cost-effective analysis
-    - PydanticOutputParser to ensure data matches our ThemeData model
+    - PydanticOutputParser (or native structured output) to ensure data
+      matches our ThemeData model
     - Temperature of 0.7 for balanced creativity and consistency
     """
 
@@ -89,16 +131,99 @@ def create_theme_extractor():
     llm = ChatOpenAI(
         model="gpt-4o-mini",  # Cost-effective model suitable for extraction tasks
         temperature=0.7,  # Balanced: creative insights but consistent structure
-        api_key=settings.OPENAI_API_KEY  # Load API key from settings
+        api_key=settings.OPENAI_API_KEY,  # Load API key from settings
+        timeout=settings.LLM_REQUEST_TIMEOUT,  # Never wait forever on one upstream call
+        max_retries=settings.LLM_MAX_RETRIES,
+        http_async_client=get_http_client(),  # Shared connection pool
+        callbacks=[LLMMetricsHandler("extract")]  # Latency and token metrics
     )
 
     # Create the chain: prompt -> LLM -> parser
-    # The pipe operator (|) chains the components together
-    chain = THEME_EXTRACTION_PROMPT | llm | parser
+    chain = structured_chain("extract", THEME_EXTRACTION_PROMPT, llm, parser, native=native)
 
     return chain
 
 
+registry.register("extract", create_theme_extractor)
+
+
+# ============================================================================
+# INPUT PREPARATION
+# ============================================================================
+
+def _build_input_data(quiz: QuizSubmission) -> Dict[str, str]:
+    """
+    Unpacks the quiz fields into the variables used by THEME_EXTRACTION_PROMPT.
+
+    Args:
+        quiz: A validated QuizSubmission object
+
+    Returns:
+        Dict of prompt variables
+    """
+    return {
+        "top_values": ", ".join(quiz.top_values),
+        "greatest_strength": quiz.greatest_strength,
+        "aspirational_trait": quiz.aspirational_trait,
+        "metaphor_archetype": quiz.metaphor_archetype,
+        "energy_style": quiz.energy_style,
+        "life_focus": quiz.life_focus,
+        "cultural_mode": quiz.cultural_mode,
+        "free_write_letter": quiz.free_write_letter
+    }
+
+
+def input_fingerprint(quiz: QuizSubmission) -> Dict[str, Any]:
+    """
+    The inputs the extracted themes depend on: the quiz answers and the letter.
+
+    Cultural mode and pronouns are left out on purpose. The themes describe
+    the person, and the Poetry Composer applies the chosen tradition itself,
+    so switching modes reuses the themes instead of extracting them again.
+    The order of top values and the letter's whitespace are normalized.
+    """
+    return {
+        "top_values": sorted(quiz.top_values),
+        "greatest_strength": quiz.greatest_strength,
+        "aspirational_trait": quiz.aspirational_trait,
+        "metaphor_archetype": quiz.metaphor_archetype,
+        "energy_style": quiz.energy_style,
+        "life_focus": quiz.life_focus,
+        "free_write_letter": " ".join(quiz.free_write_letter.split())
+    }
+
+
+def _answers_group(quiz: QuizSubmission) -> str:
+    """Groups letters by the rest of the fingerprint, so only identical answers are compared."""
+    answers = input_fingerprint(quiz)
+    del answers["free_write_letter"]
+    return fingerprint("extract-answers", answers)
+
+
+async def _extract_or_reuse(quiz: QuizSubmission, run) -> ThemeData:
+    """
+    Reuses the themes of a near-duplicate letter with the same answers, or
+    runs the extraction and indexes the letter for later requests.
+    """
+    if not settings.SIMILAR_LETTER_ENABLED:
+        return await run()
+
+    group = _answers_group(quiz)
+
+    # MinHash is CPU-bound: compute it once, off the event loop, for both the
+    # lookup and the add
+    signature = await asyncio.to_thread(letter_index.signature, quiz.free_write_letter)
+
+    match = letter_index.lookup(group, quiz.free_write_letter, signature)
+    if match is not None:
+        _, themes_json = match
+        return ThemeData.model_validate_json(themes_json)
+
+    result = await run()
+    letter_index.add(group, quiz.free_write_letter, result.model_dump_json(), signature)
+    return result
+
+
 # ============================================================================
 # MAIN EXTRACTION FUNCTION
 # ============================================================================
@@ -122,25 +247,22 @@ async def extract_themes(quiz: QuizSubmission) -> ThemeData:
         print(themes.values)  # ["integrity", "compassion", "wisdom"]
     """
 
-    # Create the theme extractor chain
-    extractor = create_theme_extractor()
+    # Get the theme extractor chain (built once by the agent registry)
+    extractor = registry.get("extract")
 
     # Prepare the input data by unpacking the quiz fields
     # This matches the variables in our prompt template
-    input_data = {
-        "top_values": ", ".join(quiz.top_values),
-        "greatest_strength": quiz.greatest_strength,
-        "aspirational_trait": quiz.aspirational_trait,
-        "metaphor_archetype": quiz.metaphor_archetype,
-        "energy_style": quiz.energy_style,
-        "life_focus": quiz.life_focus,
-        "cultural_mode": quiz.cultural_mode,
-        "free_write_letter": quiz.free_write_letter
-    }
+    input_data = _build_input_data(quiz)
 
     # Invoke the chain asynchronously
     # The LLM will analyze the input and return a validated ThemeData object
-    result = await extractor.ainvoke(input_data)
+    # Memoized: themes already extracted for the same answers are reused,
+    # including for a letter that is a near-copy of one seen before
+    # Hedged: a duplicate request is sent if this one is unusually slow
+    result = await memo.call(
+        input_fingerprint(quiz),
+        lambda: _extract_or_reuse(quiz, lambda: hedger.call(lambda: extractor.ainvoke(input_data)))
+    )
 
     return result
 
@@ -163,18 +285,9 @@ def extract_themes_sync(quiz: QuizSubmission) -> ThemeData:
         ThemeData: Structured themes extracted from the quiz
     """
 
-    extractor = create_theme_extractor()
+    extractor = registry.get("extract")
 
-    input_data = {
-        "top_values": ", ".join(quiz.top_values),
-        "greatest_strength": quiz.greatest_strength,
-        "aspirational_trait": quiz.aspirational_trait,
-        "metaphor_archetype": quiz.metaphor_archetype,
-        "energy_style": quiz.energy_style,
-        "life_focus": quiz.life_focus,
-        "cultural_mode": quiz.cultural_mode,
-        "free_write_letter": quiz.free_write_letter
-    }
+    input_data = _build_input_data(quiz)
 
     # Use invoke() for synchronous execution
     result = extractor.invoke(input_data)
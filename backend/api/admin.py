@@ -0,0 +1,221 @@
+"""
+API Routes for Operators
+
+Diagnostics that shouldn't be public, behind ADMIN_TOKEN (sent as the
+X-Admin-Token header, or ?token= so the pages open in a browser):
+
+    GET    /api/v1/admin/traces               -> the slowest recent requests as a waterfall
+    GET    /api/v1/admin/profiles             -> sampled CPU time and allocations per endpoint
+    GET    /api/v1/admin/profiles/flamegraph  -> one endpoint's folded stacks
+    DELETE /api/v1/admin/profiles             -> start profiling afresh
+
+While ADMIN_TOKEN is empty, every admin route answers 404.
+"""
+
+import html
+import secrets
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import HTMLResponse, PlainTextResponse
+
+from backend.config import settings
+from backend.services.profiling import profiler
+from backend.services.tracing import Span, Trace, tracer
+
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["admin"]
+)
+
+
+async def require_admin(
+    x_admin_token: Optional[str] = Header(None),
+    token: Optional[str] = Query(None, description="Admin token, if it can't be sent as X-Admin-Token")
+) -> None:
+    """
+    Dependency for admin routes: the request must carry ADMIN_TOKEN.
+
+    Raises:
+        HTTPException: 404 if no ADMIN_TOKEN is configured, 401 for a missing
+        or wrong token
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    given = x_admin_token or token or ""
+    if not secrets.compare_digest(given.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
+
+
+# ============================================================================
+# TRACES
+# ============================================================================
+
+@router.get(
+    "/traces",
+    summary="Slowest recent requests",
+    description="Recent traces that took at least min_seconds, slowest first, as an HTML waterfall or JSON",
+    dependencies=[Depends(require_admin)]
+)
+async def recent_traces(
+    min_seconds: Optional[float] = Query(None, ge=0, description="Default TRACE_SLOW_SECONDS"),
+    limit: int = Query(20, ge=1, le=200),
+    format: Literal["html", "json"] = Query("html")
+):
+    """
+    Shows where the time went in the slowest recent requests.
+
+    Each trace is drawn as a waterfall: one bar per span (stage, LangChain
+    run, LLM call, upstream HTTP call, TTS call), indented under its parent
+    and offset by when it started, so waits and serial calls stand out.
+    """
+    threshold = settings.TRACE_SLOW_SECONDS if min_seconds is None else min_seconds
+    traces = tracer.slowest(threshold, limit)
+
+    if format == "json":
+        return {
+            "min_seconds": threshold,
+            "traces": [[_span_dict(span) for span in trace.spans] for trace in traces],
+        }
+
+    return HTMLResponse(_render_waterfalls(traces, threshold))
+
+
+def _span_dict(span: Span) -> Dict[str, Any]:
+    return {
+        "name": span.name,
+        "trace_id": span.trace_id,
+        "span_id": span.span_id,
+        "parent_id": span.parent_id,
+        "start_ns": span.start_ns,
+        "duration": round(span.duration, 4),
+        "attributes": span.attributes,
+        "error": span.error,
+    }
+
+
+def _depths(trace: Trace) -> Dict[str, int]:
+    """Nesting depth of each span (spans whose parent was dropped count as top-level)."""
+    parents = {span.span_id: span.parent_id for span in trace.spans}
+    depths: Dict[str, int] = {}
+    for span in trace.spans:
+        depth, parent = 0, span.parent_id
+        while parent in parents:
+            depth, parent = depth + 1, parents[parent]
+        depths[span.span_id] = depth
+    return depths
+
+
+def _ordered(trace: Trace) -> List[Span]:
+    """Spans depth-first (each parent followed by its children), children by start time."""
+    children: Dict[Optional[str], List[Span]] = {}
+    for span in trace.spans[1:]:
+        children.setdefault(span.parent_id, []).append(span)
+
+    ordered = []
+    stack = [trace.root]
+    while stack:
+        span = stack.pop()
+        ordered.append(span)
+        stack.extend(reversed(children.get(span.span_id, [])))
+    return ordered
+
+
+def _render_waterfalls(traces: List[Trace], threshold: float) -> str:
+    sections = []
+    for trace in traces:
+        root = trace.root
+        total = max(root.end_ns - root.start_ns, 1)
+        depths = _depths(trace)
+
+        rows = []
+        for span in _ordered(trace):
+            left = (span.start_ns - root.start_ns) / total * 100
+            width = max((span.end_ns - span.start_ns) / total * 100, 0.2)
+            attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+            title = html.escape(f"{attributes} {span.error or ''}".strip(), quote=True)
+            rows.append(
+                f'<tr title="{title}"><td style="padding-left:{depths[span.span_id] * 1.2}em">'
+                f'{html.escape(span.name)}</td>'
+                f'<td class="ms">{span.duration * 1000:.0f} ms</td>'
+                f'<td class="lane"><div class="bar{" error" if span.error else ""}" '
+                f'style="left:{left:.2f}%;width:{width:.2f}%"></div></td></tr>'
+            )
+
+        request = ", ".join(f"{key}={value}" for key, value in root.attributes.items())
+        sections.append(
+            f"<h2>{html.escape(root.name)} &mdash; {trace.duration:.2f} s</h2>"
+            f'<p class="meta">{root.trace_id} {html.escape(request)}</p>'
+            f"<table>{''.join(rows)}</table>"
+        )
+
+    body = "".join(sections) or f"<p>No traces of at least {threshold:g} s yet.</p>"
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Oriki traces</title><style>"
+        "body{font:13px system-ui,sans-serif;margin:2em}table{border-collapse:collapse;width:100%}"
+        "td{padding:1px 6px;white-space:nowrap}td.ms{text-align:right;color:#555}"
+        "td.lane{position:relative;width:60%}.bar{position:absolute;top:3px;height:12px;background:#4a7bd0}"
+        ".bar.error{background:#d04a4a}.meta{color:#777}tr:hover{background:#f3f3f3}"
+        f"</style></head><body><h1>Traces of at least {threshold:g} s</h1>{body}</body></html>"
+    )
+
+
+# ============================================================================
+# PROFILES
+# ============================================================================
+
+@router.get(
+    "/profiles",
+    summary="Profiled CPU time and allocations per endpoint",
+    description="Requests profiled so far (PROFILE_SAMPLE_RATE or X-Profile), merged per endpoint",
+    dependencies=[Depends(require_admin)]
+)
+async def profiles() -> Dict[str, Any]:
+    """
+    Summarizes the profiled requests of each endpoint: sampled event-loop
+    CPU seconds (in total and per request), the functions the samples
+    landed in most, peak traced memory and the top allocation sites.
+    """
+    return {
+        "sample_rate": settings.PROFILE_SAMPLE_RATE,
+        "interval_seconds": profiler.interval,
+        "endpoints": profiler.stats(),
+    }
+
+
+@router.get(
+    "/profiles/flamegraph",
+    summary="Folded stacks of one endpoint",
+    description="Sampled stacks in the folded format read by flamegraph.pl, inferno and speedscope",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_admin)]
+)
+async def profile_flamegraph(
+    endpoint: str = Query(..., description='As listed by /admin/profiles, e.g. "POST /api/v1/generate"')
+) -> PlainTextResponse:
+    """
+    Returns one "frame;frame;frame count" line per distinct stack, e.g.
+
+        curl -H "X-Admin-Token: $TOKEN" ".../profiles/flamegraph?endpoint=POST%20/api/v1/generate" \\
+            | flamegraph.pl > generate.svg
+
+    Raises:
+        HTTPException: 404 if the endpoint hasn't been profiled
+    """
+    folded = profiler.folded(endpoint)
+    if folded is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No profiles for {endpoint}")
+    return PlainTextResponse(folded)
+
+
+@router.delete(
+    "/profiles",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Forget profiled requests",
+    dependencies=[Depends(require_admin)]
+)
+async def reset_profiles() -> None:
+    """Clears every endpoint's profile, e.g. before comparing a change."""
+    profiler.reset()
@@ -0,0 +1,133 @@
+"""
+API Routes for Background Jobs
+
+Instead of holding the HTTP connection open for the whole generation,
+clients can enqueue a job and poll for its result:
+
+    POST /api/v1/jobs        -> 202 with the job id, queue position and ETA
+    GET  /api/v1/jobs/{id}   -> current status, and the result once finished
+
+Jobs run the exact same pipelines as /generate and /audio. Nobody is
+holding a connection open for them, so they run without a request deadline
+(the per-stage timeouts still apply).
+"""
+
+from fastapi import APIRouter, HTTPException, status
+
+from backend.config import settings
+from backend.models.quiz import QuizSubmission
+from backend.models.audio import AudioRequest, AudioResponse
+from backend.models.generation import GenerationResponse
+from backend.models.jobs import JobRequest, JobStatusResponse
+from backend.services.jobs import (
+    InMemoryBroker,
+    JobQueue,
+    QueueFullError,
+    SQLiteBroker,
+)
+
+# The job handlers reuse the endpoints' pipelines so behaviour is identical
+from backend.api.routes import generate_package, synthesize_audio
+
+
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["jobs"]
+)
+
+
+# ============================================================================
+# JOB HANDLERS
+# ============================================================================
+
+async def _run_generate_job(payload: str) -> GenerationResponse:
+    """Runs the /generate pipeline for a queued quiz submission."""
+    return await generate_package(QuizSubmission.model_validate_json(payload))
+
+
+async def _run_audio_job(payload: str) -> AudioResponse:
+    """Runs the /audio conversion for a queued audio request."""
+    return await synthesize_audio(AudioRequest.model_validate_json(payload))
+
+
+# Singleton queue - workers are started and stopped by the app lifespan in main.py
+job_queue = JobQueue(
+    broker=SQLiteBroker(settings.JOB_SQLITE_PATH) if settings.JOB_BROKER == "sqlite" else InMemoryBroker(),
+    handlers={
+        "generate": _run_generate_job,
+        "audio": _run_audio_job,
+    },
+    workers=settings.JOB_WORKERS,
+    max_depth=settings.JOB_MAX_QUEUE_DEPTH,
+    result_ttl=settings.JOB_RESULT_TTL_SECONDS,
+    lease_seconds=settings.JOB_LEASE_SECONDS
+)
+
+
+# ============================================================================
+# ENDPOINTS
+# ============================================================================
+
+@router.post(
+    "/jobs",
+    response_model=JobStatusResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Enqueue a generation or audio job",
+    description="Queues a quiz submission or audio request and returns a job id to poll"
+)
+async def create_job(request: JobRequest) -> JobStatusResponse:
+    """
+    Queues a job on the background worker pool.
+
+    Args:
+        request: JobRequest with either a quiz submission or an audio request
+
+    Returns:
+        JobStatusResponse: The queued job, including its queue position and ETA
+
+    Raises:
+        HTTPException: 503 if the queue is full
+    """
+    payload = request.submission if request.kind == "generate" else request.audio
+
+    try:
+        job = await job_queue.submit(request.kind, payload)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+
+    return JobStatusResponse(**await job_queue.status(job.id))
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get job status",
+    description="Returns the job's status, queue position, ETA and, once finished, its result"
+)
+async def get_job(job_id: str) -> JobStatusResponse:
+    """
+    Polls a background job.
+
+    Args:
+        job_id: The id returned by POST /api/v1/jobs
+
+    Returns:
+        JobStatusResponse: Current job state
+
+    Raises:
+        HTTPException: 404 if the job doesn't exist or its result has expired
+    """
+    job = await job_queue.status(job_id)
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job not found: {job_id}"
+        )
+
+    return JobStatusResponse(**job)
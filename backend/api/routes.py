@@ -2,24 +2,77 @@
 API Routes for Oriki Generation Pipeline
 
 This module defines the FastAPI endpoints that orchestrate the complete
-Oriki generation process, tying together all three agents in sequence.
+Oriki generation process, tying together all three agents. Theme extraction
+runs first; poem composition and affirmation generation then fan out
+concurrently.
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import AsyncIterator, Dict, Any, Literal, Optional, Tuple
+import asyncio
 import base64
+import json
+import mmap
+import os
+import time
+
+# Import configuration
+from backend.config import settings
 
 # Import all our models
 from backend.models.quiz import QuizSubmission
 from backend.models.generation import GenerationResponse
+from backend.models.theme import ThemeData
+from backend.models.poem import PoemOutput
+from backend.models.affirmations import AffirmationsOutput
 from backend.models.quiz_config import ALL_QUESTIONS
-from backend.models.audio import AudioRequest, AudioResponse
+from backend.models.audio import AudioRequest, AudioResponse, TTSVoice
 
 # Import all agents
-from backend.agents.theme_extractor import extract_themes
-from backend.agents.poetry_composer import compose_poem
+from backend.agents.theme_extractor import extract_themes, letter_index
+from backend.agents.poetry_composer import _select_prompt, compose_poem, stream_poem
 from backend.agents.affirmation_generator import generate_affirmations
-from backend.agents.audio_renderer import generate_audio, estimate_duration
+from backend.agents.fused_generator import generate_fused
+from backend.agents.audio_renderer import (
+    AUDIO_FORMAT,
+    TTS_MODEL,
+    audio_cache,
+    audio_store,
+    estimate_duration,
+    generate_audio,
+    speculate_audio,
+    segment_flight,
+    speculative_tts,
+    speech_rate,
+    stream_audio,
+)
+from backend.agents.registry import registry as agent_registry
+
+# Import shared services
+from backend.services.singleflight import SingleFlight, request_key
+from backend.services.executor import PipelineExecutor, Stage, StageFailed, StagePolicy
+from backend.services.hedging import HEDGERS
+from backend.services.memo import MEMOS, fresh_outputs
+from backend.services.http import get_http_client, pool_stats
+from backend.services.audio_cache import audio_key
+from backend.services.file_store import LocalFileStore, content_type_for
+from backend.services import mp3
+from backend.services.metrics import StageTimer, hit_families, metrics, prompt_cache_stats
+from backend.services.tracing import tracer
+from backend.services.cache import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    canonical_submission,
+)
+from backend.services.cancellation import (
+    ClientDisconnected,
+    Deadline,
+    DeadlineExceeded,
+    DisconnectGuard,
+)
 
 
 # Create the APIRouter - this will be included in the main FastAPI app
@@ -29,6 +82,33 @@ router = APIRouter(
 )
 
 
+# In-flight request coalescing for the two paid endpoints
+generation_flight = SingleFlight("generate")
+audio_flight = SingleFlight("audio")
+
+# Complete /generate responses, reused for identical submissions
+# (snapshots for the memory backend are saved/loaded by the lifespan in main.py)
+if settings.RESPONSE_CACHE_BACKEND == "sqlite":
+    _cache_backend = SQLiteCacheBackend(settings.RESPONSE_CACHE_SQLITE_PATH, settings.RESPONSE_CACHE_MAX_ENTRIES)
+elif settings.RESPONSE_CACHE_BACKEND == "redis":
+    _cache_backend = RedisCacheBackend(settings.RESPONSE_CACHE_REDIS_URL, settings.RESPONSE_CACHE_MAX_ENTRIES)
+else:
+    _cache_backend = MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+response_cache = ResponseCache(
+    _cache_backend,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED
+)
+
+# Stop paying for work nobody is waiting for any more
+generation_guard = DisconnectGuard("generate")
+audio_guard = DisconnectGuard("audio")
+
+# nginx's "Client Closed Request" - never seen by the client, but shows up in logs
+HTTP_499_CLIENT_CLOSED_REQUEST = 499
+
+
 # ============================================================================
 # HELPER FUNCTION: Cultural Mode Mapping
 # ============================================================================
@@ -59,40 +139,27 @@ def map_cultural_mode(quiz_cultural_mode: str) -> str:
 
 
 # ============================================================================
-# MAIN GENERATION ENDPOINT
+# PIPELINE STAGES: Extract -> {Compose, Affirm}
 # ============================================================================
 
-@router.post(
-    "/generate",
-    response_model=GenerationResponse,
-    status_code=status.HTTP_200_OK,
-    summary="Generate complete Oriki package",
-    description="Accepts quiz submission and returns poem, affirmations, and themes"
-)
-async def generate_oriki(submission: QuizSubmission) -> GenerationResponse:
+async def _extract_stage(submission: QuizSubmission) -> ThemeData:
     """
-    Main endpoint that orchestrates the complete Oriki generation pipeline.
-
-    This endpoint coordinates all three agents in sequence:
-    1. Theme Extractor: Analyzes quiz responses to extract themes
-    2. Poetry Composer: Creates praise poetry in the chosen cultural mode
-    3. Affirmation Generator: Produces CBT-based daily affirmations
+    Runs the Theme Extractor and maps its failures to HTTP errors.
 
     Args:
         submission: Validated quiz submission from the user
 
     Returns:
-        GenerationResponse: Complete package with poem, affirmations, and themes
+        ThemeData: Themes extracted from the quiz answers and letter
 
     Raises:
-        HTTPException: If any step in the pipeline fails
+        HTTPException: 500 if theme extraction fails
     """
-
     try:
-        # STEP 1: Extract themes from the quiz submission
         # This analyzes all quiz responses and the free-write letter
         # to identify values, strengths, aspirations, and emotional tone
-        themes = await extract_themes(submission)
+        with StageTimer("extract"), tracer.span("extract"):
+            themes = await extract_themes(submission)
 
     except Exception as e:
         # If theme extraction fails, return a 500 error with details
@@ -101,20 +168,37 @@ async def generate_oriki(submission: QuizSubmission) -> GenerationResponse:
             detail=f"Theme extraction failed: {str(e)}"
         )
 
+    return themes
+
+
+async def _compose_stage(submission: QuizSubmission, themes: ThemeData) -> PoemOutput:
+    """
+    Runs the Poetry Composer and maps its failures to HTTP errors.
+
+    Args:
+        submission: Validated quiz submission from the user
+        themes: Themes extracted from the submission
+
+    Returns:
+        PoemOutput: The generated poem, tagged with the quiz cultural mode
+
+    Raises:
+        HTTPException: 400 for an invalid cultural mode, 500 for anything else
+    """
     try:
-        # STEP 2: Generate the praise poem
         # Map the cultural mode from quiz format to poetry composer format
         poetry_cultural_mode = map_cultural_mode(submission.cultural_mode)
 
         # Generate the poem using the extracted themes, cultural mode, pronouns, display_name,
         # and the user's free-write letter for personalization
-        poem = await compose_poem(
-            themes=themes,
-            cultural_mode=poetry_cultural_mode,
-            free_write_letter=submission.free_write_letter,
-            pronouns=submission.pronouns,
-            display_name=submission.display_name
-        )
+        with StageTimer("compose"), tracer.span("compose", cultural_mode=poetry_cultural_mode):
+            poem = await compose_poem(
+                themes=themes,
+                cultural_mode=poetry_cultural_mode,
+                free_write_letter=submission.free_write_letter,
+                pronouns=submission.pronouns,
+                display_name=submission.display_name
+            )
 
         # Update the poem's cultural_mode to match the quiz format (with _inspired suffix)
         # This ensures consistency across the frontend
@@ -133,10 +217,26 @@ async def generate_oriki(submission: QuizSubmission) -> GenerationResponse:
             detail=f"Poetry generation failed: {str(e)}"
         )
 
+    return poem
+
+
+async def _affirm_stage(themes: ThemeData) -> AffirmationsOutput:
+    """
+    Runs the Affirmation Generator and maps its failures to HTTP errors.
+
+    Args:
+        themes: Themes extracted from the submission
+
+    Returns:
+        AffirmationsOutput: Affirmations grounded in the user's themes
+
+    Raises:
+        HTTPException: 500 if affirmation generation fails
+    """
     try:
-        # STEP 3: Generate daily affirmations
         # These are grounded in the extracted themes and user's values
-        affirmations = await generate_affirmations(themes)
+        with StageTimer("affirm"), tracer.span("affirm"):
+            affirmations = await generate_affirmations(themes)
 
     except Exception as e:
         # If affirmation generation fails, return a 500 error
@@ -145,13 +245,551 @@ async def generate_oriki(submission: QuizSubmission) -> GenerationResponse:
             detail=f"Affirmation generation failed: {str(e)}"
         )
 
-    # STEP 4: Combine all results into the complete response
-    # Return everything together so the frontend has the full package
+    return affirmations
+
+
+def _is_retryable(e: Exception) -> bool:
+    """Timeouts and server-side failures are worth retrying; 4xx errors are not."""
+    if isinstance(e, HTTPException):
+        return e.status_code >= 500
+    return True
+
+
+# Human-readable names for timeout errors, per stage
+STAGE_LABELS = {
+    "extract": "Theme extraction",
+    "compose": "Poetry generation",
+    "affirm": "Affirmation generation",
+}
+
+
+# The staged pipeline as a DAG: compose and affirm both start as soon as
+# extract finishes. Affirmations are non-critical - if they fail or time
+# out, the poem is still returned (as a partial response) instead of a 500.
+STAGED_PIPELINE = PipelineExecutor([
+    Stage(
+        "extract",
+        lambda ctx: _extract_stage(ctx["submission"]),
+        policy=StagePolicy(
+            timeout=settings.STAGE_EXTRACT_TIMEOUT,
+            retries=settings.STAGE_EXTRACT_RETRIES,
+            retry_if=_is_retryable,
+            min_time=settings.STAGE_EXTRACT_MIN_TIME
+        )
+    ),
+    Stage(
+        "compose",
+        lambda ctx: _compose_stage(ctx["submission"], ctx["extract"]),
+        depends_on=("extract",),
+        policy=StagePolicy(
+            timeout=settings.STAGE_COMPOSE_TIMEOUT,
+            retries=settings.STAGE_COMPOSE_RETRIES,
+            retry_if=_is_retryable,
+            min_time=settings.STAGE_COMPOSE_MIN_TIME
+        )
+    ),
+    Stage(
+        "affirm",
+        lambda ctx: _affirm_stage(ctx["extract"]),
+        depends_on=("extract",),
+        policy=StagePolicy(
+            timeout=settings.STAGE_AFFIRM_TIMEOUT,
+            retries=settings.STAGE_AFFIRM_RETRIES,
+            retry_if=_is_retryable,
+            min_time=settings.STAGE_AFFIRM_MIN_TIME,
+            critical=False
+        ),
+        # The frontend shows its own message when the list is empty
+        fallback=lambda ctx, e: AffirmationsOutput(affirmations=[], focus_areas=[])
+    ),
+])
+
+
+async def run_staged_pipeline(
+    submission: QuizSubmission,
+    deadline: Optional[Deadline] = None
+) -> GenerationResponse:
+    """
+    Runs extract -> {compose, affirm} with per-stage timeouts and retries.
+
+    Compose and affirm run concurrently. If a critical stage (extract or
+    compose) fails, the other running stages are cancelled before the error
+    is returned, so no upstream LLM call is left running in the background.
+
+    Args:
+        submission: Validated quiz submission from the user
+        deadline: Optional request deadline; stages that can't finish
+                  before it are failed instead of started
+
+    Returns:
+        GenerationResponse: marked partial if the affirmations were replaced
+        by their fallback
+
+    Raises:
+        HTTPException: The failing stage's error (400/500), or 504 if it timed out
+    """
+    try:
+        run = await STAGED_PIPELINE.run({"submission": submission}, deadline=deadline)
+
+    except StageFailed as e:
+        if isinstance(e.cause, HTTPException):
+            raise e.cause
+        if isinstance(e.cause, DeadlineExceeded):
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=f"{STAGE_LABELS[e.stage]} could not finish before the request deadline"
+            )
+        if isinstance(e.cause, TimeoutError):
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=f"{STAGE_LABELS[e.stage]} timed out"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{STAGE_LABELS[e.stage]} failed: {str(e.cause)}"
+        )
+
     return GenerationResponse(
-        poem=poem,
-        affirmations=affirmations,
-        themes=themes,
-        cultural_mode=submission.cultural_mode  # Use original format for consistency
+        poem=run.results["compose"],
+        affirmations=run.results["affirm"],
+        themes=run.results["extract"],
+        cultural_mode=submission.cultural_mode,  # Use original format for consistency
+        partial=run.partial,
+        degraded_stages=sorted(run.degraded)
+    )
+
+
+# ============================================================================
+# FUSED ENGINE: Themes + Poem + Affirmations in one call
+# ============================================================================
+
+async def run_fused_stage(
+    submission: QuizSubmission
+) -> Tuple[ThemeData, PoemOutput, AffirmationsOutput]:
+    """
+    Runs the single-call fused engine and splits its output.
+
+    Args:
+        submission: Validated quiz submission from the user
+
+    Returns:
+        Tuple of (ThemeData, PoemOutput, AffirmationsOutput)
+
+    Raises:
+        HTTPException: 400 for an invalid cultural mode, 500 for anything else
+    """
+    try:
+        with StageTimer("fused"), tracer.span("fused"):
+            result = await generate_fused(
+                submission,
+                cultural_mode=map_cultural_mode(submission.cultural_mode)
+            )
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cultural mode: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Fused generation failed: {str(e)}"
+        )
+
+    # Keep the quiz format of the cultural mode, same as the staged path
+    result.poem.cultural_mode = submission.cultural_mode
+
+    return result.themes, result.poem, result.affirmations
+
+
+# ============================================================================
+# MAIN GENERATION ENDPOINT
+# ============================================================================
+
+@router.post(
+    "/generate",
+    response_model=GenerationResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Generate complete Oriki package",
+    description="Accepts quiz submission and returns poem, affirmations, and themes"
+)
+async def generate_oriki(
+    submission: QuizSubmission,
+    request: Request,
+    engine: Optional[Literal["staged", "fused"]] = Query(
+        None,
+        description="Override the GENERATION_ENGINE setting for this request"
+    ),
+    request_timeout: Optional[float] = Header(
+        None,
+        alias="X-Request-Timeout",
+        gt=0,
+        description="Seconds the client will wait for the response (default REQUEST_DEADLINE_SECONDS)"
+    ),
+    cache_control: Optional[str] = Header(
+        None,
+        description='"no-cache" skips the response cache and generates a fresh variation'
+    )
+) -> GenerationResponse:
+    """
+    Main endpoint that orchestrates the complete Oriki generation pipeline.
+
+    This endpoint coordinates all three agents:
+    1. Theme Extractor: Analyzes quiz responses to extract themes
+    2. Poetry Composer: Creates praise poetry in the chosen cultural mode
+    3. Affirmation Generator: Produces CBT-based daily affirmations
+
+    Steps 2 and 3 run concurrently once the themes are available.
+
+    With the "fused" engine, all three outputs come from a single LLM call
+    instead (see backend/agents/fused_generator.py).
+
+    Args:
+        submission: Validated quiz submission from the user
+        request: The raw request, used to notice when the client disconnects
+        engine: Optional per-request override of settings.GENERATION_ENGINE
+        request_timeout: Optional X-Request-Timeout header (seconds)
+        cache_control: Optional Cache-Control header; "no-cache" bypasses
+                       the cache (used by the Regenerate button)
+
+    Returns:
+        GenerationResponse: Complete package with poem, affirmations, and themes
+
+    Raises:
+        HTTPException: If any step in the pipeline fails, 504 if it can't
+        finish before the deadline, 499 if the client disconnected
+
+    If the client disconnects (the frontend aborts after 60 seconds, or the
+    user cancels), the in-flight LLM calls are cancelled.
+
+    Speculative audio is only offered by /generate/stream: here the lines
+    only exist once the whole package is returned, when the client can ask
+    for /audio itself.
+    """
+
+    use_cache = "no-cache" not in (cache_control or "").lower()
+
+    with tracer.span(
+        "POST /generate",
+        engine=engine or settings.GENERATION_ENGINE,
+        cultural_mode=submission.cultural_mode,
+        letter_length=len(submission.free_write_letter),
+        use_cache=use_cache
+    ):
+        response = await _until_disconnected(
+            generation_guard,
+            request,
+            generate_package(submission, engine, Deadline.from_timeout(request_timeout), use_cache)
+        )
+
+    return response
+
+
+async def generate_package(
+    submission: QuizSubmission,
+    engine: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    use_cache: bool = True
+) -> GenerationResponse:
+    """
+    Generates the Oriki package, reusing cached and in-flight generations.
+
+    Used by /generate and by background jobs. A cached response for the
+    same (canonicalized) submission is returned straight away. Otherwise,
+    identical submissions that arrive while one is already being generated
+    share that generation instead of starting their own (and run under the
+    first one's deadline). Complete responses are then cached; partial
+    ones are not.
+
+    Args:
+        submission: Validated quiz submission from the user
+        engine: "staged" or "fused"; defaults to settings.GENERATION_ENGINE
+        deadline: Optional request deadline
+        use_cache: False to skip the cache lookup and generate a fresh
+                   response (which then replaces the cached one); the poem
+                   and affirmation memos are skipped too
+
+    Returns:
+        GenerationResponse: Complete package with poem, affirmations, and themes
+    """
+
+    engine = engine or settings.GENERATION_ENGINE
+    canonical = canonical_submission(submission)
+    key = request_key("generate", canonical, engine=engine)
+
+    if use_cache:
+        cached = await response_cache.get(key)
+        tracer.annotate(response_cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            return GenerationResponse.model_validate_json(cached)
+
+        return await generation_flight.do(
+            key,
+            lambda: _generate_and_cache(key, submission, engine, deadline)
+        )
+
+    # Fresh variation: don't join a normal in-flight generation either
+    with fresh_outputs():
+        return await generation_flight.do(
+            f"{key}:fresh",
+            lambda: _generate_and_cache(key, submission, engine, deadline)
+        )
+
+
+async def _generate_and_cache(
+    key: str,
+    submission: QuizSubmission,
+    engine: str,
+    deadline: Optional[Deadline]
+) -> GenerationResponse:
+    """Runs the generation and caches the response, weighted by how long it took."""
+    started = time.perf_counter()
+    with tracer.span("generation", engine=engine):
+        response = await _run_generation(submission, engine, deadline)
+        tracer.annotate(partial=response.partial)
+
+    # Don't pin a degraded response for the whole TTL
+    if not response.partial:
+        await response_cache.set(key, response.model_dump_json(), cost=time.perf_counter() - started)
+
+    return response
+
+
+async def _until_disconnected(guard: DisconnectGuard, request: Request, work):
+    """
+    Awaits an endpoint's work, cancelling it if the client disconnects.
+
+    Raises:
+        HTTPException: 499 if the client went away before the work finished
+    """
+    try:
+        return await guard.run(request.is_disconnected, work)
+
+    except ClientDisconnected as e:
+        raise HTTPException(status_code=HTTP_499_CLIENT_CLOSED_REQUEST, detail=str(e))
+
+
+async def _run_generation(
+    submission: QuizSubmission,
+    engine: str,
+    deadline: Optional[Deadline] = None
+) -> GenerationResponse:
+    """
+    Runs the generation pipeline for one submission with the given engine.
+
+    Args:
+        submission: Validated quiz submission from the user
+        engine: "staged" or "fused"
+        deadline: Optional request deadline
+
+    Returns:
+        GenerationResponse: Complete package with poem, affirmations, and themes
+    """
+
+    if engine == "fused":
+        # Single call: themes, poem and affirmations come back together
+        try:
+            async with asyncio.timeout(deadline.remaining() if deadline else None):
+                themes, poem, affirmations = await run_fused_stage(submission)
+
+        except TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Fused generation could not finish before the request deadline"
+            )
+
+        return GenerationResponse(
+            poem=poem,
+            affirmations=affirmations,
+            themes=themes,
+            cultural_mode=submission.cultural_mode
+        )
+
+    # STEP 1: Extract themes from the quiz submission
+    # STEP 2 + 3: Compose the poem and generate affirmations concurrently,
+    # each stage with its own timeout and retry policy
+    return await run_staged_pipeline(submission, deadline)
+
+
+# ============================================================================
+# STREAMING GENERATION ENDPOINT (Server-Sent Events)
+# ============================================================================
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """
+    Formats one Server-Sent Event frame.
+
+    Args:
+        event: The SSE event name (e.g. "themes", "poem_line")
+        data: JSON-serializable payload for the event
+
+    Returns:
+        The encoded frame, terminated by a blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _affirm_with_timeout(themes: ThemeData) -> AffirmationsOutput:
+    """The affirm stage under its STAGE_AFFIRM_TIMEOUT, for the streaming endpoint."""
+    async with asyncio.timeout(settings.STAGE_AFFIRM_TIMEOUT):
+        return await _affirm_stage(themes)
+
+
+async def _generation_events(
+    submission: QuizSubmission,
+    speculative_audio: Optional[TTSVoice] = None
+) -> AsyncIterator[str]:
+    """
+    Runs the generation pipeline and yields SSE frames as each part is ready.
+
+    Event order:
+    1. themes      - as soon as extract_themes finishes
+    2. poem_line   - one event per poem line, as each line is decoded
+    3. poem        - the validated PoemOutput
+    4. affirmations - the AffirmationsOutput
+    5. complete    - the full GenerationResponse, same shape as /generate
+
+    If extraction or the poem fails, a single "error" event carrying the
+    status code and detail that /generate would have returned is sent, and
+    the stream ends. Affirmations are non-critical, as in /generate: if they
+    fail or time out, the "affirmations" event carries an empty list and the
+    final response is marked partial.
+
+    Args:
+        submission: Validated quiz submission from the user
+        speculative_audio: Optional voice to start rendering each poem line
+                           in as soon as it is decoded, and the affirmations
+                           once they exist
+
+    Yields:
+        Encoded SSE frames
+    """
+    affirmations_task = None
+
+    try:
+        # Reject an unknown cultural mode before any LLM call, so that a
+        # ValueError from the composer later on is a model failure, not a 400
+        poetry_cultural_mode = map_cultural_mode(submission.cultural_mode)
+        try:
+            _select_prompt(poetry_cultural_mode)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid cultural mode: {str(e)}"
+            )
+
+        # STEP 1: Extract themes and send them straight away
+        themes = await _extract_stage(submission)
+
+        yield _format_sse("themes", themes.model_dump())
+
+        # STEP 2: Start affirmations in the background while the poem streams
+        affirmations_task = asyncio.create_task(_affirm_with_timeout(themes))
+
+        # STEP 3: Stream poem lines as the composer decodes them
+        poem = None
+        try:
+            async for kind, value in stream_poem(
+                themes=themes,
+                cultural_mode=poetry_cultural_mode,
+                free_write_letter=submission.free_write_letter,
+                pronouns=submission.pronouns,
+                display_name=submission.display_name
+            ):
+                if kind == "line":
+                    if speculative_audio:
+                        speculate_audio(value, speculative_audio)
+                    yield _format_sse("poem_line", {"line": value})
+                else:
+                    poem = value
+
+        except Exception as e:
+            # Includes the ValidationError for a poem that doesn't match PoemOutput
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Poetry generation failed: {str(e)}"
+            )
+
+        poem.cultural_mode = submission.cultural_mode
+        yield _format_sse("poem", poem.model_dump())
+
+        # STEP 4: Affirmations (usually already finished by now), with the
+        # same empty fallback the staged pipeline uses
+        degraded_stages = []
+        try:
+            affirmations = await affirmations_task
+        except Exception:
+            affirmations = AffirmationsOutput(affirmations=[], focus_areas=[])
+            degraded_stages.append("affirm")
+        if speculative_audio:
+            for affirmation in affirmations.affirmations:
+                speculate_audio(affirmation, speculative_audio)
+        yield _format_sse("affirmations", affirmations.model_dump())
+
+        # STEP 5: Final event with the same payload /generate returns
+        response = GenerationResponse(
+            poem=poem,
+            affirmations=affirmations,
+            themes=themes,
+            cultural_mode=submission.cultural_mode,
+            partial=bool(degraded_stages),
+            degraded_stages=degraded_stages
+        )
+        yield _format_sse("complete", response.model_dump())
+
+    except HTTPException as e:
+        yield _format_sse("error", {"status_code": e.status_code, "detail": e.detail})
+
+    except Exception as e:
+        # Anything unexpected still ends the stream with one error event
+        yield _format_sse("error", {
+            "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "detail": f"Generation failed: {str(e)}"
+        })
+
+    finally:
+        # Covers both errors and the client going away mid-stream
+        if affirmations_task is not None and not affirmations_task.done():
+            affirmations_task.cancel()
+
+
+@router.post(
+    "/generate/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Stream Oriki generation progress",
+    description="Accepts quiz submission and streams themes, poem lines, and affirmations as Server-Sent Events",
+    response_class=StreamingResponse
+)
+async def generate_oriki_stream(
+    submission: QuizSubmission,
+    speculative_audio: Optional[TTSVoice] = Query(
+        None,
+        description="TTS voice to start rendering each poem line in as soon as it is final, ahead of /audio"
+    )
+) -> StreamingResponse:
+    """
+    Streaming variant of /generate using Server-Sent Events.
+
+    The frontend can show the themes and the first poem lines while the rest
+    of the pipeline is still running, instead of waiting for the complete
+    GenerationResponse. The final "complete" event carries the same payload
+    as /generate, so existing display code can be reused.
+
+    Args:
+        submission: Validated quiz submission from the user
+        speculative_audio: Optional voice to render the audio in ahead of /audio
+
+    Returns:
+        StreamingResponse: text/event-stream of pipeline events
+    """
+    return StreamingResponse(
+        _generation_events(submission, speculative_audio),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
     )
 
 
@@ -235,6 +873,89 @@ async def generation_health_check() -> Dict[str, str]:
     }
 
 
+# ============================================================================
+# STATS ENDPOINT
+# ============================================================================
+
+@router.get(
+    "/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Request coalescing, hedging and cache statistics",
+    description="Reports how much upstream traffic is saved by caching and deduplication and spent on hedging"
+)
+async def get_stats() -> Dict[str, Any]:
+    """
+    Returns hit/miss counters for the request coalescing layer, the
+    response cache, each agent's memo and the TTS audio cache, hedging
+    counters per agent, and disconnect counts. similar_letters shows how
+    often themes were reused for a near-duplicate letter, and the
+    false-match rate measured on the held-out pairs, if configured.
+    agents shows how long
+    building the chains took and how many connections were warmed up.
+    http_pool shows the shared upstream connection pool: requests
+    "waiting" for a connection mean HTTP_MAX_CONNECTIONS is too low.
+
+    A singleflight "hit" is a request that joined an identical request
+    already in flight, i.e. an upstream LLM or TTS call we did not have to
+    pay for. A response cache hit skipped the whole pipeline; saved_seconds
+    adds up how long those responses originally took. A hedge is an extra
+    upstream call we did pay for, to cut tail latency.
+
+    Returns:
+        Dict of counters per endpoint
+    """
+    return {
+        "singleflight": {
+            "generate": generation_flight.stats(),
+            "audio": audio_flight.stats(),
+        },
+        "hedging": {name: hedger.stats() for name, hedger in HEDGERS.items()},
+        "response_cache": response_cache.stats(),
+        "stage_memo": {name: memo.stats() for name, memo in MEMOS.items()},
+        "audio_cache": audio_cache.stats(),
+        "speech_rate": speech_rate.stats(),
+        "speculative_audio": speculative_tts.stats(),
+        "similar_letters": letter_index.stats(),
+        "agents": agent_registry.stats(),
+        "prompt_cache": prompt_cache_stats(),
+        "http_pool": pool_stats(get_http_client()),
+        "disconnects": {
+            "generate": generation_guard.stats(),
+            "audio": audio_guard.stats(),
+        }
+    }
+
+
+def _collect_metrics():
+    """
+    /metrics families read from the services' own counters at scrape time.
+
+    Cache and coalescing hit ratios, hedges and in-flight calls are already
+    counted by each service for /stats, so they aren't recorded twice.
+    """
+    flights = {"generate": generation_flight, "audio": audio_flight, "tts-segment": segment_flight}
+    flight_stats = {name: flight.stats() for name, flight in flights.items()}
+    hedge_stats = {name: hedger.stats() for name, hedger in HEDGERS.items()}
+
+    return [
+        *hit_families("oriki_response_cache", "/generate response cache", {"generate": response_cache.stats()}, "cache"),
+        *hit_families("oriki_stage_memo", "Per-agent memo", {name: memo.stats() for name, memo in MEMOS.items()}, "stage"),
+        *hit_families("oriki_audio_cache", "TTS audio cache", {"tts": audio_cache.stats()}, "cache"),
+        *hit_families("oriki_singleflight", "Coalesced identical calls", flight_stats, "group"),
+        ("oriki_singleflight_in_flight", "gauge", "Distinct upstream calls in flight",
+         [({"group": name}, s["in_flight"]) for name, s in flight_stats.items()]),
+        ("oriki_hedged_calls_total", "counter", "Calls that could be hedged",
+         [({"agent": name}, s["calls"]) for name, s in hedge_stats.items()]),
+        ("oriki_hedges_total", "counter", "Extra upstream calls sent to cut tail latency",
+         [({"agent": name}, s["hedges"]) for name, s in hedge_stats.items()]),
+        ("oriki_client_disconnects_total", "counter", "Requests cancelled because the client went away",
+         [({"endpoint": "generate"}, generation_guard.cancelled), ({"endpoint": "audio"}, audio_guard.cancelled)]),
+    ]
+
+
+metrics.collect(_collect_metrics)
+
+
 # ============================================================================
 # AUDIO GENERATION ENDPOINT
 # ============================================================================
@@ -246,7 +967,16 @@ async def generation_health_check() -> Dict[str, str]:
     summary="Convert text to audio",
     description="Converts poem and affirmations text to MP3 audio using OpenAI TTS"
 )
-async def generate_audio_endpoint(request: AudioRequest) -> AudioResponse:
+async def generate_audio_endpoint(
+    request: AudioRequest,
+    raw_request: Request,
+    request_timeout: Optional[float] = Header(
+        None,
+        alias="X-Request-Timeout",
+        gt=0,
+        description="Seconds the client will wait for the response (default REQUEST_DEADLINE_SECONDS)"
+    )
+) -> AudioResponse:
     """
     Converts text (poem + affirmations) to audio using OpenAI's TTS API.
 
@@ -260,22 +990,84 @@ async def generate_audio_endpoint(request: AudioRequest) -> AudioResponse:
 
     Args:
         request: AudioRequest containing text and voice selection
+        raw_request: The raw request, used to notice when the client disconnects
+        request_timeout: Optional X-Request-Timeout header (seconds)
 
     Returns:
         AudioResponse: Base64-encoded MP3 audio and estimated duration
 
     Raises:
-        HTTPException: If audio generation fails
+        HTTPException: If audio generation fails, 504 if it can't finish
+        before the deadline, 499 if the client disconnected
+
+    If the client disconnects, the TTS call is cancelled.
+    """
+
+    with tracer.span("POST /audio", voice=request.voice, chars=len(request.text), delivery=request.delivery):
+        return await _until_disconnected(
+            audio_guard,
+            raw_request,
+            synthesize_audio(request, Deadline.from_timeout(request_timeout))
+        )
+
+
+async def synthesize_audio(
+    request: AudioRequest,
+    deadline: Optional[Deadline] = None
+) -> AudioResponse:
+    """
+    Converts text to audio, sharing identical in-flight syntheses.
+
+    Used by /audio and by background jobs. Identical requests that arrive
+    while one is already being synthesized share that synthesis instead of
+    paying for another TTS call.
+
+    Args:
+        request: AudioRequest containing text and voice selection
+        deadline: Optional request deadline
+
+    Returns:
+        AudioResponse: Base64-encoded MP3 audio (or its URL) and estimated duration
+    """
+
+    # Resolve the default so both spellings of a request share one synthesis
+    request = request.model_copy(update={"delivery": request.delivery or settings.AUDIO_DELIVERY})
+
+    return await audio_flight.do(
+        request_key("audio", request),
+        lambda: _run_audio(request, deadline)
+    )
+
+
+async def _run_audio(
+    request: AudioRequest,
+    deadline: Optional[Deadline] = None
+) -> AudioResponse:
+    """
+    Synthesizes, encodes and packages the audio for one request.
+
+    Args:
+        request: AudioRequest containing text, voice and delivery
+        deadline: Optional request deadline for the TTS call
+
+    Returns:
+        AudioResponse: Base64-encoded MP3 audio (or its URL) and estimated duration
     """
 
     try:
         # STEP 1: Generate the audio using OpenAI TTS
         # This calls the audio_renderer agent to create MP3 bytes
-        audio_bytes = await generate_audio(
-            text=request.text,
-            voice=request.voice
-        )
+        async with asyncio.timeout(deadline.remaining() if deadline else None):
+            audio_bytes = await generate_audio(
+                text=request.text,
+                voice=request.voice
+            )
 
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Audio generation could not finish before the request deadline"
+        )
     except Exception as e:
         # If audio generation fails, return a 500 error with details
         raise HTTPException(
@@ -283,16 +1075,225 @@ async def generate_audio_endpoint(request: AudioRequest) -> AudioResponse:
             detail=f"Audio generation failed: {str(e)}"
         )
 
-    # STEP 2: Encode the audio bytes to base64 for JSON transmission
+    # STEP 2: Measure the audio duration from its MP3 frames
+    # This helps the frontend display progress bars or playback time
+    duration = round(mp3.duration(audio_bytes), 1) or estimate_duration(request.text, request.voice)
+
+    # STEP 3 (delivery="url"): Store the file and return where to download it
+    if request.delivery == "url":
+        name = f"{audio_key(request.text, request.voice, TTS_MODEL, AUDIO_FORMAT)}.{AUDIO_FORMAT}"
+        try:
+            await audio_store.put(name, audio_bytes)
+            audio_url = await audio_store.url(name)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Audio storage failed: {str(e)}"
+            )
+        return AudioResponse(audio_url=audio_url, duration_seconds=duration)
+
+    # STEP 3: Encode the audio bytes to base64 for JSON transmission
     # Base64 encoding converts binary data to a text string
     audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
 
-    # STEP 3: Estimate the audio duration based on text length
-    # This helps the frontend display progress bars or playback time
-    duration = estimate_duration(request.text)
-
     # STEP 4: Return the complete response with audio and metadata
     return AudioResponse(
         audio_base64=audio_base64,
         duration_seconds=duration
     )
+
+
+# ============================================================================
+# STREAMING AUDIO ENDPOINT
+# ============================================================================
+
+@router.post(
+    "/audio/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Stream text as audio",
+    description="Converts text to MP3 audio and streams it as audio/mpeg while it is being synthesized",
+    response_class=StreamingResponse
+)
+async def generate_audio_stream(
+    request: AudioRequest,
+    request_timeout: Optional[float] = Header(
+        None,
+        alias="X-Request-Timeout",
+        gt=0,
+        description="Seconds the client will wait for the first audio (default REQUEST_DEADLINE_SECONDS)"
+    )
+) -> StreamingResponse:
+    """
+    Streaming variant of /audio.
+
+    Relays the TTS response as raw audio/mpeg chunks as they arrive, so an
+    <audio> element (or MediaSource) can start playing after the first
+    frames instead of waiting for the whole clip and its base64 JSON.
+    /audio is unchanged for existing clients.
+
+    The request waits for the first chunk before responding, so a failed or
+    timed-out TTS call still gets a proper 500 or 504 instead of a broken
+    stream. If the client disconnects mid-stream, the TTS response is closed.
+
+    Args:
+        request: AudioRequest containing text and voice selection
+        request_timeout: Optional X-Request-Timeout header (seconds until
+                         the first chunk)
+
+    Returns:
+        StreamingResponse: audio/mpeg body
+    """
+    deadline = Deadline.from_timeout(request_timeout)
+    chunks = stream_audio(text=request.text, voice=request.voice)
+
+    try:
+        async with asyncio.timeout(deadline.remaining()):
+            first = await anext(chunks, b"")
+
+    except TimeoutError:
+        await chunks.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Audio generation could not start before the request deadline"
+        )
+    except Exception as e:
+        await chunks.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Audio generation failed: {str(e)}"
+        )
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type="audio/mpeg",
+        headers={
+            "X-Estimated-Duration": str(estimate_duration(request.text, request.voice)),
+            # Stop reverse proxies from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+# ============================================================================
+# AUDIO FILE DOWNLOAD ENDPOINT
+# ============================================================================
+
+@router.get(
+    "/audio/files/{name}",
+    status_code=status.HTTP_200_OK,
+    summary="Download stored audio",
+    description="Serves audio stored by /audio with delivery=url, with Range and ETag support",
+    response_class=FileResponse
+)
+async def download_audio(
+    name: str,
+    if_none_match: Optional[str] = Header(None, description="ETag from an earlier download")
+) -> Response:
+    """
+    Serves a file from the local audio store.
+
+    Names are content hashes, so a file never changes: the ETag is the hash
+    itself and the response may be cached forever. Range requests (seeking,
+    and Safari's probing requests) get 206 Partial Content.
+
+    The body is sent with the ASGI pathsend extension where the server
+    supports it (zero-copy sendfile). Behind nginx, set AUDIO_X_ACCEL_PREFIX
+    and nginx serves the file itself with sendfile.
+
+    Args:
+        name: "<hash>.<format>" as returned in audio_url
+        if_none_match: Optional If-None-Match header
+
+    Returns:
+        The file, or 304 if the client already has it
+
+    Raises:
+        HTTPException: 404 if the name is invalid or the file isn't stored
+        (e.g. it has been evicted, or audio is stored in S3)
+    """
+    path = _stored_audio_path(name)
+
+    etag = f'"{name.split(".")[0]}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+
+    if if_none_match and (if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(","))):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.AUDIO_X_ACCEL_PREFIX:
+        # nginx serves the file from its internal location (and handles Range)
+        relative = os.path.relpath(path, audio_cache.root).replace(os.sep, "/")
+        headers["X-Accel-Redirect"] = settings.AUDIO_X_ACCEL_PREFIX.rstrip("/") + "/" + relative
+        return Response(media_type=content_type_for(name), headers=headers)
+
+    return FileResponse(path, media_type=content_type_for(name), headers=headers)
+
+
+@router.get(
+    "/audio/files/{name}/index",
+    status_code=status.HTTP_200_OK,
+    summary="Seek table for stored audio",
+    description="Exact duration and a seconds-to-byte-offset seek table for an MP3 stored by /audio"
+)
+async def audio_index(
+    name: str,
+    interval: float = Query(1.0, ge=0.1, le=60.0, description="Seconds between seek points")
+) -> Dict[str, Any]:
+    """
+    Scans a stored MP3's frame headers (without decoding it).
+
+    Each seek point is the byte offset of a frame, so a client can seek
+    by requesting "Range: bytes=<offset>-" from /audio/files/{name} and
+    get a stream that starts on a frame boundary.
+
+    Args:
+        name: "<hash>.mp3" as returned in audio_url
+        interval: Seconds between seek points
+
+    Returns:
+        Dict with duration_seconds, frames, bitrate and seek_table
+        ([seconds, byte offset] pairs)
+
+    Raises:
+        HTTPException: 404 if the file isn't stored locally, is empty or
+        isn't an MP3
+    """
+    path = _stored_audio_path(name)
+    if not name.endswith(".mp3"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+
+    def scan() -> Optional[mp3.FrameIndex]:
+        # An empty file (e.g. a write cut short) can't be mapped at all
+        if os.path.getsize(path) == 0:
+            return None
+        # mmap, so even a long file is scanned without being read into memory
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mp3.index(mapped, seek_interval=interval)
+
+    index = await asyncio.to_thread(scan)
+    if index is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    return {
+        "duration_seconds": round(index.duration, 3),
+        "frames": index.frames,
+        "bitrate": index.bitrate,
+        "seek_table": [list(point) for point in index.seek_table],
+    }
+
+
+def _stored_audio_path(name: str) -> str:
+    """Path of a file in the local audio store, or a 404 if there isn't one."""
+    path = audio_store.path_for(name) if isinstance(audio_store, LocalFileStore) else None
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audio file not found")
+    return path
@@ -6,7 +6,7 @@ It provides a singleton Settings instance that can be imported throughout the ap
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -37,6 +37,44 @@ class Settings(BaseSettings):
     # Audio Generation Settings
     # Directory where audio files will be saved (relative to project root)
     AUDIO_OUTPUT_DIR: str = "audio_output"
+    # Rendered TTS audio is cached under AUDIO_OUTPUT_DIR/tts, keyed by text,
+    # voice, model and format; least recently used files are deleted once
+    # the cache grows past AUDIO_CACHE_MAX_BYTES
+    AUDIO_CACHE_ENABLED: bool = True
+    AUDIO_CACHE_MAX_BYTES: int = 500_000_000
+    # Multi-line text is synthesized one line per TTS call, up to
+    # AUDIO_SEGMENT_CONCURRENCY at once, and joined into one MP3 with a pause
+    # after each line (longer at a blank line, e.g. before the affirmations)
+    AUDIO_SEGMENTED: bool = True
+    AUDIO_SEGMENT_CONCURRENCY: int = 4
+    AUDIO_LINE_PAUSE_SECONDS: float = 0.4
+    AUDIO_SECTION_PAUSE_SECONDS: float = 1.2
+    # /generate/stream?speculative_audio=<voice> starts rendering each poem
+    # line and affirmation into the audio cache as soon as it is final, so a
+    # following /audio request finds it ready; at most this many characters a
+    # minute (TTS is billed per character) are rendered speculatively. Off by
+    # default: it pays for audio the user may never ask for
+    SPECULATIVE_TTS_ENABLED: bool = False
+    SPECULATIVE_TTS_MAX_CHARS_PER_MINUTE: int = 20_000
+    # How /audio returns the clip by default: "base64" inside the JSON, or
+    # "url" to a stored file (requests can choose with "delivery")
+    AUDIO_DELIVERY: Literal["base64", "url"] = "base64"
+    # Where "url" audio is stored: "local" serves the files under
+    # AUDIO_OUTPUT_DIR from /api/v1/audio/files/...; "s3" uploads them to an
+    # S3-compatible bucket and returns presigned URLs (needs `pip install boto3`;
+    # set AUDIO_S3_ENDPOINT_URL for MinIO, e.g. http://localhost:9000)
+    AUDIO_STORE_BACKEND: Literal["local", "s3"] = "local"
+    # Prefix for local file URLs ("" = relative to this API)
+    AUDIO_PUBLIC_BASE_URL: str = ""
+    # If set, local files are handed to nginx via X-Accel-Redirect under this
+    # internal location (e.g. /protected-audio/), so nginx serves them with sendfile
+    AUDIO_X_ACCEL_PREFIX: str = ""
+    AUDIO_S3_BUCKET: str = "oriki-audio"
+    AUDIO_S3_ENDPOINT_URL: str = ""
+    AUDIO_S3_REGION: str = "us-east-1"
+    AUDIO_S3_ACCESS_KEY_ID: str = ""
+    AUDIO_S3_SECRET_ACCESS_KEY: str = ""
+    AUDIO_S3_URL_EXPIRY_SECONDS: int = 3600
 
     # Model Configuration
     # Default model to use for story generation
@@ -46,6 +84,161 @@ class Settings(BaseSettings):
     # Lower values = more focused, Higher values = more creative
     MODEL_TEMPERATURE: float = 0.7
 
+    # Agent Warm-up
+    # At startup, every agent's chains are built and each OpenAI client
+    # opens a connection (waiting at most AGENT_WARMUP_TIMEOUT seconds), so
+    # the first requests don't pay for TLS handshakes
+    AGENT_WARMUP_ENABLED: bool = True
+    AGENT_WARMUP_TIMEOUT: float = 5.0
+
+    # Upstream Request Limits
+    # Hard timeout (seconds) for a single OpenAI HTTP request
+    LLM_REQUEST_TIMEOUT: float = 40.0
+    # Retries the OpenAI client itself makes for connection errors / 429 / 5xx
+    LLM_MAX_RETRIES: int = 1
+
+    # Shared HTTP Transport
+    # Every OpenAI client sends through one pooled httpx client. HTTP/2
+    # multiplexes concurrent calls over one connection (needs the h2 package,
+    # installed with httpx[http2]). HTTP_MAX_KEEPALIVE = 0 sizes the idle
+    # pool from JOB_WORKERS; /api/v1/stats reports active/idle/waiting
+    # connections for tuning
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE: int = 0
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Hedged Requests
+    # If an LLM call is slower than HEDGE_PERCENTILE of recent calls to the
+    # same agent, a duplicate is sent and the first answer wins. Hedging
+    # starts once HEDGE_MIN_SAMPLES calls have been seen, and never adds
+    # more than HEDGE_BUDGET_RATIO extra calls (0.1 = at most 10% more)
+    HEDGE_ENABLED: bool = True
+    HEDGE_PERCENTILE: float = 95.0
+    HEDGE_MIN_SAMPLES: int = 20
+    HEDGE_BUDGET_RATIO: float = 0.1
+
+    # Pipeline Stage Policies
+    # Timeout (seconds, per attempt) and retry count for each pipeline stage
+    # Affirmations are non-critical: if they fail or time out, /generate
+    # still returns the poem, marked as partial
+    STAGE_EXTRACT_TIMEOUT: float = 20.0
+    STAGE_EXTRACT_RETRIES: int = 1
+    STAGE_COMPOSE_TIMEOUT: float = 35.0
+    STAGE_COMPOSE_RETRIES: int = 0
+    STAGE_AFFIRM_TIMEOUT: float = 20.0
+    STAGE_AFFIRM_RETRIES: int = 0
+    # A stage is not started (or retried) with less than this many seconds
+    # left before the request deadline - it fails straight away instead
+    STAGE_EXTRACT_MIN_TIME: float = 3.0
+    STAGE_COMPOSE_MIN_TIME: float = 5.0
+    STAGE_AFFIRM_MIN_TIME: float = 3.0
+
+    # Request Deadlines
+    # Time budget (seconds) for /generate and /audio when the client doesn't
+    # send an X-Request-Timeout header - matches the frontend's 60s abort
+    REQUEST_DEADLINE_SECONDS: float = 60.0
+    # Upper limit for X-Request-Timeout
+    REQUEST_DEADLINE_MAX_SECONDS: float = 120.0
+    # How often (seconds) a running request checks whether its client has gone
+    DISCONNECT_POLL_INTERVAL: float = 0.5
+
+    # Generation Engine
+    # "staged" runs the three agents (themes -> poem + affirmations)
+    # "fused" asks the model for all three outputs in a single call
+    # Can be overridden per request with /generate?engine=...
+    GENERATION_ENGINE: Literal["staged", "fused"] = "staged"
+
+    # Structured Output
+    # Agents listed here ("extract", "compose", "affirm", "fused", comma-separated,
+    # or "all") send their output model's schema as the provider's structured
+    # output setting instead of as format instructions in the prompt:
+    # "json_schema" constrains the completion to the schema (needs gpt-4o-mini
+    # or gpt-4o-2024-08-06+), "function_calling" forces a tool call (any model)
+    STRUCTURED_OUTPUT_AGENTS: str = ""
+    STRUCTURED_OUTPUT_METHOD: Literal["json_schema", "function_calling"] = "json_schema"
+
+    # Background Job Queue
+    # "memory" keeps jobs in this process (development)
+    # "sqlite" shares one queue between all uvicorn workers via JOB_SQLITE_PATH
+    JOB_BROKER: Literal["memory", "sqlite"] = "memory"
+    JOB_SQLITE_PATH: str = "jobs.sqlite3"
+    # Number of jobs each server process runs at the same time
+    JOB_WORKERS: int = 2
+    # New jobs are rejected with 503 once this many are waiting
+    JOB_MAX_QUEUE_DEPTH: int = 50
+    # How long finished job results stay available for polling
+    JOB_RESULT_TTL_SECONDS: int = 3600
+    # A running job's lease, renewed by its worker every third of this; a
+    # job whose worker died (crash, OOM kill) is marked failed once it lapses
+    JOB_LEASE_SECONDS: float = 60.0
+
+    # Response Cache
+    # Complete /generate responses are reused for identical submissions
+    # (ignoring letter whitespace and the order of top values)
+    # "memory" keeps them in this process, snapshotted to
+    # RESPONSE_CACHE_SNAPSHOT_PATH on shutdown and reloaded on boot ("" = off)
+    # "sqlite" shares them between workers via RESPONSE_CACHE_SQLITE_PATH
+    # "redis" shares them between machines (needs `pip install redis`)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: Literal["memory", "sqlite", "redis"] = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: int = 86400
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_SNAPSHOT_PATH: str = "response_cache.json"
+    RESPONSE_CACHE_SQLITE_PATH: str = "response_cache.sqlite3"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Stage Memoization
+    # Each agent's output is reused for requests with the same inputs for that
+    # agent, e.g. switching cultural mode reuses the extracted themes
+    # (limit and TTL are per stage, kept in each server process)
+    STAGE_MEMO_ENABLED: bool = True
+    STAGE_MEMO_MAX_ENTRIES: int = 500
+    STAGE_MEMO_TTL_SECONDS: int = 86400
+
+    # Near-Duplicate Letters
+    # Themes are reused for a letter that is at least SIMILAR_LETTER_THRESHOLD
+    # similar (estimated Jaccard of character shingles) to one already seen
+    # with exactly the same quiz answers
+    SIMILAR_LETTER_ENABLED: bool = True
+    SIMILAR_LETTER_THRESHOLD: float = 0.9
+    SIMILAR_LETTER_MAX_ENTRIES: int = 5000
+    # Optional JSONL of labelled letter pairs ({"a", "b", "duplicate"}); if
+    # set, the false-match rate on it is measured at startup and reported
+    # by /api/v1/stats (see benchmarks/bench_letter_similarity.py)
+    SIMILAR_LETTER_HOLDOUT_PATH: str = ""
+
+    # Tracing
+    # Every /generate and /audio request is recorded as a trace: a span for
+    # each stage, LangChain run (prompt, LLM call, output parser) and TTS
+    # call. The last TRACE_MAX_RECENT traces are kept in memory for the
+    # admin waterfall (/api/v1/admin/traces); TRACE_EXPORT also writes them
+    # to TRACE_JSONL_PATH ("jsonl") or sends them to an OpenTelemetry
+    # collector's OTLP/HTTP endpoint ("otlp")
+    TRACING_ENABLED: bool = True
+    TRACE_EXPORT: Literal["", "jsonl", "otlp"] = ""
+    TRACE_JSONL_PATH: str = "traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACE_MAX_RECENT: int = 500
+    # Traces at least this long are listed by the admin waterfall by default
+    TRACE_SLOW_SECONDS: float = 5.0
+
+    # Profiling
+    # PROFILE_SAMPLE_RATE of requests (0.01 = 1%), and any request sent with
+    # X-Profile: <ADMIN_TOKEN>, are profiled: the event loop's stack is
+    # sampled every PROFILE_INTERVAL_SECONDS while the request runs, and
+    # allocations are recorded with tracemalloc. Flamegraph-ready stacks
+    # per endpoint are served by /api/v1/admin/profiles
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_SECONDS: float = 0.005
+    PROFILE_MAX_STACKS: int = 2000
+    PROFILE_TRACEMALLOC: bool = True
+
+    # Admin Routes
+    # Token for /api/v1/admin/... (X-Admin-Token header or ?token=);
+    # the admin routes don't exist while it is empty
+    ADMIN_TOKEN: str = ""
+
     # Pydantic settings configuration
     # This tells pydantic-settings where to find the .env file
     model_config = SettingsConfigDict(
@@ -5,21 +5,97 @@ This is the entry point for the Oriki API backend.
 It sets up the FastAPI app with basic endpoints and middleware.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import uvicorn
 
 # Import our configuration settings
 from backend.config import settings
 
 # Import our API routes
-from backend.api.routes import router as api_router
+from backend.api.routes import router as api_router, response_cache
+from backend.api.jobs import router as jobs_router, job_queue
+from backend.api.admin import router as admin_router
+from backend.agents.audio_renderer import SPEECH_RATE_PATH, audio_cache, speculative_tts, speech_rate
+from backend.agents.theme_extractor import letter_index
+from backend.agents.registry import registry as agent_registry
+from backend.services.http import close_http_client, get_http_client
+from backend.services.metrics import MetricsMiddleware, metrics
+from backend.services.profiling import ProfilingMiddleware
+from backend.services.similarity import load_labelled_pairs
+from backend.services.tracing import JsonlExporter, OtlpExporter, tracer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts background services when the server boots and stops them on shutdown.
+    """
+    # Build every agent's chains once, and open connections to the provider
+    # before the server accepts requests (so /health can't pass while cold)
+    agent_registry.build()
+    if settings.AGENT_WARMUP_ENABLED:
+        await agent_registry.warm_up(settings.AGENT_WARMUP_TIMEOUT)
+
+    # Warm the in-memory response cache from the last shutdown's snapshot
+    snapshot_path = settings.RESPONSE_CACHE_SNAPSHOT_PATH
+    if snapshot_path and not response_cache.backend.persistent:
+        await response_cache.load_snapshot(snapshot_path)
+
+    # Index the audio already rendered to disk, and reload the voices'
+    # measured speaking rates
+    await audio_cache.start()
+    await speech_rate.load(SPEECH_RATE_PATH)
+
+    # Measure the near-duplicate letter threshold against held-out pairs
+    if settings.SIMILAR_LETTER_HOLDOUT_PATH:
+        pairs = load_labelled_pairs(settings.SIMILAR_LETTER_HOLDOUT_PATH)
+        await asyncio.to_thread(letter_index.evaluate, pairs)
+
+    # Start the background job workers
+    await job_queue.start()
+
+    # Where finished traces go, besides the admin waterfall
+    exporter = None
+    if settings.TRACE_EXPORT == "jsonl":
+        exporter = JsonlExporter(settings.TRACE_JSONL_PATH)
+    elif settings.TRACE_EXPORT == "otlp":
+        exporter = OtlpExporter(settings.TRACE_OTLP_ENDPOINT, get_http_client())
+    if exporter is not None:
+        tracer.exporters.append(exporter)
+
+    yield
+
+    if exporter is not None:
+        tracer.exporters.remove(exporter)
+
+    await speculative_tts.stop()
+
+    # Stop the workers (unfinished jobs are marked as failed)
+    await job_queue.stop()
+
+    if snapshot_path and not response_cache.backend.persistent:
+        await response_cache.save_snapshot(snapshot_path)
+
+    await speech_rate.save(SPEECH_RATE_PATH)
+
+    # Close the shared upstream connections last, after everything using them.
+    # The agents built on them are dropped too: the next lifespan (e.g. in
+    # tests) builds them again on a new client.
+    await close_http_client()
+    agent_registry.reset()
+
 
 # Initialize the FastAPI application
 app = FastAPI(
     title="Oriki API",
     description="Backend API for Oriki - A platform for Yoruba cultural heritage and storytelling",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configure CORS middleware to allow frontend to communicate with backend
@@ -50,11 +126,24 @@ app.add_middleware(
 )
 
 
+# Request counts, latency and in-flight requests per route for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# CPU and allocation profiles of a sample of requests, for /api/v1/admin/profiles
+app.add_middleware(ProfilingMiddleware)
+
+
 # Include our API routes
 # This connects all the generation endpoints (poem, affirmations, themes)
 # to the main FastAPI application at the /api/v1 prefix
 app.include_router(api_router)
 
+# Background job endpoints (enqueue + poll) at /api/v1/jobs
+app.include_router(jobs_router)
+
+# Operator diagnostics (trace waterfall) at /api/v1/admin, behind ADMIN_TOKEN
+app.include_router(admin_router)
+
 
 # Root endpoint - provides basic information about the API
 @app.get("/")
@@ -80,6 +169,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Prometheus metrics - stage and LLM latency, tokens, caches, upstream errors
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Metrics endpoint in the Prometheus text format.
+    Point a Prometheus scrape job at it (see backend/services/metrics.py).
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # Run the application using uvicorn when this file is executed directly
 # This is for local development only
 if __name__ == "__main__":
@@ -93,3 +192,4 @@ if __name__ == "__main__":
         port=settings.API_PORT,
         reload=True
     )
+
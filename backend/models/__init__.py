@@ -5,7 +5,9 @@ from .quiz import QuizSubmission
 from .poem import PoemOutput
 from .affirmations import AffirmationsOutput
 from .generation import GenerationResponse
+from .fused import FusedGenerationOutput
 from .audio import AudioRequest, AudioResponse
+from .jobs import JobRequest, JobStatusResponse
 from .quiz_config import ALL_QUESTIONS, get_question_by_id, validate_answer
 
 __all__ = [
@@ -14,8 +16,11 @@ __all__ = [
     "PoemOutput",
     "AffirmationsOutput",
     "GenerationResponse",
+    "FusedGenerationOutput",
     "AudioRequest",
     "AudioResponse",
+    "JobRequest",
+    "JobStatusResponse",
     "ALL_QUESTIONS",
     "get_question_by_id",
     "validate_answer",
@@ -5,9 +5,15 @@ This module defines the request and response models for converting
 text (poem + affirmations) into audio using OpenAI's Text-to-Speech API.
 """
 
+from typing import Literal, Optional
+
 from pydantic import BaseModel, Field
 
 
+# The six voices OpenAI's TTS API offers
+TTSVoice = Literal["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+
+
 class AudioRequest(BaseModel):
     """
     Request model for audio generation endpoint.
@@ -29,6 +35,13 @@ class AudioRequest(BaseModel):
         description="OpenAI TTS voice: alloy, echo, fable, onyx, nova, or shimmer"
     )
 
+    # How the audio comes back: inline as base64, or as a download URL
+    # (smaller and streamable by the browser); defaults to AUDIO_DELIVERY
+    delivery: Optional[Literal["base64", "url"]] = Field(
+        default=None,
+        description='"base64" for audio_base64 in the JSON, "url" for a download audio_url'
+    )
+
     # Pydantic v2 configuration with example
     model_config = {
         "json_schema_extra": {
@@ -45,20 +58,27 @@ class AudioResponse(BaseModel):
     Response model for audio generation endpoint.
 
     Returns the generated audio as a base64-encoded string, which can be
-    easily transmitted via JSON and decoded by the frontend for playback.
+    easily transmitted via JSON and decoded by the frontend for playback,
+    or (with delivery="url") as a URL the audio player can load directly.
     """
 
     # Base64-encoded MP3 audio data
     # The frontend can decode this and create an audio player
-    audio_base64: str = Field(
-        description="Base64-encoded MP3 audio file"
+    audio_base64: Optional[str] = Field(
+        default=None,
+        description="Base64-encoded MP3 audio file (delivery=base64)"
+    )
+
+    # Where to download the MP3 (supports Range requests for seeking)
+    audio_url: Optional[str] = Field(
+        default=None,
+        description="URL of the MP3 audio file (delivery=url)"
     )
 
-    # Approximate duration in seconds
+    # Duration in seconds, counted from the MP3's frame headers
     # Helps frontend set up progress bars or estimate playback time
-    # Note: This is estimated since we don't decode the MP3 to get exact duration
     duration_seconds: float = Field(
-        description="Approximate audio duration in seconds"
+        description="Audio duration in seconds"
     )
 
     # Pydantic v2 configuration with example
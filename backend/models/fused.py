@@ -0,0 +1,39 @@
+"""
+Pydantic Model for Fused Generation Output
+
+This model defines the combined structured output used by the fused
+generation engine, which asks the LLM for themes, poem and affirmations
+in a single call instead of three.
+"""
+
+from pydantic import BaseModel, Field
+
+# Import the component models that make up the combined output
+from backend.models.theme import ThemeData
+from backend.models.poem import PoemOutput
+from backend.models.affirmations import AffirmationsOutput
+
+
+class FusedGenerationOutput(BaseModel):
+    """
+    Structured output from the Fused Generator agent.
+
+    Each field is exactly the model the corresponding single-purpose agent
+    returns, so the fused result can be split back into the three parts
+    and used anywhere the staged pipeline's outputs are used.
+    """
+
+    # Equivalent to the Theme Extractor output
+    themes: ThemeData = Field(
+        description="Themes, values, and insights extracted from the quiz and letter"
+    )
+
+    # Equivalent to the Poetry Composer output
+    poem: PoemOutput = Field(
+        description="The praise poem written in the requested cultural mode"
+    )
+
+    # Equivalent to the Affirmation Generator output
+    affirmations: AffirmationsOutput = Field(
+        description="CBT-based affirmations grounded in the extracted themes"
+    )
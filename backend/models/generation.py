@@ -5,6 +5,8 @@ This model combines all outputs from the Oriki pipeline into a single response.
 It's what the frontend receives after the complete generation process.
 """
 
+from typing import List
+
 from pydantic import BaseModel, Field
 
 # Import all the component models that make up the complete response
@@ -47,6 +49,19 @@ class GenerationResponse(BaseModel):
         description="The cultural mode used: yoruba_inspired, secular, turkish, or biblical"
     )
 
+    # Set when a non-critical stage (e.g. affirmations) failed or timed out
+    # and its output was replaced by a fallback, so the user still gets the poem
+    partial: bool = Field(
+        default=False,
+        description="True if some parts of the response are fallbacks rather than generated content"
+    )
+
+    # Which stages were replaced by fallbacks (e.g. ["affirm"])
+    degraded_stages: List[str] = Field(
+        default_factory=list,
+        description="Pipeline stages that failed or timed out and were replaced by a fallback"
+    )
+
     # Pydantic v2 configuration with an example
     model_config = {
         "json_schema_extra": {
@@ -78,7 +93,9 @@ class GenerationResponse(BaseModel):
                     "strengths": ["empathy", "resilience"],
                     "key_themes": ["transformation through challenges", "service to others"]
                 },
-                "cultural_mode": "yoruba_inspired"
+                "cultural_mode": "yoruba_inspired",
+                "partial": False,
+                "degraded_stages": []
             }
         }
     }
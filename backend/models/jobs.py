@@ -0,0 +1,98 @@
+"""
+Pydantic Models for Background Jobs
+
+This module defines the request and response models for the job queue
+endpoints, which run generation and audio requests in the background
+instead of holding the HTTP connection open.
+"""
+
+from typing import Any, Dict, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+from backend.models.quiz import QuizSubmission
+from backend.models.audio import AudioRequest
+
+
+class JobRequest(BaseModel):
+    """
+    Request model for enqueuing a background job.
+
+    Exactly one of `submission` (runs the /generate pipeline) or `audio`
+    (runs the /audio text-to-speech conversion) must be provided.
+    """
+
+    # A quiz submission to turn into a poem + affirmations
+    submission: Optional[QuizSubmission] = Field(
+        None,
+        description="Quiz submission to generate an Oriki for"
+    )
+
+    # A text-to-speech request
+    audio: Optional[AudioRequest] = Field(
+        None,
+        description="Text and voice to convert to audio"
+    )
+
+    @model_validator(mode="after")
+    def validate_one_payload(self) -> "JobRequest":
+        """Ensure exactly one kind of work is requested"""
+        if (self.submission is None) == (self.audio is None):
+            raise ValueError("Provide exactly one of 'submission' or 'audio'")
+        return self
+
+    @property
+    def kind(self) -> Literal["generate", "audio"]:
+        """Which job handler this request is for"""
+        return "generate" if self.submission is not None else "audio"
+
+    # Pydantic v2 configuration with example
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "audio": {
+                    "text": "The one who walks with purpose, steady as the mountain.",
+                    "voice": "nova"
+                }
+            }
+        }
+    }
+
+
+class JobStatusResponse(BaseModel):
+    """
+    Response model for job status polling.
+
+    `result` holds a GenerationResponse or AudioResponse (as JSON) once the
+    job has succeeded; `error` holds the failure message if it failed.
+    """
+
+    id: str = Field(description="Job id to poll with GET /api/v1/jobs/{id}")
+
+    kind: Literal["generate", "audio"] = Field(description="Which pipeline the job runs")
+
+    status: Literal["queued", "running", "succeeded", "failed"] = Field(
+        description="Current state of the job"
+    )
+
+    # Only set while queued: 0 means this job is next
+    queue_position: Optional[int] = Field(
+        None,
+        description="Number of queued jobs ahead of this one"
+    )
+
+    # Estimated from how long recent jobs took to run
+    eta_seconds: Optional[float] = Field(
+        None,
+        description="Estimated seconds until the result is ready"
+    )
+
+    result: Optional[Dict[str, Any]] = Field(
+        None,
+        description="GenerationResponse or AudioResponse once the job has succeeded"
+    )
+
+    error: Optional[str] = Field(None, description="Failure message if the job failed")
+
+    created_at: float = Field(description="Unix timestamp when the job was queued")
+    started_at: Optional[float] = Field(None, description="Unix timestamp when a worker picked it up")
+    finished_at: Optional[float] = Field(None, description="Unix timestamp when it finished")
@@ -0,0 +1 @@
+# Services package - shared infrastructure used by the API (job queue, caches, ...)
@@ -0,0 +1,249 @@
+"""
+Audio Cache - Content-addressed store for rendered TTS audio
+
+Listening to the same poem again, or two users sharing a sample text,
+used to mean another paid TTS call. Rendered audio is now stored on disk
+under AUDIO_OUTPUT_DIR, named by a hash of everything that determines the
+audio: the normalized text, the voice, the TTS model and the audio format.
+
+- Writes are atomic: audio goes to a temp file in the same directory and
+  is renamed into place, so several uvicorn workers can write the same
+  entry at once and readers never see a half-written file.
+- The total size is bounded. Every hit bumps the file's mtime, and when the
+  store grows past its limit the least recently used files are deleted.
+- The index is rebuilt from the directory on startup, so the cache
+  survives restarts and deploys that keep the volume.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Temp files older than this are leftovers from a crashed write
+STALE_TEMP_SECONDS = 3600
+
+
+def normalize_tts_text(text: str) -> str:
+    """
+    Normalizes text without changing how it is spoken.
+
+    Unicode is NFC-normalized and spaces are collapsed within each line, but
+    line breaks are kept, because TTS pauses on them.
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(" ".join(line.split()) for line in text.split("\n")).strip()
+
+
+def audio_key(text: str, voice: str, model: str, audio_format: str) -> str:
+    """Hex SHA-256 of everything that determines the rendered audio."""
+    canonical = json.dumps(
+        {"text": normalize_tts_text(text), "voice": voice, "model": model, "format": audio_format},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Size-bounded, content-addressed audio files on disk.
+
+    Usage:
+        cache = AudioCache("audio_output", max_bytes=500_000_000)
+        key = audio_key(text, voice, "tts-1", "mp3")
+        audio = await cache.get(key, "mp3")
+        if audio is None:
+            audio = await render(...)
+            await cache.put(key, "mp3", audio)
+    """
+
+    def __init__(self, directory: str, max_bytes: int, enabled: bool = True):
+        self.root = os.path.join(directory, "tts")
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # path -> size for the files this process knows about
+        self._sizes: Dict[str, int] = {}
+        self._total = 0
+        self._indexed = False
+        self._lock = asyncio.Lock()
+
+    def path_for(self, key: str, audio_format: str) -> str:
+        """Where an entry lives: <root>/<first two hex chars>/<key>.<format>"""
+        return os.path.join(self.root, key[:2], f"{key}.{audio_format}")
+
+    async def start(self) -> int:
+        """
+        Builds the index from the files already on disk.
+
+        Returns:
+            Number of cached files found
+        """
+        async with self._lock:
+            await asyncio.to_thread(self._index)
+        return len(self._sizes)
+
+    def contains(self, key: str, audio_format: str) -> bool:
+        """True if the entry is in the index (without touching the disk)."""
+        return self.enabled and self.path_for(key, audio_format) in self._sizes
+
+    async def get(self, key: str, audio_format: str) -> Optional[bytes]:
+        """Returns the cached audio, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        await self._ensure_indexed()
+        path = self.path_for(key, audio_format)
+
+        audio = await asyncio.to_thread(self._read, path)
+        if audio is None:
+            self.misses += 1
+            self._forget(path)
+            return None
+
+        self.hits += 1
+        return audio
+
+    async def put(self, key: str, audio_format: str, audio: bytes, force: bool = False) -> None:
+        """
+        Stores audio atomically, evicting least recently used files if over the limit.
+
+        force stores it even when the cache is disabled (the local file store
+        serves these files by URL). A file that is already stored is kept.
+        """
+        if not (self.enabled or force):
+            return
+
+        await self._ensure_indexed()
+        path = self.path_for(key, audio_format)
+
+        if path in self._sizes and os.path.exists(path):
+            return
+
+        await asyncio.to_thread(self._write, path, audio)
+        self._forget(path)
+        self._sizes[path] = len(audio)
+        self._total += len(audio)
+
+        if self._total > self.max_bytes:
+            async with self._lock:
+                await asyncio.to_thread(self._evict)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the store's size as seen by this process."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "files": len(self._sizes),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+    # ------------------------------------------------------------------------
+    # Blocking helpers (run in a worker thread)
+    # ------------------------------------------------------------------------
+
+    async def _ensure_indexed(self) -> None:
+        if not self._indexed:
+            await self.start()
+
+    def _forget(self, path: str) -> None:
+        size = self._sizes.pop(path, None)
+        if size is not None:
+            self._total -= size
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        """Returns (mtime, path, size) for every entry, removing stale temp files."""
+        entries = []
+        now = time.time()
+
+        if not os.path.isdir(self.root):
+            return entries
+
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for item in os.scandir(shard.path):
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another worker while we were scanning
+
+                if item.name.startswith("."):
+                    if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                        _remove(item.path)
+                    continue
+
+                entries.append((stat.st_mtime, item.path, stat.st_size))
+        return entries
+
+    def _index(self) -> None:
+        self._sizes = {path: size for _, path, size in self._scan()}
+        self._total = sum(self._sizes.values())
+        self._indexed = True
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+
+        # mtime doubles as "last used" for LRU eviction (atime is often disabled)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return audio
+
+    def _write(self, path: str, audio: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Temp file in the same directory, so the rename is atomic
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+
+    def _evict(self) -> None:
+        # Rescan so files written and used by other workers are accounted for
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            if _remove(path):
+                self.evictions += 1
+            total -= size
+
+        self._sizes = {path: size for _, path, size in entries if os.path.exists(path)}
+        self._total = sum(self._sizes.values())
+
+
+def _remove(path: str) -> bool:
+    """Deletes a file, returning False if it was already gone."""
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,459 @@
+"""
+Response Cache - Reuse complete /generate responses for identical submissions
+
+Sample letters, QA scripts and repeat visitors send the same quiz answers
+again and again, and each one normally costs three LLM calls. This cache
+stores the finished GenerationResponse under a canonical key for the
+submission, so small differences that don't change the meaning (extra
+whitespace in the letter, the order top values were clicked in) still hit.
+
+Eviction is cost-aware (GreedyDual): every entry's priority is the cache's
+"clock" plus how long the response took to generate. Reading an entry
+refreshes its priority; evicting one advances the clock to its priority.
+Cheap entries and entries nobody has read for a while go first, while an
+expensive poem survives longer than plain LRU would keep it.
+
+The storage backend is pluggable:
+- MemoryCacheBackend: a dict in this process; can be snapshotted to disk on
+  shutdown and reloaded on boot so deploys don't start cold
+- SQLiteCacheBackend: a shared database file, for several uvicorn workers
+- RedisCacheBackend: any Redis-protocol server (Redis, Valkey, KeyDB...),
+  shared by every machine; needs the optional `redis` package
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.models.quiz import QuizSubmission
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Only needed for RESPONSE_CACHE_BACKEND=redis
+    aioredis = None
+
+
+logger = logging.getLogger(__name__)
+
+# Format version of snapshot files, bumped if CacheEntry changes
+SNAPSHOT_VERSION = 1
+
+
+def canonical_submission(submission: QuizSubmission) -> QuizSubmission:
+    """
+    Returns a copy of the submission with meaning-preserving noise removed.
+
+    - whitespace runs in the letter collapse to single spaces
+    - top_values are sorted (the order they were clicked in doesn't matter)
+    """
+    return submission.model_copy(update={
+        "free_write_letter": " ".join(submission.free_write_letter.split()),
+        "top_values": sorted(submission.top_values),
+    })
+
+
+@dataclass
+class CacheEntry:
+    """
+    A single cached response.
+
+    value is a JSON string so every backend can store it the same way.
+    cost is how long the response took to generate, in seconds.
+    """
+
+    key: str
+    value: str
+    cost: float
+    expires_at: float
+    priority: float = 0.0
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class CacheBackend:
+    """
+    Storage for cache entries, with GreedyDual cost-aware eviction.
+
+    persistent backends keep their entries across restarts by themselves,
+    so they don't need snapshots.
+    """
+
+    persistent = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0  # entries evicted by this process to stay under max_entries
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Returns a live entry and refreshes its priority (None on a miss)."""
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, cost: float, ttl: float) -> None:
+        """Stores an entry, evicting the lowest-priority entries if the cache is full."""
+        raise NotImplementedError
+
+    async def entries(self) -> List[CacheEntry]:
+        """Returns every live entry, lowest priority first."""
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Keeps entries in a dict. Only visible to the current process."""
+
+    def __init__(self, max_entries: int):
+        super().__init__(max_entries)
+        self._entries: Dict[str, CacheEntry] = {}
+        self._clock = 0.0
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        entry.priority = self._clock + entry.cost
+        return entry
+
+    async def set(self, key: str, value: str, cost: float, ttl: float) -> None:
+        self._entries[key] = CacheEntry(
+            key=key,
+            value=value,
+            cost=cost,
+            expires_at=time.time() + ttl,
+            priority=self._clock + cost
+        )
+
+        while len(self._entries) > self.max_entries:
+            self._evict_one()
+
+    def _evict_one(self) -> None:
+        # Expired entries go first, then the lowest priority
+        now = time.time()
+        victim = min(self._entries.values(), key=lambda e: (e.expires_at > now, e.priority))
+
+        if victim.expires_at > now:
+            self._clock = victim.priority
+            self.evictions += 1
+        del self._entries[victim.key]
+
+    async def entries(self) -> List[CacheEntry]:
+        now = time.time()
+        return sorted(
+            (entry for entry in self._entries.values() if entry.expires_at > now),
+            key=lambda entry: entry.priority
+        )
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Stores entries in a SQLite file shared by every process on the machine.
+
+    Like SQLiteBroker, each call opens a short-lived connection in a worker
+    thread so the event loop never blocks on disk I/O. The GreedyDual clock
+    lives in the database too, so every process evicts consistently.
+    """
+
+    persistent = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            cost REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            priority REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS response_cache_priority ON response_cache (priority);
+        CREATE TABLE IF NOT EXISTS response_cache_clock (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            clock REAL NOT NULL
+        );
+        INSERT OR IGNORE INTO response_cache_clock (id, clock) VALUES (0, 0);
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        super().__init__(max_entries)
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None lets us issue BEGIN IMMEDIATE ourselves
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _run(self, fn: Callable[[sqlite3.Connection], object]) -> Awaitable:
+        def call():
+            conn = self._connect()
+            try:
+                return fn(conn)
+            finally:
+                conn.close()
+        return asyncio.to_thread(call)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        def read(conn: sqlite3.Connection) -> Optional[CacheEntry]:
+            row = conn.execute(
+                "SELECT key, value, cost, expires_at, priority FROM response_cache "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE response_cache "
+                "SET priority = (SELECT clock FROM response_cache_clock) + cost WHERE key = ?",
+                (key,)
+            )
+            return CacheEntry(*row)
+
+        return await self._run(read)
+
+    async def set(self, key: str, value: str, cost: float, ttl: float) -> None:
+        def write(conn: sqlite3.Connection) -> int:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, cost, expires_at, priority) "
+                    "SELECT ?, ?, ?, ?, clock + ? FROM response_cache_clock",
+                    (key, value, cost, now + ttl, cost)
+                )
+                conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+
+                (count,) = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()
+                excess = count - self.max_entries
+                if excess > 0:
+                    victims = conn.execute(
+                        "SELECT key, priority FROM response_cache ORDER BY priority LIMIT ?",
+                        (excess,)
+                    ).fetchall()
+                    conn.executemany(
+                        "DELETE FROM response_cache WHERE key = ?",
+                        [(victim_key,) for victim_key, _ in victims]
+                    )
+                    conn.execute(
+                        "UPDATE response_cache_clock SET clock = ?",
+                        (max(priority for _, priority in victims),)
+                    )
+                conn.execute("COMMIT")
+                return max(excess, 0)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        self.evictions += await self._run(write)
+
+    async def entries(self) -> List[CacheEntry]:
+        def read(conn: sqlite3.Connection) -> List[CacheEntry]:
+            rows = conn.execute(
+                "SELECT key, value, cost, expires_at, priority FROM response_cache "
+                "WHERE expires_at > ? ORDER BY priority",
+                (time.time(),)
+            ).fetchall()
+            return [CacheEntry(*row) for row in rows]
+
+        return await self._run(read)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Stores entries on a Redis-protocol server.
+
+    Each entry is a hash with a native TTL; a sorted set holds the
+    GreedyDual priorities. Members whose hash has already expired are
+    dropped from the sorted set when they are read or evicted.
+    """
+
+    persistent = True
+
+    def __init__(self, url: str, max_entries: int, prefix: str = "oriki:response_cache"):
+        if aioredis is None:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+
+        super().__init__(max_entries)
+        self.client = aioredis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.priorities = f"{prefix}:priority"
+        self.clock = f"{prefix}:clock"
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.prefix}:entry:{key}"
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        value, cost = await self.client.hmget(self._entry_key(key), "value", "cost")
+        if value is None:
+            await self.client.zrem(self.priorities, key)
+            return None
+
+        cost = float(cost)
+        clock = float(await self.client.get(self.clock) or 0)
+        ttl = await self.client.ttl(self._entry_key(key))
+        await self.client.zadd(self.priorities, {key: clock + cost})
+        return CacheEntry(key, value, cost, time.time() + max(ttl, 0), clock + cost)
+
+    async def set(self, key: str, value: str, cost: float, ttl: float) -> None:
+        clock = float(await self.client.get(self.clock) or 0)
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._entry_key(key), mapping={"value": value, "cost": cost})
+            pipe.expire(self._entry_key(key), max(1, int(ttl)))
+            pipe.zadd(self.priorities, {key: clock + cost})
+            pipe.zcard(self.priorities)
+            *_, count = await pipe.execute()
+
+        excess = count - self.max_entries
+        if excess > 0:
+            victims = await self.client.zpopmin(self.priorities, excess)
+            await self.client.delete(*(self._entry_key(victim_key) for victim_key, _ in victims))
+            await self.client.set(self.clock, max(priority for _, priority in victims))
+            self.evictions += len(victims)
+
+    async def entries(self) -> List[CacheEntry]:
+        entries = []
+        now = time.time()
+        for key, priority in await self.client.zrange(self.priorities, 0, -1, withscores=True):
+            value, cost = await self.client.hmget(self._entry_key(key), "value", "cost")
+            ttl = await self.client.ttl(self._entry_key(key))
+            if value is not None and ttl > 0:
+                entries.append(CacheEntry(key, value, float(cost), now + ttl, priority))
+        return entries
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class ResponseCache:
+    """
+    Caches JSON responses by key, with hit/miss counters and snapshots.
+
+    Backend errors are logged and treated as misses, so a broken cache
+    never fails a request.
+
+    Usage:
+        cache = ResponseCache(MemoryCacheBackend(1000), ttl=86400)
+        value = await cache.get(key)
+        if value is None:
+            await cache.set(key, response.model_dump_json(), cost=seconds)
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0  # generation time avoided by hits
+        self.errors = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        """Returns the cached value for key, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        try:
+            entry = await self.backend.get(key)
+        except Exception:
+            logger.exception("Response cache read failed")
+            self.errors += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.saved_seconds += entry.cost
+        return entry.value
+
+    async def set(self, key: str, value: str, cost: float) -> None:
+        """Stores value under key; cost is how long it took to produce, in seconds."""
+        if not self.enabled:
+            return
+
+        try:
+            await self.backend.set(key, value, cost, self.ttl)
+        except Exception:
+            logger.exception("Response cache write failed")
+            self.errors += 1
+
+    async def save_snapshot(self, path: str) -> int:
+        """
+        Writes every live entry to a JSON file (atomically).
+
+        Returns:
+            Number of entries written
+        """
+        entries = await self.backend.entries()
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "entries": [asdict(entry) for entry in entries],
+        }
+
+        def write() -> None:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+
+        await asyncio.to_thread(write)
+        return len(entries)
+
+    async def load_snapshot(self, path: str) -> int:
+        """
+        Loads entries from a snapshot file, skipping expired ones.
+
+        A missing, unreadable or outdated snapshot is ignored.
+
+        Returns:
+            Number of entries loaded
+        """
+        def read() -> Optional[Dict[str, Any]]:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return None
+
+        snapshot = await asyncio.to_thread(read)
+        if snapshot is None or snapshot.get("version") != SNAPSHOT_VERSION:
+            return 0
+
+        loaded = 0
+        now = time.time()
+        # Lowest priority first, so the relative eviction order survives
+        for entry in map(lambda data: CacheEntry(**data), snapshot["entries"]):
+            if entry.expires_at > now:
+                await self.backend.set(entry.key, entry.value, entry.cost, entry.expires_at - now)
+                loaded += 1
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, evictions and the generation time saved."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.backend.evictions,
+            "saved_seconds": round(self.saved_seconds, 1),
+            "errors": self.errors,
+        }
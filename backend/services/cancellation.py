@@ -0,0 +1,130 @@
+"""
+Request Cancellation - Client disconnects and request deadlines
+
+Work for a request stops being useful in two ways before it finishes:
+
+1. The client goes away. The frontend aborts /generate and /audio after
+   60 seconds, and users can cancel from the loading screen, but the
+   endpoint keeps running and every LLM/TTS call is paid for and thrown
+   away. A DisconnectGuard watches the connection while the work runs and
+   cancels it as soon as the client disconnects.
+
+2. The client has a deadline. A Deadline is the point after which nobody
+   is waiting for the answer any more. The pipeline executor uses it to cut
+   each stage's timeout short, and to fail a stage straight away instead of
+   starting (or retrying) it when it can no longer finish in time.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from backend.config import settings
+
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when too little time is left before the deadline to do the work."""
+
+
+class Deadline:
+    """
+    A fixed point in time by which the caller needs the response.
+
+    Usage:
+        deadline = Deadline.from_timeout(header_value)
+        async with asyncio.timeout(deadline.remaining()):
+            ...
+    """
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_timeout(cls, seconds: Optional[float]) -> "Deadline":
+        """
+        Builds a deadline from a client-supplied timeout.
+
+        Falls back to REQUEST_DEADLINE_SECONDS when the client didn't send
+        one, and never allows more than REQUEST_DEADLINE_MAX_SECONDS.
+        """
+        if seconds is None:
+            seconds = settings.REQUEST_DEADLINE_SECONDS
+        return cls(min(seconds, settings.REQUEST_DEADLINE_MAX_SECONDS))
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def clamp(self, timeout: Optional[float]) -> float:
+        """Shortens a timeout so it doesn't run past the deadline."""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def require(self, seconds: float, what: str) -> None:
+        """
+        Checks that at least `seconds` are left before the deadline.
+
+        Raises:
+            DeadlineExceeded: If there isn't enough time left for `what`
+        """
+        remaining = self.remaining()
+        if remaining <= 0 or remaining < seconds:
+            raise DeadlineExceeded(
+                f"{remaining:.1f}s left before the deadline, "
+                f"{what} needs at least {seconds:.1f}s"
+            )
+
+
+class ClientDisconnected(Exception):
+    """Raised when the work was cancelled because the client went away."""
+
+
+class DisconnectGuard:
+    """
+    Cancels a request's work when its client disconnects.
+
+    Usage:
+        guard = DisconnectGuard("generate")
+        result = await guard.run(request.is_disconnected, do_work())
+    """
+
+    def __init__(self, name: str, poll_interval: float = settings.DISCONNECT_POLL_INTERVAL):
+        self.name = name
+        self.poll_interval = poll_interval
+        self.cancelled = 0  # requests whose work was cancelled after a disconnect
+
+    async def run(
+        self,
+        is_disconnected: Callable[[], Awaitable[bool]],
+        work: Awaitable[T]
+    ) -> T:
+        """
+        Awaits `work`, polling `is_disconnected` while it runs.
+
+        Raises:
+            ClientDisconnected: If the client went away before the work finished
+        """
+        task = asyncio.ensure_future(work)
+
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self.poll_interval)
+                if done:
+                    return task.result()
+
+                if await is_disconnected():
+                    self.cancelled += 1
+                    raise ClientDisconnected(f"Client disconnected during {self.name}")
+
+        finally:
+            # Stops the upstream calls on disconnect, or if we were cancelled ourselves
+            if not task.done():
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of requests cancelled after a disconnect."""
+        return {"cancelled_on_disconnect": self.cancelled}
@@ -0,0 +1,245 @@
+"""
+Stage DAG Executor - Timeouts, retries and fallbacks for pipeline stages
+
+The generation pipeline is a small DAG (extract -> {compose, affirm}). This
+module runs such a DAG with a policy per stage:
+
+- timeout:  per attempt, so one slow upstream call can't eat the whole
+            request budget
+- retries:  how many extra attempts a failed/timed-out stage gets
+- fallback: value to use when the stage still fails
+- critical: whether the whole run fails with the stage, or continues and
+            reports a partial result
+
+Stages start as soon as their dependencies finish, so independent stages
+run concurrently. When a critical stage fails, every other running stage
+is cancelled before the error is raised.
+
+A run can also be given a request Deadline. Each attempt's timeout is then
+cut to the time left, and a stage that has less than its policy's min_time
+left is failed straight away instead of being started or retried.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.services.cancellation import Deadline, DeadlineExceeded
+
+
+@dataclass
+class StagePolicy:
+    """How a single stage is timed out, retried and allowed to fail."""
+
+    # Seconds allowed per attempt (None = no limit)
+    timeout: Optional[float] = None
+
+    # Extra attempts after the first failure
+    retries: int = 0
+
+    # Delay before the first retry, doubled for each further retry
+    backoff: float = 0.5
+
+    # Decides whether an exception is worth retrying (default: always)
+    retry_if: Callable[[Exception], bool] = lambda e: True
+
+    # A failed critical stage fails the whole run; a non-critical one
+    # leaves its fallback (or None) in the result and the run continues
+    critical: bool = True
+
+    # Least time (seconds) worth starting an attempt with; with less left
+    # before the run's deadline, the stage fails with DeadlineExceeded
+    min_time: float = 0.0
+
+
+@dataclass
+class Stage:
+    """
+    One node of the pipeline DAG.
+
+    run receives a dict with the executor inputs plus the result of every
+    dependency (keyed by stage name). fallback receives the same dict and
+    the final exception, and returns a substitute value.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    policy: StagePolicy = field(default_factory=StagePolicy)
+    fallback: Optional[Callable[[Dict[str, Any], Exception], Any]] = None
+
+
+class StageFailed(Exception):
+    """Raised when a critical stage fails after all retries and has no fallback."""
+
+    def __init__(self, stage: str, cause: Exception):
+        super().__init__(f"Stage '{stage}' failed: {cause!r}")
+        self.stage = stage
+        self.cause = cause
+
+
+@dataclass
+class PipelineResult:
+    """Outputs of a pipeline run."""
+
+    # Result per stage name (fallback value or None for degraded stages)
+    results: Dict[str, Any]
+
+    # Stages that failed or timed out and were replaced by their fallback,
+    # with a short description of why
+    degraded: Dict[str, str]
+
+    @property
+    def partial(self) -> bool:
+        """True if any stage's output is a fallback rather than a real result."""
+        return bool(self.degraded)
+
+
+class PipelineExecutor:
+    """
+    Runs a DAG of stages with per-stage policies.
+
+    Usage:
+        pipeline = PipelineExecutor([
+            Stage("a", run_a),
+            Stage("b", run_b, depends_on=("a",)),
+        ])
+        result = await pipeline.run({"submission": submission}, deadline=deadline)
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = self._topological_order(stages)
+
+    @staticmethod
+    def _topological_order(stages: List[Stage]) -> List[str]:
+        """Orders stages so each comes after its dependencies; rejects cycles."""
+        by_name = {stage.name: stage for stage in stages}
+        order: List[str] = []
+        visiting = set()
+
+        def visit(name: str) -> None:
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+            if name not in by_name:
+                raise ValueError(f"Unknown pipeline stage '{name}'")
+            visiting.add(name)
+            for dep in by_name[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for stage in stages:
+            visit(stage.name)
+        return order
+
+    async def run(
+        self,
+        inputs: Dict[str, Any],
+        deadline: Optional[Deadline] = None
+    ) -> PipelineResult:
+        """
+        Runs every stage and returns their results.
+
+        Args:
+            inputs: Values every stage receives in its context dict
+            deadline: Optional request deadline no stage may run past
+
+        Raises:
+            StageFailed: If a critical stage fails without a usable fallback
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        degraded: Dict[str, str] = {}
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                # Dependencies are created first, so every task can await them
+                for name in self.order:
+                    tasks[name] = group.create_task(
+                        self._run_stage(self.stages[name], inputs, tasks, degraded, deadline)
+                    )
+
+        except ExceptionGroup as eg:
+            # Surface the first critical failure; everything else was cancelled
+            raise eg.exceptions[0]
+
+        return PipelineResult(
+            results={name: task.result() for name, task in tasks.items()},
+            degraded=degraded
+        )
+
+    async def _run_stage(
+        self,
+        stage: Stage,
+        inputs: Dict[str, Any],
+        tasks: Dict[str, asyncio.Task],
+        degraded: Dict[str, str],
+        deadline: Optional[Deadline]
+    ) -> Any:
+        """Waits for dependencies, then runs one stage under its policy."""
+        context = dict(inputs)
+        for dep in stage.depends_on:
+            context[dep] = await tasks[dep]
+
+        try:
+            skipped = [dep for dep in stage.depends_on if dep in degraded]
+            if skipped:
+                # Don't build on a fallback value; degrade this stage too
+                raise RuntimeError(f"dependency '{skipped[0]}' did not complete")
+
+            return await self._attempt(stage, context, deadline)
+
+        except Exception as e:
+            if stage.fallback is not None:
+                degraded[stage.name] = _describe(e)
+                return stage.fallback(context, e)
+
+            if not stage.policy.critical:
+                degraded[stage.name] = _describe(e)
+                return None
+
+            raise StageFailed(stage.name, e) from e
+
+    async def _attempt(
+        self,
+        stage: Stage,
+        context: Dict[str, Any],
+        deadline: Optional[Deadline]
+    ) -> Any:
+        """Runs the stage with its timeout, retrying according to its policy."""
+        policy = stage.policy
+        attempt = 0
+
+        while True:
+            timeout = policy.timeout
+            if deadline is not None:
+                # Don't start work the client won't be around to receive
+                deadline.require(policy.min_time, f"stage '{stage.name}'")
+                timeout = deadline.clamp(timeout)
+
+            try:
+                async with asyncio.timeout(timeout):
+                    return await stage.run(context)
+
+            except Exception as e:
+                if attempt >= policy.retries or not policy.retry_if(e):
+                    raise
+
+                delay = policy.backoff * (2 ** attempt)
+                if deadline is not None and deadline.remaining() < delay + policy.min_time:
+                    # A retry couldn't finish in time; report the real failure
+                    raise
+
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+def _describe(e: Exception) -> str:
+    """Short human-readable reason for a degraded stage."""
+    if isinstance(e, DeadlineExceeded):
+        return "request deadline exceeded"
+    if isinstance(e, TimeoutError):
+        return "timed out"
+    return str(e) or type(e).__name__
@@ -0,0 +1,148 @@
+"""
+File Store - Where rendered audio is kept for download by URL
+
+Returning audio as base64 inside JSON makes every clip about a third
+larger, keeps several copies of it in memory, and the browser has to
+decode it again. Instead, /audio can store the file and return a URL:
+
+- LocalFileStore: files under AUDIO_OUTPUT_DIR (the same content-addressed
+  files the audio cache keeps), served by GET /api/v1/audio/files/{name}
+  with Range, ETag and sendfile support
+- S3FileStore: any S3-compatible bucket (AWS S3, MinIO, R2...); the URL is
+  a presigned GET, so the bucket serves Range/ETag itself. Needs the
+  optional `boto3` package
+
+Names are "<content hash>.<format>", so the same audio is only stored once
+and a name's content never changes.
+"""
+
+import asyncio
+import re
+from typing import Optional
+
+from backend.services.audio_cache import AudioCache
+
+try:
+    import boto3
+except ImportError:  # Only needed for AUDIO_STORE_BACKEND=s3
+    boto3 = None
+
+
+# "<64 hex chars>.<format>" - anything else is rejected before touching the disk
+NAME_PATTERN = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]{2,5})$")
+
+CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+}
+
+
+def content_type_for(name: str) -> str:
+    """MIME type for a stored file, from its extension."""
+    return CONTENT_TYPES.get(name.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+class FileStore:
+    """Stores immutable files by name and hands out URLs for them."""
+
+    async def put(self, name: str, data: bytes) -> None:
+        """Stores data under name (a no-op if it is already stored)."""
+        raise NotImplementedError
+
+    async def url(self, name: str) -> str:
+        """Returns a URL the client can download the file from."""
+        raise NotImplementedError
+
+
+class LocalFileStore(FileStore):
+    """
+    Files on local disk, shared with the audio cache.
+
+    The audio cache already keeps every rendered clip on disk by content
+    hash, so the store reuses those files instead of writing a second copy.
+    Files are written even when the cache is disabled, since their URLs
+    must resolve. Like any cache entry, a file can be evicted later; clients
+    fetch the URL straight away, and a 404 just means asking /audio again.
+    """
+
+    def __init__(self, cache: AudioCache, base_url: str):
+        self.cache = cache
+        self.base_url = base_url.rstrip("/")
+
+    def path_for(self, name: str) -> Optional[str]:
+        """The file's path on disk, or None for a name that isn't valid."""
+        match = NAME_PATTERN.match(name)
+        if match is None:
+            return None
+        return self.cache.path_for(*match.groups())
+
+    async def put(self, name: str, data: bytes) -> None:
+        key, audio_format = NAME_PATTERN.match(name).groups()
+        await self.cache.put(key, audio_format, data, force=True)
+
+    async def url(self, name: str) -> str:
+        return f"{self.base_url}/api/v1/audio/files/{name}"
+
+
+class S3FileStore(FileStore):
+    """
+    Files in an S3-compatible bucket, downloaded through presigned URLs.
+
+    boto3 is synchronous, so each call runs in a worker thread. For MinIO,
+    set endpoint_url (e.g. http://localhost:9000).
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str = "",
+        region: str = "us-east-1",
+        access_key_id: str = "",
+        secret_access_key: str = "",
+        url_expiry: int = 3600
+    ):
+        if boto3 is None:
+            raise RuntimeError("AUDIO_STORE_BACKEND=s3 needs the boto3 package (pip install boto3)")
+
+        self.bucket = bucket
+        self.url_expiry = url_expiry
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None
+        )
+
+    def _exists(self, name: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    async def put(self, name: str, data: bytes) -> None:
+        def upload() -> None:
+            if self._exists(name):
+                return
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=name,
+                Body=data,
+                ContentType=content_type_for(name),
+                # Content-addressed, so the bytes behind a name never change
+                CacheControl="public, max-age=31536000, immutable"
+            )
+
+        await asyncio.to_thread(upload)
+
+    async def url(self, name: str) -> str:
+        return await asyncio.to_thread(
+            self.client.generate_presigned_url,
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": name},
+            ExpiresIn=self.url_expiry
+        )
@@ -0,0 +1,168 @@
+"""
+Hedged Requests - Cut tail latency on slow upstream calls
+
+Most LLM calls finish in a predictable time, but now and then the provider
+takes far longer than usual. A hedged call waits until the original request
+is slower than a chosen percentile of recent calls, then fires a duplicate.
+Whichever finishes first wins and the other is cancelled.
+
+Hedging costs money, so it is capped by a budget: each normal call earns a
+fraction of a hedge (e.g. 0.1), and a hedge can only be sent when a whole
+one has been earned. With a 10% budget, hedges can never add more than
+about 10% extra upstream calls.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from backend.config import settings
+
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Keeps a sliding window of recent call durations."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Returns the p-th percentile (0-100) of the window, or None if empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class HedgeBudget:
+    """
+    Token bucket limiting hedges to a fraction of all calls.
+
+    Every call deposits `ratio` tokens (up to `burst`); a hedge spends one.
+    """
+
+    def __init__(self, ratio: float, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+
+    def deposit(self) -> None:
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        # Small tolerance so ten deposits of 0.1 add up to a whole hedge
+        if self._tokens >= 1.0 - 1e-9:
+            self._tokens -= 1.0
+            return True
+        return False
+
+
+# Every hedger created, by name - reported by GET /api/v1/stats
+HEDGERS: Dict[str, "Hedger"] = {}
+
+
+class Hedger:
+    """
+    Sends a duplicate request when the first one is unusually slow.
+
+    Usage:
+        hedger = Hedger("extract")
+        result = await hedger.call(lambda: chain.ainvoke(input_data))
+
+    fn must be safe to call twice (an idempotent read-only LLM call).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float = settings.HEDGE_PERCENTILE,
+        min_samples: int = settings.HEDGE_MIN_SAMPLES,
+        budget_ratio: float = settings.HEDGE_BUDGET_RATIO,
+        enabled: bool = settings.HEDGE_ENABLED
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self.tracker = LatencyTracker()
+        self.budget = HedgeBudget(budget_ratio)
+
+        self.calls = 0       # calls made through this hedger
+        self.hedges = 0      # duplicate requests sent
+        self.hedge_wins = 0  # times the duplicate finished first
+
+        HEDGERS[name] = self
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait before hedging, or None if there isn't enough history yet."""
+        if not self.enabled or len(self.tracker) < self.min_samples:
+            return None
+        return self.tracker.percentile(self.percentile)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Runs fn(), hedging with a second fn() if it is slower than usual."""
+        self.calls += 1
+        self.budget.deposit()
+
+        delay = self.hedge_delay()
+        started: Dict[asyncio.Task, float] = {}
+
+        def launch() -> asyncio.Task:
+            task = asyncio.ensure_future(fn())
+            started[task] = time.perf_counter()
+            return task
+
+        primary = launch()
+        pending = {primary}
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self.budget.try_spend():
+                    self.hedges += 1
+                    pending.add(launch())
+
+            # Take the first call that succeeds; only fail if every call fails
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        # Always the primary's time: when the hedge wins, the
+                        # primary has taken at least this long (a lower bound).
+                        # The hedge's own time would start at the hedge delay
+                        # and drag the percentile, and so the delay, down
+                        self.tracker.record(time.perf_counter() - started[primary])
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    first_error = first_error or task.exception()
+
+            raise first_error
+
+        finally:
+            # Cancel the loser (or everything, if we were cancelled ourselves)
+            for task in started:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hedge counters and the current hedge delay."""
+        delay = self.hedge_delay()
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedges / self.calls, 3) if self.calls else 0.0,
+            "hedge_after_seconds": round(delay, 2) if delay is not None else None,
+        }
@@ -0,0 +1,120 @@
+"""
+Shared HTTP Transport - One tuned connection pool for every upstream client
+
+Every ChatOpenAI and AsyncOpenAI used to create its own httpx client, so
+the agents (and the TTS client) each kept a separate pool: connections
+weren't shared between them, and under concurrency each pool paid for its
+own TLS handshakes. They now all send through one httpx.AsyncClient:
+
+- HTTP/2 when the optional `h2` package is installed (`httpx[http2]`), so
+  concurrent calls to the same host are multiplexed over one connection
+- keep-alive limits sized from the server's concurrency settings
+- pool_stats() reports active, idle and waiting connections for sizing
+- event hooks record every upstream call's latency, retries and errors
+  for /metrics
+
+get_http_client() returns the client, creating it on first use. The app
+lifespan closes it on shutdown; the next call (e.g. from the next
+lifespan's registry build) then creates a new one, so the agents must be
+rebuilt rather than keep the closed client.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+from backend.config import settings
+from backend.services import metrics, tracing
+
+try:
+    import h2  # noqa: F401 - httpx needs it for http2=True
+    HTTP2_AVAILABLE = True
+except ImportError:  # Falls back to HTTP/1.1 keep-alive
+    HTTP2_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# Concurrent upstream calls per running generation: compose + affirm + a hedge
+CALLS_PER_GENERATION = 3
+
+
+def pool_limits() -> httpx.Limits:
+    """
+    Connection limits from the settings.
+
+    HTTP_MAX_KEEPALIVE = 0 sizes the idle pool for the job workers plus the
+    same number of concurrent /generate requests, each making up to
+    CALLS_PER_GENERATION upstream calls at once.
+    """
+    keepalive = settings.HTTP_MAX_KEEPALIVE or max(10, 2 * settings.JOB_WORKERS * CALLS_PER_GENERATION)
+    return httpx.Limits(
+        max_connections=max(settings.HTTP_MAX_CONNECTIONS, keepalive),
+        max_keepalive_connections=keepalive,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Builds the shared client (timeouts are set per request by the OpenAI SDK)."""
+    if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE:
+        logger.warning("HTTP2_ENABLED is set but the h2 package is missing; using HTTP/1.1")
+
+    return httpx.AsyncClient(
+        http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        limits=pool_limits(),
+        timeout=settings.LLM_REQUEST_TIMEOUT,
+        # Upstream latency/retry metrics, and a span per call in traced requests
+        event_hooks={
+            event: metrics.UPSTREAM_EVENT_HOOKS[event] + tracing.UPSTREAM_EVENT_HOOKS[event]
+            for event in ("request", "response")
+        }
+    )
+
+
+def pool_stats(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """
+    Counts the pool's connections by state, and the requests waiting for one.
+
+    waiting > 0 means requests are queuing for a free connection: raise
+    HTTP_MAX_CONNECTIONS. Many idle connections means the keep-alive limit
+    can come down.
+    """
+    # httpx keeps its httpcore pool on the transport; neither exposes these
+    # counts publicly, so read them defensively
+    pool = getattr(client._transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    requests = list(getattr(pool, "_requests", []))
+
+    idle = sum(1 for c in connections if c.is_idle())
+    closed = sum(1 for c in connections if c.is_closed())
+    limits = pool_limits()
+
+    return {
+        "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+        "connections": len(connections) - closed,
+        "active": len(connections) - idle - closed,
+        "idle": idle,
+        "waiting": sum(1 for r in requests if r.is_queued()),
+        "max_connections": limits.max_connections,
+        "max_keepalive": limits.max_keepalive_connections,
+    }
+
+
+# Shared by every agent and the TTS client - see get_http_client()
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared client, created on first use and again after it was closed."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Closes the shared client's connections (call from the app lifespan)."""
+    if _http_client is not None:
+        await _http_client.aclose()
@@ -0,0 +1,526 @@
+"""
+Background Job Queue - Run generation and audio requests off the HTTP path
+
+Long LLM and TTS calls are fragile when they hold an HTTP connection open
+(proxy timeouts, the frontend's 60 s abort). This module lets the API accept
+a request, return a job id immediately, and run the work on a bounded pool
+of worker tasks. Clients then poll for the result.
+
+The broker (where jobs are stored) is pluggable:
+- InMemoryBroker: a single process, for local development
+- SQLiteBroker: a shared database file, so several uvicorn worker
+  processes can feed from and drain the same queue
+
+A claimed job holds a lease that its worker renews while the job runs. If
+the worker's process dies without finishing the job (a crash, an OOM kill),
+the lease runs out and the next claim marks the job failed, instead of it
+staying "running" forever.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+logger = logging.getLogger(__name__)
+
+# Job states, in lifecycle order
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# How many recent jobs the ETA estimate is based on
+RECENT_JOBS_WINDOW = 50
+
+# Minimum time between sweeps of expired job results
+PRUNE_INTERVAL_SECONDS = 60
+
+# Default lease on a claimed job; workers renew it every third of this
+DEFAULT_LEASE_SECONDS = 60.0
+
+# Error stored for a running job whose worker stopped renewing its lease
+LEASE_EXPIRED_ERROR = "The worker running this job stopped before it finished"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its maximum depth."""
+
+
+@dataclass
+class JobRecord:
+    """
+    A single job as stored by a broker.
+
+    payload and result are JSON strings so every broker can store them
+    the same way, regardless of which pydantic model they came from.
+    """
+
+    id: str
+    kind: str
+    payload: str
+    status: str = QUEUED
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    lease_until: Optional[float] = None
+
+
+# ============================================================================
+# BROKERS
+# ============================================================================
+
+class JobBroker:
+    """
+    Storage backend for jobs.
+
+    Subclasses must make claim() safe against concurrent callers, so one
+    job is never handed to two workers.
+    """
+
+    async def enqueue(self, kind: str, payload: str, max_depth: int) -> JobRecord:
+        """Stores a new queued job, or raises QueueFullError if max_depth is reached."""
+        raise NotImplementedError
+
+    async def claim(self, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[JobRecord]:
+        """
+        Marks the oldest queued job as running, leased for lease_seconds, and
+        returns it (None if the queue is empty). Running jobs whose lease has
+        run out are marked failed first.
+        """
+        raise NotImplementedError
+
+    async def renew(self, job_id: str, lease_seconds: float) -> None:
+        """Extends a running job's lease to lease_seconds from now."""
+        raise NotImplementedError
+
+    async def finish(self, job_id: str, result: Optional[str], error: Optional[str]) -> None:
+        """Stores the outcome of a running job."""
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        """Returns a job by id (None if it doesn't exist or has been pruned)."""
+        raise NotImplementedError
+
+    async def position(self, job_id: str) -> Optional[int]:
+        """Returns how many queued jobs are ahead of this one (None if not queued)."""
+        raise NotImplementedError
+
+    async def recent_durations(self, kind: Optional[str] = None) -> List[float]:
+        """Returns run times (seconds) of recently succeeded jobs, optionally for one kind."""
+        raise NotImplementedError
+
+    async def prune(self, older_than: float) -> None:
+        """Deletes finished jobs that finished before the given timestamp."""
+        raise NotImplementedError
+
+
+class InMemoryBroker(JobBroker):
+    """Keeps jobs in a dict. Only visible to the current process."""
+
+    def __init__(self):
+        self._jobs: Dict[str, JobRecord] = {}
+        self._queue: List[str] = []
+
+    async def enqueue(self, kind: str, payload: str, max_depth: int) -> JobRecord:
+        if len(self._queue) >= max_depth:
+            raise QueueFullError(f"Job queue is full ({max_depth} jobs waiting)")
+
+        job = JobRecord(id=uuid.uuid4().hex, kind=kind, payload=payload, created_at=time.time())
+        self._jobs[job.id] = job
+        self._queue.append(job.id)
+        return job
+
+    async def claim(self, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[JobRecord]:
+        # No await between pop and update, so this is atomic on the event loop
+        now = time.time()
+        for job in self._jobs.values():
+            if job.status == RUNNING and job.lease_until < now:
+                job.status, job.error, job.finished_at = FAILED, LEASE_EXPIRED_ERROR, now
+
+        if not self._queue:
+            return None
+
+        job = self._jobs[self._queue.pop(0)]
+        job.status = RUNNING
+        job.started_at = now
+        job.lease_until = now + lease_seconds
+        return job
+
+    async def renew(self, job_id: str, lease_seconds: float) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status == RUNNING:
+            job.lease_until = time.time() + lease_seconds
+
+    async def finish(self, job_id: str, result: Optional[str], error: Optional[str]) -> None:
+        job = self._jobs[job_id]
+        job.status = FAILED if error is not None else SUCCEEDED
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        return self._jobs.get(job_id)
+
+    async def position(self, job_id: str) -> Optional[int]:
+        try:
+            return self._queue.index(job_id)
+        except ValueError:
+            return None
+
+    async def recent_durations(self, kind: Optional[str] = None) -> List[float]:
+        finished = sorted(
+            (job for job in self._jobs.values()
+             if job.status == SUCCEEDED and (kind is None or job.kind == kind)),
+            key=lambda job: job.finished_at
+        )[-RECENT_JOBS_WINDOW:]
+        return [job.finished_at - job.started_at for job in finished]
+
+    async def prune(self, older_than: float) -> None:
+        for job_id in [job.id for job in self._jobs.values()
+                       if job.finished_at is not None and job.finished_at < older_than]:
+            del self._jobs[job_id]
+
+
+class SQLiteBroker(JobBroker):
+    """
+    Stores jobs in a SQLite file shared by every process on the machine.
+
+    Each call opens a short-lived connection in a worker thread so the event
+    loop never blocks on disk I/O. claim() uses BEGIN IMMEDIATE so only one
+    process at a time can move a job from queued to running.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT UNIQUE NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            lease_until REAL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status_seq ON jobs (status, seq);
+    """
+
+    COLUMNS = "id, kind, payload, status, result, error, created_at, started_at, finished_at, lease_until"
+
+    def __init__(self, path: str):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+            # Databases created before leases existed
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "lease_until" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None lets us issue BEGIN IMMEDIATE ourselves
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _run(self, fn: Callable[[sqlite3.Connection], object]) -> Awaitable:
+        def call():
+            conn = self._connect()
+            try:
+                return fn(conn)
+            finally:
+                conn.close()
+        return asyncio.to_thread(call)
+
+    async def enqueue(self, kind: str, payload: str, max_depth: int) -> JobRecord:
+        job = JobRecord(id=uuid.uuid4().hex, kind=kind, payload=payload, created_at=time.time())
+
+        def insert(conn: sqlite3.Connection) -> None:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (depth,) = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)
+                ).fetchone()
+                if depth >= max_depth:
+                    raise QueueFullError(f"Job queue is full ({max_depth} jobs waiting)")
+                conn.execute(
+                    "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (job.id, job.kind, job.payload, QUEUED, job.created_at)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        await self._run(insert)
+        return job
+
+    async def claim(self, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[JobRecord]:
+        def take(conn: sqlite3.Connection) -> Optional[JobRecord]:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs of workers that died (a NULL lease predates leases)
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                    "WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+                    (FAILED, LEASE_EXPIRED_ERROR, now, RUNNING, now)
+                )
+
+                row = conn.execute(
+                    f"SELECT {self.COLUMNS} FROM jobs WHERE status = ? ORDER BY seq LIMIT 1",
+                    (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                job = JobRecord(*row)
+                job.status = RUNNING
+                job.started_at = now
+                job.lease_until = now + lease_seconds
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, lease_until = ? WHERE id = ?",
+                    (job.status, job.started_at, job.lease_until, job.id)
+                )
+                conn.execute("COMMIT")
+                return job
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        return await self._run(take)
+
+    async def renew(self, job_id: str, lease_seconds: float) -> None:
+        await self._run(lambda conn: conn.execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ?",
+            (time.time() + lease_seconds, job_id, RUNNING)
+        ))
+
+    async def finish(self, job_id: str, result: Optional[str], error: Optional[str]) -> None:
+        status = FAILED if error is not None else SUCCEEDED
+        await self._run(lambda conn: conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, result, error, time.time(), job_id)
+        ))
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        row = await self._run(lambda conn: conn.execute(
+            f"SELECT {self.COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone())
+        return JobRecord(*row) if row else None
+
+    async def position(self, job_id: str) -> Optional[int]:
+        def count_ahead(conn: sqlite3.Connection) -> Optional[int]:
+            row = conn.execute(
+                "SELECT seq FROM jobs WHERE id = ? AND status = ?", (job_id, QUEUED)
+            ).fetchone()
+            if row is None:
+                return None
+            (ahead,) = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND seq < ?", (QUEUED, row[0])
+            ).fetchone()
+            return ahead
+
+        return await self._run(count_ahead)
+
+    async def recent_durations(self, kind: Optional[str] = None) -> List[float]:
+        query = "SELECT finished_at - started_at FROM jobs WHERE status = ?"
+        params: tuple = (SUCCEEDED,)
+        if kind is not None:
+            query += " AND kind = ?"
+            params += (kind,)
+        query += " ORDER BY finished_at DESC LIMIT ?"
+        params += (RECENT_JOBS_WINDOW,)
+
+        rows = await self._run(lambda conn: conn.execute(query, params).fetchall())
+        return [row[0] for row in rows]
+
+    async def prune(self, older_than: float) -> None:
+        await self._run(lambda conn: conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (older_than,)
+        ))
+
+
+# ============================================================================
+# WORKER POOL
+# ============================================================================
+
+# A handler takes the job's JSON payload and returns a pydantic result
+JobHandler = Callable[[str], Awaitable[BaseModel]]
+
+
+class JobQueue:
+    """
+    Runs queued jobs on a fixed number of worker tasks.
+
+    Workers wake up immediately when a job is submitted in this process, and
+    otherwise poll the broker every poll_interval seconds (which is how jobs
+    submitted by other processes sharing a SQLiteBroker are picked up).
+    While a job runs, its worker renews the job's lease every third of
+    lease_seconds.
+    """
+
+    def __init__(
+        self,
+        broker: JobBroker,
+        handlers: Dict[str, JobHandler],
+        workers: int = 2,
+        max_depth: int = 50,
+        result_ttl: float = 3600,
+        poll_interval: float = 0.5,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ):
+        self.broker = broker
+        self.handlers = handlers
+        self.workers = workers
+        self.max_depth = max_depth
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._last_prune = 0.0
+
+    async def start(self) -> None:
+        """Starts the worker tasks (call from the app lifespan)."""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancels the worker tasks and waits for them to exit."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, payload: BaseModel) -> JobRecord:
+        """
+        Queues a job.
+
+        Raises:
+            ValueError: If there is no handler for this kind of job
+            QueueFullError: If the queue is at its maximum depth
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job = await self.broker.enqueue(kind, payload.model_dump_json(), self.max_depth)
+        self._wakeup.set()
+        return job
+
+    async def status(self, job_id: str) -> Optional[Dict[str, object]]:
+        """
+        Returns the job's state plus its queue position and ETA.
+
+        The ETA is based on how long recent successful jobs took to run
+        (failures are often quick and would pull it down): the jobs ahead
+        of this one are shared across the worker pool, then this job itself
+        takes about as long as recent jobs of the same kind.
+        """
+        job = await self.broker.get(job_id)
+        if job is None:
+            return None
+
+        position = await self.broker.position(job_id) if job.status == QUEUED else None
+        eta = None
+
+        if job.status in (QUEUED, RUNNING):
+            own_runs = await self.broker.recent_durations(job.kind)
+            all_runs = await self.broker.recent_durations()
+            own = sum(own_runs) / len(own_runs) if own_runs else None
+            typical = sum(all_runs) / len(all_runs) if all_runs else own
+
+            if job.status == QUEUED and own is not None:
+                eta = (position or 0) / self.workers * typical + own
+            elif job.status == RUNNING and own is not None:
+                eta = max(0.0, own - (time.time() - job.started_at))
+
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "queue_position": position,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+    async def _worker(self) -> None:
+        """
+        Claims and runs jobs until cancelled.
+
+        A broker error (e.g. SQLite's "database is locked") is logged and
+        retried after poll_interval, so it never takes a worker down.
+        """
+        while True:
+            try:
+                job = await self.broker.claim(self.lease_seconds)
+
+                if job is None:
+                    # Nothing to do: drop old results now and then
+                    now = time.time()
+                    if now - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                        self._last_prune = now
+                        await self.broker.prune(now - self.result_ttl)
+            except Exception:
+                logger.exception("Job broker failed; retrying in %.1fs", self.poll_interval)
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if job is None:
+                # Wait for a local submit or the next poll
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heartbeat = asyncio.create_task(self._renew_lease(job.id))
+            try:
+                result = await self.handlers[job.kind](job.payload)
+            except asyncio.CancelledError:
+                await self._finish(job.id, None, "Server shut down before the job finished")
+                raise
+            except Exception as e:
+                await self._finish(job.id, None, str(e))
+            else:
+                await self._finish(job.id, result.model_dump_json(), None)
+            finally:
+                heartbeat.cancel()
+
+    async def _finish(self, job_id: str, result: Optional[str], error: Optional[str]) -> None:
+        """Records a job's outcome; if the broker fails, the lease expiry marks it failed later."""
+        try:
+            await self.broker.finish(job_id, result, error)
+        except Exception:
+            logger.exception("Could not record the outcome of job %s", job_id)
+
+    async def _renew_lease(self, job_id: str) -> None:
+        """Keeps a running job's lease alive until cancelled."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.broker.renew(job_id, self.lease_seconds)
+            except Exception:
+                # A missed renewal is retried next time; the lease has slack
+                pass
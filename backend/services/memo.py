@@ -0,0 +1,126 @@
+"""
+Stage Memoization - Reuse each agent's output for identical inputs
+
+The response cache only helps when the whole submission repeats. Many
+requests differ in a way only some agents care about: switching the
+cultural mode or pronouns changes the poem, but not the extracted themes,
+and the affirmations depend on nothing but the themes.
+
+Each agent declares its input fingerprint - the exact inputs its output
+depends on - and wraps its LLM call in a StageMemo. Outputs are then shared
+between any requests whose fingerprint matches, even when the full
+submissions differ.
+
+Creative stages (poem, affirmations) skip their memo when a fresh variation
+was asked for (see fresh_outputs), so the Regenerate button still gets a
+new poem; analysis stages (themes) are reused either way.
+"""
+
+import hashlib
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Type, TypeVar
+
+from pydantic import BaseModel
+
+from backend.config import settings
+from backend.services.cache import MemoryCacheBackend, ResponseCache
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+# Set by fresh_outputs() for the current request (and the tasks it starts)
+_fresh: ContextVar[bool] = ContextVar("fresh_outputs", default=False)
+
+
+@contextmanager
+def fresh_outputs() -> Iterator[None]:
+    """Makes creative stages regenerate instead of reusing memoized outputs."""
+    token = _fresh.set(True)
+    try:
+        yield
+    finally:
+        _fresh.reset(token)
+
+
+def fingerprint(name: str, inputs: Dict[str, Any]) -> str:
+    """
+    Hashes a stage's inputs into a memo key.
+
+    Pydantic models are dumped to plain data first, and key order doesn't
+    matter, so equal inputs always give the same fingerprint.
+    """
+    plain = {
+        field: value.model_dump(mode="json") if isinstance(value, BaseModel) else value
+        for field, value in inputs.items()
+    }
+    canonical = json.dumps(
+        {"stage": name, "inputs": plain},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# Every memo created, by stage name - reported by GET /api/v1/stats
+MEMOS: Dict[str, "StageMemo"] = {}
+
+
+class StageMemo:
+    """
+    Memoizes one agent's output by its input fingerprint.
+
+    Usage:
+        memo = StageMemo("affirm", AffirmationsOutput)
+        result = await memo.call({"themes": themes}, lambda: chain.ainvoke(...))
+
+    Every call returns a new model instance, so callers can modify the
+    result without changing the memoized copy.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: Type[M],
+        creative: bool = False,
+        max_entries: int = settings.STAGE_MEMO_MAX_ENTRIES,
+        ttl: float = settings.STAGE_MEMO_TTL_SECONDS,
+        enabled: bool = settings.STAGE_MEMO_ENABLED
+    ):
+        self.name = name
+        self.model = model
+        self.creative = creative
+
+        # Same cost-aware eviction as the response cache, kept in this process
+        self.cache = ResponseCache(MemoryCacheBackend(max_entries), ttl=ttl, enabled=enabled)
+
+        MEMOS[name] = self
+
+    async def call(self, inputs: Dict[str, Any], fn: Callable[[], Awaitable[M]]) -> M:
+        """Returns the memoized output for these inputs, or runs fn() and memoizes it."""
+        key = fingerprint(self.name, inputs)
+
+        if not (self.creative and _fresh.get()):
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return self.model.model_validate_json(cached)
+
+        started = time.perf_counter()
+        result = await fn()
+        await self.cache.set(key, result.model_dump_json(), cost=time.perf_counter() - started)
+
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the LLM time saved by hits."""
+        cache_stats = self.cache.stats()
+        return {
+            "hits": cache_stats["hits"],
+            "misses": cache_stats["misses"],
+            "hit_ratio": cache_stats["hit_ratio"],
+            "saved_seconds": cache_stats["saved_seconds"],
+        }
@@ -0,0 +1,444 @@
+"""
+Metrics - Prometheus counters, gauges and histograms for /metrics
+
+/health only says the process is up. These metrics say where the time of
+a slow /generate went: how long each pipeline stage took, how long the LLM
+took to start answering, how many tokens each agent used, how often the
+caches hit and how often upstream calls failed or were retried.
+
+Collection is designed to stay off the hot path's critical cost:
+
+- a recorded value is a dict lookup plus an addition (histograms add a
+  bisect over ~12 bucket bounds); nothing is formatted until a scrape
+- values that other services already count (cache hits, singleflight,
+  hedging) aren't recorded twice: collectors read their stats() when
+  /metrics is scraped
+- LLM metrics come from a LangChain callback handler that runs inline
+  (no thread hop), and upstream HTTP metrics from httpx event hooks on the
+  shared client
+
+The text exposition format is rendered here, so no extra dependency is
+needed; Prometheus scrapes GET /metrics.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+# Seconds; covers cache hits (ms) to slow LLM calls (tens of seconds)
+LATENCY_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+class _Metric:
+    """A named metric with a fixed set of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.label_names, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._values.items()):
+            lines.extend(self._render_value(self._labels(key), value))
+        return lines
+
+    def _render_value(self, labels: Dict[str, str], value: Any) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """A value that only goes up (requests, tokens, errors)."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down (requests in flight)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Observations counted into buckets (latencies), with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Per-bucket counts (the last one is +Inf), sum
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def count(self, **labels: Any) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def _render_value(self, labels: Dict[str, str], value: Any) -> List[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            bucket_labels = {**labels, "le": repr(bound) if bound != float("inf") else "+Inf"}
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics this process exposes.
+
+    Usage:
+        requests = metrics.counter("oriki_requests_total", "Requests", ["route"])
+        requests.inc(route="/generate")
+        metrics.collect(lambda: [("oriki_cache_hits_total", "counter", "...", [({}, 3)])])
+        text = metrics.render()
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _add(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def collect(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Adds a function that reports metric families at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every module that records metrics; rendered by GET /metrics
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    "oriki_http_requests_total", "HTTP requests handled, by route and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = metrics.histogram(
+    "oriki_http_request_duration_seconds", "Time to handle an HTTP request (to the end of the body)", ["method", "route"]
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "oriki_http_requests_in_flight", "HTTP requests being handled right now"
+)
+STAGE_LATENCY = metrics.histogram(
+    "oriki_stage_duration_seconds", "Time per pipeline stage attempt (extract, compose, affirm, fused, tts)", ["stage", "outcome"]
+)
+LLM_LATENCY = metrics.histogram(
+    "oriki_llm_request_duration_seconds", "Time per LLM call, by agent and model", ["agent", "model", "outcome"]
+)
+LLM_FIRST_TOKEN = metrics.histogram(
+    "oriki_llm_time_to_first_token_seconds", "Time until a streamed LLM call's first token", ["agent", "model"]
+)
+LLM_TOKENS = metrics.counter(
+    "oriki_llm_tokens_total", "Tokens used, by agent, model and kind (prompt, cached_prompt or completion)", ["agent", "model", "kind"]
+)
+LLM_ERRORS = metrics.counter(
+    "oriki_llm_errors_total", "LLM calls that raised, by agent, model and exception type", ["agent", "model", "error"]
+)
+UPSTREAM_LATENCY = metrics.histogram(
+    "oriki_upstream_response_seconds", "Time until an upstream API's response headers arrive", ["host", "status"]
+)
+UPSTREAM_RETRIES = metrics.counter(
+    "oriki_upstream_retries_total", "Upstream requests that were retries of an earlier attempt", ["host"]
+)
+UPSTREAM_ERRORS = metrics.counter(
+    "oriki_upstream_errors_total", "Upstream responses with a 429 or 5xx status", ["host", "status"]
+)
+
+
+class StageTimer:
+    """
+    Times one pipeline stage attempt into oriki_stage_duration_seconds.
+
+    Usage:
+        with StageTimer("extract"):
+            themes = await extract_themes(submission)
+    """
+
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> "StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        outcome = "ok" if exc_type is None else ("cancelled" if exc_type.__name__ == "CancelledError" else "error")
+        STAGE_LATENCY.observe(time.perf_counter() - self.started, stage=self.stage, outcome=outcome)
+        return False
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    LangChain callbacks that record latency, time to first token, token
+    usage and errors for one agent's LLM calls.
+
+    Attach it to the agent's ChatOpenAI: ChatOpenAI(..., callbacks=[LLMMetricsHandler("extract")])
+    """
+
+    # Called directly on the event loop instead of in a worker thread
+    run_inline = True
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        # run_id -> [model, started, first token seen]
+        self._runs: Dict[UUID, list] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or "unknown"
+        self._runs[run_id] = [model, time.perf_counter(), False]
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, **kwargs)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is not None and not run[2]:
+            run[2] = True
+            LLM_FIRST_TOKEN.observe(time.perf_counter() - run[1], agent=self.agent, model=run[0])
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model, started, _ = run
+        LLM_LATENCY.observe(time.perf_counter() - started, agent=self.agent, model=model, outcome="ok")
+
+        prompt, completion = _token_usage(response)
+        if prompt or completion:
+            LLM_TOKENS.inc(prompt, agent=self.agent, model=model, kind="prompt")
+            LLM_TOKENS.inc(completion, agent=self.agent, model=model, kind="completion")
+            # Prompt tokens served from the provider's prompt cache (0 when
+            # not reported, e.g. streamed calls on older langchain-openai)
+            LLM_TOKENS.inc(_cached_tokens(response), agent=self.agent, model=model, kind="cached_prompt")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model, started, _ = run
+        outcome = "cancelled" if type(error).__name__ == "CancelledError" else "error"
+        LLM_LATENCY.observe(time.perf_counter() - started, agent=self.agent, model=model, outcome=outcome)
+        LLM_ERRORS.inc(agent=self.agent, model=model, error=type(error).__name__)
+
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    """(prompt, completion) tokens reported for a call, from either place LangChain puts them."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def _cached_tokens(response: LLMResult) -> int:
+    """Prompt tokens the provider read from its prompt cache, from either place LangChain puts them."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            cached = ((usage or {}).get("input_token_details") or {}).get("cache_read")
+            if cached:
+                return cached
+
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+
+
+def prompt_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Per agent: prompt tokens sent, how many the provider's prompt cache
+    served, and their ratio (the share of prompt processing saved).
+    """
+    totals: Dict[str, List[int]] = {}
+    for (agent, _, kind), value in LLM_TOKENS._values.items():
+        if kind in ("prompt", "cached_prompt"):
+            totals.setdefault(agent, [0, 0])[kind == "cached_prompt"] += value
+
+    return {
+        agent: {
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "cached_ratio": round(cached / prompt, 3) if prompt else 0.0,
+        }
+        for agent, (prompt, cached) in totals.items()
+    }
+
+
+def _collect_prompt_cache() -> List[Family]:
+    stats = prompt_cache_stats()
+    return [(
+        "oriki_llm_prompt_cache_ratio", "gauge", "Share of prompt tokens served from the provider's prompt cache since startup",
+        [({"agent": agent}, s["cached_ratio"]) for agent, s in stats.items()]
+    )]
+
+
+metrics.collect(_collect_prompt_cache)
+
+
+async def _on_upstream_request(request: httpx.Request) -> None:
+    request.extensions["metrics_started"] = time.perf_counter()
+    # The OpenAI SDK numbers its attempts
+    if request.headers.get("x-stainless-retry-count", "0") != "0":
+        UPSTREAM_RETRIES.inc(host=request.url.host)
+
+
+async def _on_upstream_response(response: httpx.Response) -> None:
+    started = response.request.extensions.get("metrics_started")
+    if started is not None:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, host=response.request.url.host, status=response.status_code)
+    if response.status_code == 429 or response.status_code >= 500:
+        UPSTREAM_ERRORS.inc(host=response.request.url.host, status=response.status_code)
+
+
+# For httpx.AsyncClient(event_hooks=...): upstream latency, retries and errors
+UPSTREAM_EVENT_HOOKS = {"request": [_on_upstream_request], "response": [_on_upstream_response]}
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests, their latency and how many are in flight.
+
+    Requests are labelled with the matched route's path template (e.g.
+    /api/v1/jobs/{job_id}), so IDs in URLs don't create new series;
+    unmatched paths are labelled "unmatched".
+    """
+
+    def __init__(self, app: Callable, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code)
+
+
+def hit_families(name: str, help: str, stats: Dict[str, Dict[str, Any]], label: str) -> List[Family]:
+    """
+    Families for a set of components whose stats() have hits and misses.
+
+    Returns <name>_hits_total, <name>_misses_total and <name>_hit_ratio,
+    labelled by label=<component name>.
+    """
+    hits = [({label: key}, s["hits"]) for key, s in stats.items()]
+    misses = [({label: key}, s["misses"]) for key, s in stats.items()]
+    ratios = [({label: key}, s["hit_ratio"]) for key, s in stats.items()]
+    return [
+        (f"{name}_hits_total", "counter", f"{help} hits", hits),
+        (f"{name}_misses_total", "counter", f"{help} misses", misses),
+        (f"{name}_hit_ratio", "gauge", f"{help} hit ratio since startup", ratios),
+    ]
@@ -0,0 +1,275 @@
+"""
+MP3 Frames - Join separately rendered MP3 clips into one valid stream
+
+An MP3 file is a sequence of self-contained frames, so clips rendered with
+the same settings can be joined frame by frame without re-encoding. Simply
+appending the files does not work, because each clip carries:
+
+- an ID3v2 tag in front (and possibly an ID3v1 tag at the end)
+- a Xing/Info frame: a silent first frame with the clip's frame count
+  and seek table, which players trust for the duration of the whole file
+
+concat() keeps only the audio frames of each clip and can put pauses
+between them as silent frames. A silent Layer III frame is a header
+followed by zeros: all-zero side info means no main data and no
+bit-reservoir use, so it decodes to silence and doesn't affect the
+frames around it.
+
+index() walks the same frame headers to measure a file without decoding
+it: the exact duration (every frame holds a fixed number of samples) and a
+seek table mapping seconds to byte offsets, for Range requests that start
+on a frame boundary. Scanning reads the data through a memoryview and only
+looks at 4-byte headers, so it copies nothing; a minute of audio takes a
+few milliseconds.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+import struct
+from functools import cached_property, lru_cache
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+# Anything the scanner can read without copying
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+# Kbit/s by bitrate index, for MPEG-1 and for MPEG-2/2.5 Layer III
+BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Hz by sample-rate index, for MPEG-1, MPEG-2 and MPEG-2.5
+SAMPLE_RATES = {
+    1: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    2.5: (11025, 12000, 8000),
+}
+
+
+@dataclass(frozen=True)
+class FrameHeader:
+    """The fields of a Layer III frame header needed to walk and copy frames."""
+
+    raw: bytes
+    version: float  # 1, 2 or 2.5
+    bitrate: int  # bit/s
+    sample_rate: int
+    padding: bool
+    protected: bool  # a 16-bit CRC follows the header
+    mono: bool
+
+    @property
+    def samples(self) -> int:
+        """Samples per channel in one frame."""
+        return 1152 if self.version == 1 else 576
+
+    @cached_property
+    def length(self) -> int:
+        """Frame length in bytes, header included."""
+        return self.samples // 8 * self.bitrate // self.sample_rate + self.padding
+
+    @property
+    def side_info_length(self) -> int:
+        if self.version == 1:
+            return 17 if self.mono else 32
+        return 9 if self.mono else 17
+
+    @cached_property
+    def duration(self) -> float:
+        """Seconds of audio in one frame."""
+        return self.samples / self.sample_rate
+
+
+def parse_header(data: Buffer, offset: int) -> Optional[FrameHeader]:
+    """Decodes the Layer III frame header at offset, or returns None if there isn't one."""
+    if offset + 4 > len(data) or data[offset] != 0xFF:
+        return None
+    return _decode_header(struct.unpack_from(">I", data, offset)[0])
+
+
+@lru_cache(maxsize=256)
+def _decode_header(word: int) -> Optional[FrameHeader]:
+    """
+    Decodes a 32-bit header word.
+
+    A file only uses a handful of distinct headers (one per bitrate, with
+    and without padding), so decoded headers are cached by their word.
+    """
+    b0, b1, b2, b3 = word.to_bytes(4, "big")
+    if b0 != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+
+    version = {0b11: 1, 0b10: 2, 0b00: 2.5}.get((b1 >> 3) & 0b11)
+    layer = (b1 >> 1) & 0b11
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0b11
+    if version is None or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # Not Layer III, or a free-format/reserved value
+
+    return FrameHeader(
+        raw=word.to_bytes(4, "big"),
+        version=version,
+        bitrate=BITRATES[1 if version == 1 else 2][bitrate_index] * 1000,
+        sample_rate=SAMPLE_RATES[version][rate_index],
+        padding=bool(b2 & 0b10),
+        protected=not b1 & 0b1,
+        mono=b3 >> 6 == 0b11
+    )
+
+
+def id3v2_length(data: Buffer) -> int:
+    """Length of the ID3v2 tag at the start of data (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]  # Synchsafe
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_frames(data: Buffer) -> Iterator[Tuple[int, FrameHeader]]:
+    """
+    Yields (offset, header) for each frame of an MP3 file.
+
+    Leading tags are skipped, and so is junk between frames (resyncing on
+    the next header that is followed by another header or the end of the data).
+    """
+    data = memoryview(data)
+    offset = id3v2_length(data)
+    end = len(data) - 128 if data[-128:-125] == b"TAG" else len(data)  # ID3v1
+
+    header = parse_header(data, offset)
+    while offset + 4 <= end:
+        if header is not None:
+            following = offset + header.length
+            # Parsed once: the check for this frame is the next frame's header
+            next_header = parse_header(data, following) if following < end else None
+            if following == end or next_header is not None:
+                yield offset, header
+                offset, header = following, next_header
+                continue
+        offset += 1
+        header = parse_header(data, offset)
+
+
+def is_info_frame(data: Buffer, offset: int, header: FrameHeader) -> bool:
+    """True for a Xing/Info/VBRI metadata frame, which holds no audio."""
+    start = offset + 4 + (2 if header.protected else 0) + header.side_info_length
+    tag = bytes(data[start:start + 4])
+    return tag in (b"Xing", b"Info") or data[offset + 36:offset + 40] == b"VBRI"
+
+
+def audio_frames(data: Buffer) -> List[bytes]:
+    """The audio frames of an MP3 file, without tags or Xing/Info frames."""
+    data = memoryview(data)
+    return [
+        bytes(data[offset:offset + header.length])
+        for offset, header in iter_frames(data)
+        if not is_info_frame(data, offset, header)
+    ]
+
+
+def silent_frame(header: FrameHeader) -> bytes:
+    """One frame of silence with the same format as header, without padding or CRC."""
+    b1 = header.raw[1] | 0b1  # No CRC
+    b2 = header.raw[2] & ~0b10  # No padding
+    raw = bytes((header.raw[0], b1, b2, header.raw[3]))
+    silent = FrameHeader(raw, header.version, header.bitrate, header.sample_rate, False, False, header.mono)
+    return raw + bytes(silent.length - 4)
+
+
+def concat(clips: Sequence[bytes], pauses: Sequence[float] = ()) -> bytes:
+    """
+    Joins MP3 clips into one MP3 stream.
+
+    Args:
+        clips: MP3 files rendered with the same format (sample rate, channels)
+        pauses: Seconds of silence after each clip but the last
+            (missing entries mean no pause)
+
+    Returns:
+        bytes: The frames of every clip, in order, with silence between them
+
+    Raises:
+        ValueError: If a clip has no MP3 frames
+    """
+    out = bytearray()
+
+    for index, clip in enumerate(clips):
+        frames = audio_frames(clip)
+        if not frames:
+            raise ValueError(f"clip {index} contains no MP3 frames")
+        out += b"".join(frames)
+
+        pause = pauses[index] if index < len(pauses) and index < len(clips) - 1 else 0.0
+        if pause > 0:
+            header = parse_header(frames[-1], 0)
+            out += silent_frame(header) * round(pause / header.duration)
+
+    return bytes(out)
+
+
+@dataclass
+class FrameIndex:
+    """
+    What scanning an MP3 file's frame headers tells us about it.
+
+    seek_table holds (seconds, byte offset) pairs about seek_interval apart,
+    each at the start of a frame, so a player (or a Range request) can jump
+    to a time without reading what comes before it.
+    """
+
+    frames: int = 0
+    duration: float = 0.0
+    audio_bytes: int = 0
+    seek_table: List[Tuple[float, int]] = field(default_factory=list)
+
+    @property
+    def bitrate(self) -> int:
+        """Average bit/s over the audio frames (0 for an empty file)."""
+        return round(self.audio_bytes * 8 / self.duration) if self.duration else 0
+
+    def offset_at(self, seconds: float) -> int:
+        """Byte offset of the last seek point at or before seconds."""
+        if not self.seek_table:
+            return 0
+        times = [point[0] for point in self.seek_table]
+        return self.seek_table[max(0, bisect_right(times, seconds) - 1)][1]
+
+
+def index(data: Buffer, seek_interval: float = 1.0) -> FrameIndex:
+    """
+    Scans an MP3 file's frame headers without decoding or copying it.
+
+    The duration counts the samples in every audio frame, so it is exact
+    up to the encoder's delay and padding (a few milliseconds).
+
+    Args:
+        data: The MP3 file (bytes, or a memoryview of e.g. an mmap)
+        seek_interval: Seconds between entries in the seek table
+
+    Returns:
+        FrameIndex: Frame count, duration, size and seek table
+    """
+    data = memoryview(data)
+    result = FrameIndex()
+    next_point = 0.0
+
+    for offset, header in iter_frames(data):
+        if result.frames == 0 and is_info_frame(data, offset, header):
+            continue  # The Xing/Info frame holds no audio
+
+        if result.duration >= next_point:
+            result.seek_table.append((round(result.duration, 3), offset))
+            next_point += seek_interval
+
+        result.frames += 1
+        result.audio_bytes += header.length
+        result.duration += header.duration
+
+    return result
+
+
+def duration(data: Buffer) -> float:
+    """Exact duration of an MP3 file in seconds (0.0 if it has no frames)."""
+    return index(data, seek_interval=float("inf")).duration
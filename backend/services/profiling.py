@@ -0,0 +1,347 @@
+"""
+Profiling - Where a request spends CPU time on our side, in production
+
+Traces show how long each stage took, but not what the event loop was
+doing in our own code: validating pydantic models, formatting prompts,
+parsing LLM output as JSON, base64-encoding audio. A sample of requests
+(PROFILE_SAMPLE_RATE, or any request with X-Profile: <ADMIN_TOKEN>) is
+profiled here:
+
+- A sampling profiler: while a profiled request is in flight, a background
+  thread reads the event loop thread's Python stack every
+  PROFILE_INTERVAL_SECONDS. A sample is counted for a request only if the
+  loop is running one of its tasks at that moment (its own task, or any
+  task started from it, found through a task factory), so concurrent
+  unprofiled requests don't leak into its profile. Nothing is hooked into
+  function calls, so the request itself runs at full speed.
+- Allocations with tracemalloc, switched on only while a profiled request
+  is in flight: the peak traced memory during the request, and which lines
+  allocated the memory still held when it finished.
+
+Samples are folded per endpoint ("frame;frame;frame count" lines), the
+format flamegraph.pl, inferno and speedscope read directly, and served
+by the admin routes under /api/v1/admin/profiles.
+"""
+
+import asyncio
+import random
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from backend.config import settings
+
+
+# Frames below this one are the event loop's own plumbing, the same in every sample
+_LOOP_FRAME = "asyncio.events.Handle._run"
+
+# Stacks beyond PROFILE_MAX_STACKS per endpoint are counted under this name
+OTHER_STACKS = "[other]"
+
+
+@dataclass
+class RequestProfile:
+    """Samples and allocations of one profiled request."""
+
+    stacks: Counter = field(default_factory=Counter)
+    peak_bytes: int = 0
+    allocations: Counter = field(default_factory=Counter)  # "file:line" -> bytes
+
+
+@dataclass
+class EndpointProfile:
+    """Everything profiled for one endpoint, merged."""
+
+    requests: int = 0
+    samples: int = 0
+    stacks: Counter = field(default_factory=Counter)
+    peak_bytes: int = 0
+    allocations: Counter = field(default_factory=Counter)
+
+    def folded(self) -> str:
+        """The samples as folded stacks, heaviest first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("oriki_current_profile", default=None)
+
+
+def fold_stack(frame: Optional[FrameType]) -> str:
+    """A stack as "module.function;...", outermost first, without the event loop's frames."""
+    names: List[str] = []
+    while frame is not None:
+        name = f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+        if name == _LOOP_FRAME:
+            break
+        names.append(name)
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Profiles selected requests on the event loop, merging results per endpoint.
+
+    Usage:
+        with profiler.profile() as finish:
+            await handle_request()
+            finish("POST /api/v1/generate")
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        max_stacks: int = 2000,
+        trace_allocations: bool = True,
+        allocation_frames: int = 1,
+        top_allocations: int = 20
+    ):
+        """
+        Args:
+            interval: Seconds between stack samples
+            max_stacks: Distinct stacks kept per endpoint (the rest are
+                merged into OTHER_STACKS, so memory stays bounded)
+            trace_allocations: Record allocations with tracemalloc
+            allocation_frames: Frames tracemalloc keeps per allocation
+            top_allocations: Allocation sites kept per request
+        """
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.trace_allocations = trace_allocations
+        self.allocation_frames = allocation_frames
+        self.top_allocations = top_allocations
+
+        self.endpoints: Dict[str, EndpointProfile] = {}
+
+        # Task -> profile of the request it belongs to (read by the sampler thread)
+        self._tasks: Dict[asyncio.Task, RequestProfile] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._started_tracemalloc = False
+
+    # ------------------------------------------------------------------
+    # Selecting tasks
+    # ------------------------------------------------------------------
+
+    def _install(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Wraps the loop's task factory, so tasks started by a profiled request count for it."""
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        previous = loop.get_task_factory()
+
+        def factory(loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any) -> asyncio.Task:
+            task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+            profile = _current_profile.get()
+            if profile is not None:
+                self._track(task, profile)
+            return task
+
+        loop.set_task_factory(factory)
+
+    def _track(self, task: asyncio.Task, profile: RequestProfile) -> None:
+        self._tasks[task] = profile
+        task.add_done_callback(lambda task: self._tasks.pop(task, None))
+
+    @contextmanager
+    def profile(self) -> Iterator[Any]:
+        """
+        Profiles the current task, and every task it starts, for the block.
+
+        Yields a finish(endpoint) function: call it once the endpoint is known
+        (e.g. after routing); a block that doesn't call it is discarded.
+        """
+        self._install(asyncio.get_running_loop())
+        profile = RequestProfile()
+        endpoint: List[str] = []
+
+        task = asyncio.current_task()
+        self._tasks[task] = profile
+        token = _current_profile.set(profile)
+        self._begin()
+        try:
+            yield endpoint.append
+        finally:
+            _current_profile.reset(token)
+            self._tasks.pop(task, None)
+            self._end(profile)
+            if endpoint:
+                self._merge(endpoint[-1], profile)
+
+    def _begin(self) -> None:
+        self._active += 1
+        if self.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.allocation_frames)
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample_loop, name="oriki-profiler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def _end(self, profile: RequestProfile) -> None:
+        self._active -= 1
+        if self.trace_allocations and tracemalloc.is_tracing():
+            # Concurrent profiled requests share the process-wide counters
+            profile.peak_bytes = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+            for stat in snapshot.statistics("lineno")[:self.top_allocations]:
+                frame = stat.traceback[0]
+                profile.allocations[f"{frame.filename}:{frame.lineno}"] += stat.size
+
+            if self._active == 0 and self._started_tracemalloc:
+                tracemalloc.stop()  # Also frees the traces
+                self._started_tracemalloc = False
+
+        if self._active == 0:
+            self._wake.clear()
+
+    def _merge(self, endpoint: str, profile: RequestProfile) -> None:
+        with self._lock:
+            merged = self.endpoints.setdefault(endpoint, EndpointProfile())
+            merged.requests += 1
+            merged.peak_bytes = max(merged.peak_bytes, profile.peak_bytes)
+            merged.allocations.update(profile.allocations)
+            for stack, count in profile.stacks.items():
+                merged.samples += count
+                if stack in merged.stacks or len(merged.stacks) < self.max_stacks:
+                    merged.stacks[stack] += count
+                else:
+                    merged.stacks[OTHER_STACKS] += count
+
+    # ------------------------------------------------------------------
+    # Sampling (background thread)
+    # ------------------------------------------------------------------
+
+    def _sample_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            self.sample()
+
+    def sample(self) -> bool:
+        """
+        Takes one sample of the event loop thread.
+
+        Returns:
+            True if the loop was running a profiled request's task
+        """
+        loop = self._loop
+        if loop is None:
+            return False
+
+        # Read from another thread: a task switch in between only means the
+        # sample is attributed to the task that was running a moment earlier
+        task = asyncio.tasks._current_tasks.get(loop)
+        profile = self._tasks.get(task) if task is not None else None
+        frame = sys._current_frames().get(self._loop_thread)
+        if profile is None or frame is None:
+            return False
+
+        stack = fold_stack(frame)
+        with self._lock:
+            profile.stacks[stack] += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def folded(self, endpoint: str) -> Optional[str]:
+        """The endpoint's folded stacks, or None if it hasn't been profiled."""
+        with self._lock:
+            merged = self.endpoints.get(endpoint)
+            return merged.folded() if merged else None
+
+    def reset(self) -> None:
+        """Forgets everything profiled so far."""
+        with self._lock:
+            self.endpoints.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per endpoint: requests, sampled CPU seconds, peak memory and top allocation sites."""
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": merged.requests,
+                    "samples": merged.samples,
+                    "cpu_seconds": round(merged.samples * self.interval, 3),
+                    "cpu_seconds_per_request": round(merged.samples * self.interval / merged.requests, 4),
+                    "peak_bytes": merged.peak_bytes,
+                    "top_frames": _self_time(merged.stacks, 10),
+                    "top_allocations": [
+                        {"site": site, "bytes": size}
+                        for site, size in merged.allocations.most_common(10)
+                    ],
+                }
+                for endpoint, merged in self.endpoints.items()
+            }
+
+
+def _self_time(stacks: Counter, limit: int) -> List[Dict[str, Any]]:
+    """Innermost frames with the most samples (where the CPU actually was)."""
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    total = sum(leaves.values()) or 1
+    return [{"frame": frame, "share": round(count / total, 3)} for frame, count in leaves.most_common(limit)]
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling a sample of requests with a SamplingProfiler.
+
+    A request is profiled with probability sample_rate, or when it sends
+    the X-Profile header with the admin token (so outsiders can't switch
+    the profiler on). Results are merged per "METHOD /route/template".
+    """
+
+    def __init__(self, app: Callable, profiler: Optional[SamplingProfiler] = None, sample_rate: Optional[float] = None):
+        self.app = app
+        self.profiler = profiler or globals()["profiler"]
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    def _selected(self, scope: Dict[str, Any]) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile":
+                return bool(settings.ADMIN_TOKEN) and secrets.compare_digest(value, settings.ADMIN_TOKEN.encode())
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with self.profiler.profile() as finish:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    finish(f"{scope['method']} {route}")
+
+
+# Shared by the middleware and the admin routes
+profiler = SamplingProfiler(
+    interval=settings.PROFILE_INTERVAL_SECONDS,
+    max_stacks=settings.PROFILE_MAX_STACKS,
+    trace_allocations=settings.PROFILE_TRACEMALLOC
+)
@@ -0,0 +1,237 @@
+"""
+Letter Similarity Index - Find near-duplicate free-write letters
+
+Exact-key caches miss letters that are almost the same: template letters,
+retries with a word changed, the sample letter pasted with different line
+breaks. This index finds them so their extracted themes can be reused.
+
+Each letter is reduced to a MinHash signature over its character shingles.
+The fraction of positions where two signatures agree estimates the Jaccard
+similarity of the two shingle sets. Signatures are split into bands and
+indexed by (group, band, band values) - locality-sensitive hashing - so a
+lookup only compares against letters that share at least one whole band,
+instead of scanning every stored letter.
+
+Letters are only compared within the same group (e.g. the same quiz
+answers), so a similar letter with different answers never matches.
+"""
+
+import hashlib
+import json
+import random
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Mersenne prime for the MinHash permutations (a * h + b) mod P
+_PRIME = (1 << 61) - 1
+
+# Characters per shingle; 5 is robust to typos but still sensitive to word order
+SHINGLE_SIZE = 5
+
+
+def shingles(letter: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """
+    Splits a letter into overlapping character n-grams.
+
+    Case, punctuation and whitespace differences are ignored.
+    """
+    text = " ".join(re.sub(r"[^\w\s]", " ", letter.lower()).split())
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def load_labelled_pairs(path: str) -> List[Tuple[str, str, bool]]:
+    """Reads held-out letter pairs from JSONL lines of {"a": ..., "b": ..., "duplicate": ...}."""
+    with open(path, encoding="utf-8") as f:
+        return [
+            (pair["a"], pair["b"], bool(pair["duplicate"]))
+            for pair in map(json.loads, filter(str.strip, f))
+        ]
+
+
+def _hash(shingle: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") % _PRIME
+
+
+@dataclass
+class _Entry:
+    group: str
+    signature: Tuple[int, ...]
+    value: str
+    buckets: List[Tuple[str, int, Tuple[int, ...]]]
+
+
+class LetterIndex:
+    """
+    MinHash/LSH index of letters, each stored with a value (e.g. themes JSON).
+
+    Usage:
+        index = LetterIndex(threshold=0.9)
+        index.add(group, letter, themes.model_dump_json())
+        match = index.lookup(group, other_letter)  # (similarity, value) or None
+
+    signature() is pure-Python hashing (tens of milliseconds for a long
+    letter): in async code compute it once in a thread and pass it to
+    lookup() and add() instead of letting each of them compute it again.
+
+    With 64 permutations split into 16 bands of 4 rows, pairs at or above
+    ~0.6 similarity almost always share a band, so thresholds from 0.7 up
+    find practically every near-duplicate.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        num_perm: int = 64,
+        bands: int = 16,
+        max_entries: int = 5000,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+
+        self.lookups = 0
+        self.matches = 0
+        self.last_evaluation: Optional[Dict[str, Any]] = None
+
+    def signature(self, letter: str) -> Tuple[int, ...]:
+        """MinHash signature of a letter's shingles."""
+        hashes = [_hash(shingle) for shingle in shingles(letter)]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms)
+
+    @staticmethod
+    def estimate(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    def similarity(self, letter_a: str, letter_b: str) -> float:
+        """Estimated similarity of two letters (0.0 - 1.0)."""
+        return self.estimate(self.signature(letter_a), self.signature(letter_b))
+
+    def _band_keys(self, group: str, signature: Tuple[int, ...]) -> List[Tuple[str, int, Tuple[int, ...]]]:
+        return [
+            (group, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def add(self, group: str, letter: str, value: str, signature: Optional[Tuple[int, ...]] = None) -> None:
+        """
+        Stores a letter's value, evicting the oldest entry if the index is full.
+
+        Pass the letter's signature() if it is already known, to skip computing it.
+        """
+        if signature is None:
+            signature = self.signature(letter)
+        buckets = self._band_keys(group, signature)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = _Entry(group, signature, value, buckets)
+        for bucket in buckets:
+            self._buckets.setdefault(bucket, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for bucket in entry.buckets:
+            members = self._buckets[bucket]
+            members.discard(entry_id)
+            if not members:
+                del self._buckets[bucket]
+
+    def lookup(
+        self,
+        group: str,
+        letter: str,
+        signature: Optional[Tuple[int, ...]] = None
+    ) -> Optional[Tuple[float, str]]:
+        """
+        Finds the most similar stored letter in the same group.
+
+        Pass the letter's signature() if it is already known, to skip computing it.
+
+        Returns:
+            (similarity, value) if one is at or above the threshold, else None
+        """
+        self.lookups += 1
+        if signature is None:
+            signature = self.signature(letter)
+
+        candidates: Set[int] = set()
+        for bucket in self._band_keys(group, signature):
+            candidates |= self._buckets.get(bucket, set())
+
+        best: Optional[Tuple[float, int]] = None
+        for entry_id in candidates:
+            score = self.estimate(signature, self._entries[entry_id].signature)
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, entry_id)
+
+        if best is None:
+            return None
+
+        # Refresh, so frequently matched letters are evicted last
+        self._entries.move_to_end(best[1])
+        self.matches += 1
+        return best[0], self._entries[best[1]].value
+
+    def evaluate(self, pairs: Iterable[Tuple[str, str, bool]]) -> Dict[str, Any]:
+        """
+        Measures match quality at the current threshold on labelled pairs.
+
+        Args:
+            pairs: (letter_a, letter_b, is_near_duplicate) from a held-out set
+
+        Returns:
+            Dict with false_match_rate (different letters that would match),
+            miss_rate (near-duplicates that wouldn't) and the pair counts.
+            The result is also reported by stats().
+        """
+        false_matches = misses = positives = negatives = 0
+
+        for letter_a, letter_b, is_duplicate in pairs:
+            matched = self.similarity(letter_a, letter_b) >= self.threshold
+            if is_duplicate:
+                positives += 1
+                misses += not matched
+            else:
+                negatives += 1
+                false_matches += matched
+
+        self.last_evaluation = {
+            "threshold": self.threshold,
+            "pairs": positives + negatives,
+            "false_match_rate": round(false_matches / negatives, 3) if negatives else 0.0,
+            "miss_rate": round(misses / positives, 3) if positives else 0.0,
+        }
+        return self.last_evaluation
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns lookup/match counters, the index size and the last evaluation."""
+        return {
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "match_ratio": round(self.matches / self.lookups, 3) if self.lookups else 0.0,
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "evaluation": self.last_evaluation,
+        }
@@ -0,0 +1,116 @@
+"""
+Singleflight - Coalesce identical in-flight requests
+
+Double-clicks, frontend retries and repeated "Generate Audio" clicks send
+identical requests while the first one is still running. Without
+coalescing, each one pays for its own upstream LLM/TTS call.
+
+A SingleFlight group runs one call per key at a time. Every concurrent
+caller with the same key awaits the same task and gets the same result
+(or the same exception). The shared call is only cancelled once every
+caller waiting on it has gone away.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from pydantic import BaseModel
+
+
+T = TypeVar("T")
+
+
+def request_key(namespace: str, request: BaseModel, **extra: Any) -> str:
+    """
+    Builds a canonical hash for a request model.
+
+    Field order and JSON formatting don't affect the key, so two requests
+    with the same content always produce the same hash.
+
+    Args:
+        namespace: Separates keys for different endpoints (e.g. "generate")
+        request: The validated request model
+        **extra: Any other inputs that change the result (e.g. engine="fused")
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    canonical = json.dumps(
+        {"ns": namespace, "request": request.model_dump(mode="json"), "extra": extra},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """One in-flight upstream call and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls that share a key.
+
+    Usage:
+        flight = SingleFlight("generate")
+        result = await flight.do(key, lambda: expensive_call(...))
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0    # callers that joined an existing in-flight call
+        self.misses = 0  # callers that started a new upstream call
+
+        self._calls: Dict[str, _Call] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs fn() unless a call with the same key is already in flight,
+        in which case the existing call's result is awaited instead.
+        """
+        call = self._calls.get(key)
+
+        if call is None:
+            self.misses += 1
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, call))
+        else:
+            self.hits += 1
+
+        call.waiters += 1
+        try:
+            # shield() so one caller being cancelled doesn't cancel the
+            # shared call for everybody else
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Last interested caller is gone - stop the upstream work
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call) -> None:
+        """Removes a finished call so the next request starts a fresh one."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the current number of in-flight calls."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,144 @@
+"""
+Speculative Rendering - Start TTS before the client asks for it
+
+Almost every user clicks "Generate Audio" right after the poem appears, so
+the audio request used to start a second full round of TTS only after the
+text pipeline had finished. With speculation, generation hands each poem
+line (and then each affirmation) to a SpeculativeRenderer as soon as it
+is final. The renderer synthesizes it in the background into the audio
+cache, so by the time /audio asks for the same segments they are cached,
+or still in flight and joined rather than paid for again.
+
+Speculative audio may never be played, so its spend is capped: segments
+are only started while the rolling per-minute budget (in characters, which
+is what TTS is billed by) still covers them. Beyond that, /audio renders
+them on demand as before.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class CallBudget:
+    """Allows at most max_calls units (calls, characters) in any rolling window of window seconds."""
+
+    def __init__(self, max_calls: int, window: float = 3600.0):
+        self.max_calls = max_calls
+        self.window = window
+        self._spent: Deque[float] = deque()
+
+    def remaining(self) -> int:
+        cutoff = time.time() - self.window
+        while self._spent and self._spent[0] <= cutoff:
+            self._spent.popleft()
+        return max(0, self.max_calls - len(self._spent))
+
+    def spend(self, calls: int) -> None:
+        now = time.time()
+        self._spent.extend([now] * calls)
+
+
+class SpeculativeRenderer:
+    """
+    Renders audio segments in the background, within a spend budget.
+
+    Usage:
+        speculative = SpeculativeRenderer(render, is_cached, CallBudget(20_000, window=60))
+        speculative.submit(["The one who walks with purpose,"], "alloy")
+        ...
+        await speculative.stop()   # in the app lifespan
+    """
+
+    def __init__(
+        self,
+        render: Callable[[str, str], Awaitable[Any]],
+        is_cached: Callable[[str, str], bool],
+        budget: CallBudget,
+        enabled: bool = True
+    ):
+        """
+        Args:
+            render: Renders (segment, voice) into the cache
+            is_cached: True if (segment, voice) is already cached
+            budget: Characters that may be rendered speculatively per window
+            enabled: False makes submit() a no-op
+        """
+        self.render = render
+        self.is_cached = is_cached
+        self.budget = budget
+        self.enabled = enabled
+
+        self.started = 0
+        self.already_cached = 0
+        self.over_budget = 0
+        self.failed = 0
+
+        # (segment, voice) -> render task (also keeps the task referenced)
+        self._in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def submit(self, segments: Iterable[str], voice: str) -> int:
+        """
+        Starts rendering every segment that isn't cached or in flight yet.
+
+        Segments the budget can't cover are skipped (not queued): by the
+        time budget frees up, the client has likely asked for them itself.
+
+        Returns:
+            Number of segments started
+        """
+        if not self.enabled:
+            return 0
+
+        started = 0
+        for segment in segments:
+            key = (segment, voice)
+            if key in self._in_flight:
+                continue
+            if self.is_cached(segment, voice):
+                self.already_cached += 1
+                continue
+            if self.budget.remaining() < len(segment):
+                self.over_budget += 1
+                continue
+
+            self.budget.spend(len(segment))
+            task = asyncio.create_task(self._run(segment, voice))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _, key=key: self._in_flight.pop(key, None))
+            started += 1
+
+        self.started += started
+        return started
+
+    async def _run(self, segment: str, voice: str) -> None:
+        try:
+            await self.render(segment, voice)
+        except Exception as e:
+            # Nobody is waiting on this; /audio will retry the segment
+            self.failed += 1
+            logger.warning("Speculative TTS failed: %s", e)
+
+    async def stop(self) -> None:
+        """Cancels the renders still in flight (call from the app lifespan)."""
+        tasks = list(self._in_flight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns how many segments were started, skipped and failed, and the budget left."""
+        return {
+            "enabled": self.enabled,
+            "started": self.started,
+            "already_cached": self.already_cached,
+            "over_budget": self.over_budget,
+            "failed": self.failed,
+            "in_flight": len(self._in_flight),
+            "budget_remaining": self.budget.remaining(),
+        }
@@ -0,0 +1,132 @@
+"""
+Speech Rate Calibration - Learn each voice's words per second from real clips
+
+Before synthesis, the only way to tell the frontend how long a clip will
+be is to guess from the word count. The guess used a fixed 2.5 words per
+second, but every TTS voice speaks at its own pace. Each freshly rendered
+clip is measured exactly (by counting its MP3 frames), and the voice's
+rate is updated as a running average weighted by words, so long clips
+count for more than one-word ones.
+
+Rates are saved to a small JSON file on shutdown and loaded on startup,
+so the estimates keep improving across restarts.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+
+# Speaking pace used until a voice has enough measured words
+DEFAULT_WORDS_PER_SECOND = 2.5
+
+# Clips shorter than this are mostly leading/trailing silence, not speech
+MIN_OBSERVED_SECONDS = 0.5
+
+
+class SpeechRateCalibration:
+    """
+    Per-voice words-per-second, learned from measured clips.
+
+    Usage:
+        calibration.observe("nova", words=12, seconds=4.6)
+        seconds = words / calibration.words_per_second("nova")
+    """
+
+    def __init__(
+        self,
+        default: float = DEFAULT_WORDS_PER_SECOND,
+        min_words: int = 50,
+        max_words: int = 5000
+    ):
+        """
+        Args:
+            default: Words per second for voices without enough data
+            min_words: Measured words needed before a voice's rate is used
+            max_words: Words the average remembers; older clips fade out
+                beyond this, so a provider-side change in pacing is picked up
+        """
+        self.default = default
+        self.min_words = min_words
+        self.max_words = max_words
+
+        # voice -> [words, seconds] seen so far (decayed past max_words)
+        self._totals: Dict[str, List[float]] = {}
+        self._dirty = False
+
+    def observe(self, voice: str, words: int, seconds: float) -> None:
+        """Adds a measured clip to the voice's average."""
+        if words <= 0 or seconds < MIN_OBSERVED_SECONDS:
+            return
+
+        totals = self._totals.setdefault(voice, [0.0, 0.0])
+        totals[0] += words
+        totals[1] += seconds
+        if totals[0] > self.max_words:
+            scale = self.max_words / totals[0]
+            totals[0] *= scale
+            totals[1] *= scale
+        self._dirty = True
+
+    def words_per_second(self, voice: Optional[str]) -> float:
+        """The voice's measured rate, or the default until it has min_words."""
+        totals = self._totals.get(voice) if voice else None
+        if totals is None or totals[0] < self.min_words:
+            return self.default
+        return totals[0] / totals[1]
+
+    async def save(self, path: str) -> bool:
+        """
+        Writes the rates to a JSON file (atomically), if anything changed.
+
+        Returns:
+            True if the file was written
+        """
+        if not self._dirty:
+            return False
+
+        data = {voice: {"words": w, "seconds": s} for voice, (w, s) in self._totals.items()}
+
+        def write() -> None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+
+        await asyncio.to_thread(write)
+        self._dirty = False
+        return True
+
+    async def load(self, path: str) -> int:
+        """
+        Loads rates saved by save(). A missing or unreadable file is ignored.
+
+        Returns:
+            Number of voices loaded
+        """
+        def read() -> Optional[Dict[str, Any]]:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return None
+
+        data = await asyncio.to_thread(read)
+        if not isinstance(data, dict):
+            return 0
+
+        for voice, totals in data.items():
+            try:
+                self._totals[voice] = [float(totals["words"]), float(totals["seconds"])]
+            except (KeyError, TypeError, ValueError):
+                continue
+        return len(self._totals)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns each voice's current rate and how many words it is based on."""
+        return {
+            voice: {"words_per_second": round(self.words_per_second(voice), 3), "words": round(words)}
+            for voice, (words, _) in self._totals.items()
+        }
@@ -0,0 +1,365 @@
+"""
+Tracing - Spans for every stage and upstream call of a request
+
+Metrics say that /generate is slow on average; a trace says why one
+particular request took 40 seconds. Each request opens a root span, and
+everything it does opens child spans: pipeline stages, each agent's LangChain
+run with its prompt, LLM call and output parser, TTS calls. Spans carry
+attributes such as the model, token counts, cultural mode and letter length.
+
+- Spans are opened with `with tracer.span("extract", model=...):`. The
+  current span lives in a ContextVar, so concurrent stages (and the tasks
+  they start) nest under the right parent without passing anything around.
+- LangChain runs are traced by a callback handler that LangChain adds to
+  every run through a configure hook. Runs outside a traced request (e.g.
+  benchmark scripts) are ignored.
+- Finished traces are kept in memory (the slowest recent ones are shown by
+  the admin waterfall at /api/v1/admin/traces), and optionally exported:
+  one JSON line per span to a local file, or OTLP/HTTP JSON to any
+  OpenTelemetry collector (Jaeger, Tempo, Honeycomb...).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from uuid import UUID
+
+import httpx
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from backend.config import settings
+from backend.services.metrics import _cached_tokens, _token_usage
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end (so far, if still open)."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set(self, **attributes: Any) -> None:
+        """Adds attributes (None values are skipped)."""
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+
+@dataclass
+class Trace:
+    """A finished request: its root span and every span under it."""
+
+    spans: List[Span]
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration
+
+
+# The span code is currently running in (None outside any request)
+_current_span: ContextVar[Optional[Span]] = ContextVar("oriki_current_span", default=None)
+
+
+class Tracer:
+    """
+    Records spans, assembles them into traces and exports finished traces.
+
+    Usage:
+        with tracer.span("POST /generate", cultural_mode=mode) as span:
+            ...
+            span.set(cache="hit")
+    """
+
+    def __init__(self, max_traces: int = 200, enabled: bool = True):
+        self.enabled = enabled
+        self.exporters: List[Any] = []
+        self.recent: Deque[Trace] = deque(maxlen=max_traces)
+
+        # trace_id -> spans finished so far, until the root span ends
+        self._open: Dict[str, List[Span]] = {}
+
+    def start(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        """Opens a span under parent (or the current span; a new trace if neither)."""
+        parent = parent or _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None
+        )
+        span.set(**attributes)
+        if parent is None:
+            self._open[span.trace_id] = []
+        return span
+
+    def end(self, span: Span, error: Optional[BaseException] = None) -> None:
+        """Closes a span; closing a root span completes and exports its trace."""
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+        spans = self._open.get(span.trace_id)
+        if spans is None:
+            return  # Outlived its trace (e.g. a background task the request started)
+        if span.parent_id is not None:
+            spans.append(span)
+            return
+
+        # Root first, then children in start order
+        del self._open[span.trace_id]
+        trace = Trace([span] + sorted(spans, key=lambda s: s.start_ns))
+        self.recent.append(trace)
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Runs the block in a new span, the current span for anything it calls."""
+        if not self.enabled:
+            yield Span(name, "", "", None)  # Attributes set on it go nowhere
+            return
+
+        span = self.start(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, e)
+            raise
+        else:
+            self.end(span)
+        finally:
+            _current_span.reset(token)
+
+    def annotate(self, **attributes: Any) -> None:
+        """Adds attributes to the current span, if there is one."""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attributes)
+
+    def slowest(self, min_seconds: float = 0.0, limit: int = 20) -> List[Trace]:
+        """The slowest recent traces that took at least min_seconds."""
+        traces = [trace for trace in self.recent if trace.duration >= min_seconds]
+        return sorted(traces, key=lambda trace: trace.duration, reverse=True)[:limit]
+
+
+# ============================================================================
+# LangChain runs
+# ============================================================================
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain runs into spans: the agent's chain, its prompt, the LLM
+    call (with model and tokens) and the output parser.
+    """
+
+    # Called directly on the event loop instead of in a worker thread
+    run_inline = True
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans: Dict[UUID, Span] = {}
+
+    def _start(self, name: str, run_id: UUID, parent_run_id: Optional[UUID], **attributes: Any) -> None:
+        parent = self._spans.get(parent_run_id) if parent_run_id else _current_span.get()
+        if parent is None:
+            return  # Not inside a traced request
+        self._spans[run_id] = self.tracer.start(name, parent=parent, **attributes)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.set(**attributes)
+            self.tracer.end(span, error)
+
+    def on_chain_start(self, serialized: Optional[Dict[str, Any]], inputs: Any, *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        self._start(name, run_id, parent_run_id)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized: Optional[Dict[str, Any]], messages: Any, *, run_id: UUID,
+                            parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name")
+        self._start(f"llm {model or ''}".strip(), run_id, parent_run_id, model=model,
+                    temperature=params.get("temperature"))
+
+    def on_llm_start(self, serialized: Optional[Dict[str, Any]], prompts: List[str], *, run_id: UUID,
+                     parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, parent_run_id=parent_run_id, **kwargs)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.get(run_id)
+        if span is not None and "first_token_seconds" not in span.attributes:
+            span.set(first_token_seconds=round(span.duration, 3))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt, completion = _token_usage(response)
+        self._end(run_id, prompt_tokens=prompt or None, completion_tokens=completion or None,
+                  cached_tokens=_cached_tokens(response) if prompt else None)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+
+# ============================================================================
+# Upstream HTTP calls
+# ============================================================================
+
+async def _on_upstream_request(request: httpx.Request) -> None:
+    if _current_span.get() is None:
+        return  # Not inside a traced request
+    request.extensions["trace_span"] = tracer.start(
+        f"{request.method} {request.url.host}{request.url.path}",
+        retry=request.headers.get("x-stainless-retry-count")
+    )
+
+
+async def _on_upstream_response(response: httpx.Response) -> None:
+    span = response.request.extensions.get("trace_span")
+    if span is not None:
+        # Ends when the headers arrive; a streamed body is covered by the LLM span
+        span.set(status=response.status_code)
+        tracer.end(span)
+
+
+# For httpx.AsyncClient(event_hooks=...): one span per upstream request
+UPSTREAM_EVENT_HOOKS = {"request": [_on_upstream_request], "response": [_on_upstream_response]}
+
+
+# ============================================================================
+# Exporters
+# ============================================================================
+
+class JsonlExporter:
+    """
+    Appends each finished trace to a file, one JSON object per span.
+
+    A trace is a few kilobytes, written in one append, so this is cheap
+    enough to do inline; rotate the file with logrotate (copytruncate).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, trace: Trace) -> None:
+        lines = "".join(json.dumps({**asdict(span), "duration": span.duration}, default=str) + "\n" for span in trace.spans)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class OtlpExporter:
+    """
+    Sends each finished trace to an OpenTelemetry collector (OTLP/HTTP, JSON).
+
+    endpoint is the collector's traces URL, e.g. http://localhost:4318/v1/traces.
+    Sending happens in a background task, so the request never waits on it.
+    """
+
+    def __init__(self, endpoint: str, client: Any, service_name: str = "oriki-api"):
+        self.endpoint = endpoint
+        self.client = client
+        self.service_name = service_name
+        self._tasks: set = set()
+
+    def export(self, trace: Trace) -> None:
+        # In an empty context, so the export's own HTTP call isn't traced
+        task = asyncio.get_running_loop().create_task(self._send(trace), context=Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, trace: Trace) -> None:
+        try:
+            response = await self.client.post(self.endpoint, json=self.payload(trace), timeout=5.0)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning("OTLP export to %s failed: %s", self.endpoint, e)
+
+    def payload(self, trace: Trace) -> Dict[str, Any]:
+        """The trace as an OTLP ExportTraceServiceRequest (JSON encoding)."""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "oriki"},
+                    "spans": [_otlp_span(span) for span in trace.spans],
+                }],
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    data = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+        # STATUS_CODE_ERROR / STATUS_CODE_OK
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+# Shared by every module that opens spans; exporters are set up by the app lifespan
+tracer = Tracer(max_traces=settings.TRACE_MAX_RECENT, enabled=settings.TRACING_ENABLED)
+
+# LangChain adds this handler to every run (while tracing is enabled)
+_langchain_handler: ContextVar[Optional[TracingCallbackHandler]] = ContextVar(
+    "oriki_tracing_handler",
+    default=TracingCallbackHandler(tracer) if settings.TRACING_ENABLED else None
+)
+register_configure_hook(_langchain_handler, inheritable=True)
@@ -0,0 +1 @@
+# Benchmarks package - scripts comparing latency and token usage of pipeline variants
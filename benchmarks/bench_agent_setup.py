@@ -0,0 +1,85 @@
+"""
+Benchmark: per-request agent setup, before and after the agent registry.
+
+Before the registry, every /generate built a new ChatOpenAI (and with it a
+new HTTP client and connection pool) for the theme and affirmation agents,
+and re-rendered the poem prompt and its format instructions. This times that
+setup against fetching the same objects from the registry.
+
+With --live it also times the first API round trip on a cold client against
+one that was warmed up first (needs a real OPENAI_API_KEY; the warm-up call
+lists models, the timed call is the same request).
+
+Usage (from the project root):
+    python -m benchmarks.bench_agent_setup
+    python -m benchmarks.bench_agent_setup --live
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.agents.affirmation_generator import create_affirmation_generator
+from backend.agents.poetry_composer import PROMPT_BUILDERS
+from backend.agents.registry import registry
+from backend.agents.theme_extractor import create_theme_extractor
+from backend.config import settings
+
+
+def per_request_setup(runs: int) -> None:
+    """What one staged request used to build vs. what it looks up now."""
+    def rebuild():
+        create_theme_extractor()
+        PROMPT_BUILDERS["yoruba"]()
+        create_affirmation_generator()
+
+    def lookup():
+        registry.get("extract")
+        registry.get("compose-prompt:yoruba")
+        registry.get("affirm")
+
+    registry.build()
+
+    for name, setup in (("rebuilt per request", rebuild), ("agent registry", lookup)):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            setup()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"{name:>20}: median {statistics.median(timings):.3f} ms  max {timings[-1]:.3f} ms")
+
+
+async def first_call_latency() -> None:
+    """First request on a cold client vs. on a client warmed up beforehand."""
+    from openai import AsyncOpenAI
+
+    async def timed(client: AsyncOpenAI) -> float:
+        started = time.perf_counter()
+        await client.models.list()
+        return (time.perf_counter() - started) * 1000
+
+    cold = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    cold_ms = await timed(cold)
+
+    warm = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    await warm.models.list()  # what AgentRegistry.warm_up() does at startup
+    warm_ms = await timed(warm)
+
+    print(f"\nFirst API call: cold client {cold_ms:.0f} ms, warmed-up client {warm_ms:.0f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--live", action="store_true", help="also time cold vs warm connections (needs an API key)")
+    args = parser.parse_args()
+
+    per_request_setup(args.runs)
+    if args.live:
+        asyncio.run(first_call_latency())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: staged (three-call) vs fused (single-call) generation.
+
+Compares end-to-end latency and token usage of the two engines behind
+/api/v1/generate for the same quiz submission.
+
+The same quiz is sent on every run, so cold runs switch off the stage memos
+and near-duplicate letter reuse - otherwise the staged engine would only
+call the LLM on the first run. Warm runs (staged only; the fused engine
+reuses nothing) are reported separately, after one run that fills the memos.
+
+Usage (from the project root):
+    # Prompt size only - no API calls, no key needed beyond a placeholder
+    python -m benchmarks.bench_generation_engines --dry-run
+
+    # Live comparison against the OpenAI API (costs real tokens)
+    python -m benchmarks.bench_generation_engines --runs 5 --mode secular
+"""
+
+import argparse
+import asyncio
+import time
+from contextlib import nullcontext
+
+from backend.api.routes import map_cultural_mode, run_fused_stage, run_staged_pipeline
+from backend.agents.theme_extractor import THEME_EXTRACTION_PROMPT, _build_input_data
+from backend.agents.affirmation_generator import AFFIRMATION_PROMPT
+from backend.agents.poetry_composer import _select_prompt, _build_input_vars
+from backend.agents.fused_generator import FUSED_PROMPT, build_fused_input
+from backend.models.theme import ThemeData
+
+from benchmarks.common import collect_token_usage, count_tokens, sample_submission, summarize, without_reuse
+
+
+# Stand-in themes so the staged prompts can be rendered without an API call
+EXAMPLE_THEMES = ThemeData(**ThemeData.model_config["json_schema_extra"]["example"])
+
+
+def prompt_sizes(cultural_mode: str) -> None:
+    """Prints prompt token counts for both engines."""
+    quiz = sample_submission(cultural_mode)
+    mode = map_cultural_mode(cultural_mode)
+
+    theme_text = THEME_EXTRACTION_PROMPT.format(**_build_input_data(quiz))
+
+    poem_prompt, _ = _select_prompt(mode)
+    poem_text = poem_prompt.format(**_build_input_vars(
+        EXAMPLE_THEMES, quiz.free_write_letter, quiz.pronouns, quiz.display_name
+    ))
+
+    affirm_text = AFFIRMATION_PROMPT.format(
+        **{field: ", ".join(value) if isinstance(value, list) else value
+           for field, value in EXAMPLE_THEMES.model_dump().items()}
+    )
+
+    fused_text = FUSED_PROMPT.format(**build_fused_input(quiz, mode))
+
+    staged = [count_tokens(text) for text in (theme_text, poem_text, affirm_text)]
+    fused = count_tokens(fused_text)
+
+    print(f"Prompt tokens ({cultural_mode})")
+    print(f"  staged: extract {staged[0]} + compose {staged[1]} + affirm {staged[2]} = {sum(staged)}")
+    print(f"  fused:  {fused}  ({(fused - sum(staged)) / sum(staged):+.0%} vs staged)")
+
+
+async def run_staged(quiz) -> None:
+    await run_staged_pipeline(quiz)
+
+
+async def run_fused(quiz) -> None:
+    await run_fused_stage(quiz)
+
+
+async def measure(name: str, engine, quiz, runs: int, cold: bool = True) -> None:
+    """Runs an engine and prints its latency and per-request token usage."""
+    latencies = []
+    with collect_token_usage() as usage, (without_reuse() if cold else nullcontext()):
+        for _ in range(runs):
+            start = time.perf_counter()
+            await engine(quiz)
+            latencies.append(time.perf_counter() - start)
+
+    print(f"{name:>13}: {summarize(latencies)}  "
+          f"| per request: {usage['llm_calls'] / runs:.1f} calls, "
+          f"{usage['prompt_tokens'] / runs:.0f} prompt + "
+          f"{usage['completion_tokens'] / runs:.0f} completion tokens")
+
+
+async def live(runs: int, cultural_mode: str) -> None:
+    """Runs both engines against the API and prints latency and token usage."""
+    quiz = sample_submission(cultural_mode)
+
+    await measure("staged (cold)", run_staged, quiz, runs)
+    await measure("fused (cold)", run_fused, quiz, runs)
+
+    # Fill the memos once, then measure what a repeated submission costs
+    await run_staged(quiz)
+    await measure("staged (warm)", run_staged, quiz, runs, cold=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Requests per engine")
+    parser.add_argument("--mode", default="yoruba_inspired",
+                        choices=["yoruba_inspired", "secular", "turkish", "biblical"])
+    parser.add_argument("--dry-run", action="store_true", help="Only compare prompt sizes")
+    args = parser.parse_args()
+
+    prompt_sizes(args.mode)
+    if not args.dry_run:
+        asyncio.run(live(args.runs, args.mode))
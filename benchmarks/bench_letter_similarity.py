@@ -0,0 +1,132 @@
+"""
+Benchmark: near-duplicate letter detection.
+
+Builds a held-out set of labelled letter pairs and reports, for a range of
+thresholds, how often LetterIndex would reuse themes for a letter that is
+NOT a near-copy (false matches) and how often it would miss a real one.
+Also times lookups as the index grows, to show they stay sublinear.
+
+Near-copies are the sample letter and a few others with the edits we see in
+traffic: re-wrapped lines, a fixed typo, a changed word, an added sign-off.
+Hard negatives reuse the same template opening and closing around a
+different personal paragraph - the case where reusing themes would be wrong.
+
+Usage (from the project root):
+    python -m benchmarks.bench_letter_similarity
+
+    # Save the held-out pairs for SIMILAR_LETTER_HOLDOUT_PATH
+    python -m benchmarks.bench_letter_similarity --write holdout_pairs.jsonl
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import List, Tuple
+
+from backend.services.similarity import LetterIndex
+
+from benchmarks.common import SAMPLE_QUIZ
+
+
+OPENING = "Dear future self,\n\nI hope you remember how far you've come."
+CLOSING = "With love and hope,\nYour present self"
+
+# Personal middle paragraphs - each one is a different person's letter
+PARAGRAPHS = [
+    SAMPLE_QUIZ["free_write_letter"],
+    "Right now I am learning to rest without guilt. The garden taught me that "
+    "growth happens in seasons, and that the quiet months matter as much as the harvest.",
+    "I started the business this year even though everyone said to wait. I want you "
+    "to remember the fear and the courage, and to keep choosing the brave thing.",
+    "Moving across the world was the hardest thing I have done. I miss my mother's "
+    "kitchen, but I am building a home of my own, one friendship at a time.",
+    "After the diagnosis I had to relearn what strength means. It is not pushing "
+    "through; it is asking for help and letting people carry me for a while.",
+    "I am finally writing again. Every morning, one page. The words are clumsy but "
+    "they are mine, and I promise to keep showing up for them.",
+]
+
+
+def letter(paragraph: str) -> str:
+    return f"{OPENING}\n\n{paragraph}\n\n{CLOSING}"
+
+
+def near_copies(text: str, rng: random.Random) -> List[str]:
+    """Edits that shouldn't change the extracted themes."""
+    words = text.split()
+    changed = list(words)
+    changed[rng.randrange(len(changed))] = "truly"
+
+    return [
+        "\n".join(line.strip() for line in text.splitlines()),       # re-wrapped
+        text.replace("you", "yuo", 1),                                # typo
+        " ".join(changed),                                            # one word changed
+        text + "\nP.S. Drink more water.",                            # added line
+        text.upper(),                                                 # shouting
+    ]
+
+
+def held_out_pairs(seed: int = 7) -> List[Tuple[str, str, bool]]:
+    """(letter_a, letter_b, is_near_duplicate) pairs."""
+    rng = random.Random(seed)
+    letters = [letter(paragraph) for paragraph in PARAGRAPHS]
+    pairs = []
+
+    for text in letters:
+        pairs.extend((text, copy, True) for copy in near_copies(text, rng))
+
+    # Same template, different person: must not match
+    for i, a in enumerate(letters):
+        for b in letters[i + 1:]:
+            pairs.append((a, b, False))
+
+    return pairs
+
+
+def threshold_sweep(pairs: List[Tuple[str, str, bool]]) -> None:
+    print(f"Held-out set: {sum(p[2] for p in pairs)} near-copies, {sum(not p[2] for p in pairs)} different letters")
+    print(f"{'threshold':>10} {'false match':>12} {'miss':>8}")
+    for threshold in (0.5, 0.6, 0.7, 0.8, 0.9, 0.95):
+        result = LetterIndex(threshold=threshold).evaluate(pairs)
+        print(f"{threshold:>10} {result['false_match_rate']:>12.1%} {result['miss_rate']:>8.1%}")
+
+
+def lookup_scaling(sizes=(100, 1000, 5000)) -> None:
+    """Lookup time stays flat as the index grows, unlike a linear scan."""
+    rng = random.Random(1)
+    vocabulary = " ".join(PARAGRAPHS).split()
+
+    print("\nLookup time vs index size (same answers group, random letters)")
+    for size in sizes:
+        index = LetterIndex(threshold=0.9, max_entries=size)
+        for i in range(size):
+            index.add("group", " ".join(rng.choices(vocabulary, k=120)), str(i))
+
+        probe = " ".join(rng.choices(vocabulary, k=120))
+        started = time.perf_counter()
+        for _ in range(20):
+            index.lookup("group", probe)
+        elapsed = (time.perf_counter() - started) / 20
+
+        print(f"  {size:>5} letters: {elapsed * 1000:.1f} ms per lookup")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--write", metavar="PATH", help="save the held-out pairs as JSONL")
+    args = parser.parse_args()
+
+    pairs = held_out_pairs()
+    threshold_sweep(pairs)
+    lookup_scaling()
+
+    if args.write:
+        with open(args.write, "w", encoding="utf-8") as f:
+            for a, b, duplicate in pairs:
+                f.write(json.dumps({"a": a, "b": b, "duplicate": duplicate}) + "\n")
+        print(f"\nWrote {len(pairs)} pairs to {args.write}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: how much of each agent's prompt the provider can serve from its prompt cache.
+
+OpenAI caches the longest prefix a request shares with recent requests, in
+128-token steps from 1024 tokens up. Each agent's instructions are sent
+first and are identical for every user (per cultural mode), and the user's
+answers, letter and themes come last, so everything up to the user's
+message is cacheable.
+
+Usage (from the project root):
+    # Prefix sizes only - no API calls
+    python -m benchmarks.bench_prompt_prefix --dry-run
+
+    # Live: different letters in a row, then the cached-token ratio and
+    # latency per agent (costs real tokens)
+    python -m benchmarks.bench_prompt_prefix --runs 5 --mode secular
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from backend.api.routes import map_cultural_mode
+from backend.agents.theme_extractor import THEME_EXTRACTION_PROMPT, _build_input_data, extract_themes
+from backend.agents.affirmation_generator import AFFIRMATION_PROMPT, generate_affirmations
+from backend.agents.poetry_composer import _build_input_vars, _select_prompt, compose_poem
+from backend.agents.fused_generator import FUSED_PROMPT, build_fused_input, generate_fused
+from backend.models.theme import ThemeData
+from backend.services.memo import fresh_outputs
+
+from benchmarks.common import collect_token_usage, count_tokens, sample_submission, summarize
+
+
+# OpenAI only caches prompts whose shared prefix is at least this long
+MIN_CACHED_PREFIX = 1024
+
+EXAMPLE_THEMES = ThemeData(**ThemeData.model_config["json_schema_extra"]["example"])
+
+LETTERS = [
+    "Dear future self, I am learning to rest without guilt and to ask for help.",
+    "To me in ten years: keep building the workshop, and keep the door open.",
+    "I hope you still sing in the car. I hope you forgave Dad. I hope you moved.",
+]
+
+
+def _messages(prompt: ChatPromptTemplate, variables: Dict[str, str]) -> List[str]:
+    return [message.content for message in prompt.format_messages(**variables)]
+
+
+def _prompts(cultural_mode: str, letter: str, theme_data: ThemeData) -> Dict[str, List[str]]:
+    """Each agent's rendered messages for the sample quiz with the given letter and themes."""
+    quiz = sample_submission(cultural_mode).model_copy(update={"free_write_letter": letter})
+    mode = map_cultural_mode(cultural_mode)
+    poem_prompt, _ = _select_prompt(mode)
+    themes = {field: ", ".join(value) if isinstance(value, list) else value
+              for field, value in theme_data.model_dump().items()}
+
+    return {
+        "extract": _messages(THEME_EXTRACTION_PROMPT, _build_input_data(quiz)),
+        "compose": _messages(poem_prompt, _build_input_vars(theme_data, letter, quiz.pronouns, quiz.display_name)),
+        "affirm": _messages(AFFIRMATION_PROMPT, themes),
+        "fused": _messages(FUSED_PROMPT, build_fused_input(quiz, mode)),
+    }
+
+
+def _shared_prefix(a: str, b: str) -> str:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return a[:length]
+
+
+def prefix_sizes(cultural_mode: str) -> None:
+    """Prints each agent's prompt size and how much of it two different users share."""
+    other_themes = EXAMPLE_THEMES.model_copy(update={"values": EXAMPLE_THEMES.values[::-1]})
+    first = _prompts(cultural_mode, LETTERS[0], EXAMPLE_THEMES)
+    second = _prompts(cultural_mode, LETTERS[1], other_themes)
+
+    print(f"Prompt prefix shared between two users ({cultural_mode})")
+    for agent, messages in first.items():
+        total = count_tokens("\n".join(messages))
+        shared = count_tokens(_shared_prefix("\n".join(messages), "\n".join(second[agent])))
+        cacheable = "cacheable" if shared >= MIN_CACHED_PREFIX else f"below the {MIN_CACHED_PREFIX}-token minimum"
+        print(f"  {agent:>7}: {shared:>5} of {total:>5} tokens shared ({shared / total:.0%}), {cacheable}")
+
+
+async def _run_agents(quiz, mode: str) -> Dict[str, Tuple[float, Dict[str, int]]]:
+    results = {}
+    calls = {
+        "extract": lambda: extract_themes(quiz),
+        "compose": lambda: compose_poem(EXAMPLE_THEMES, mode, quiz.free_write_letter, quiz.pronouns),
+        "affirm": lambda: generate_affirmations(EXAMPLE_THEMES),
+        "fused": lambda: generate_fused(quiz, mode),
+    }
+    for agent, call in calls.items():
+        with collect_token_usage() as usage, fresh_outputs():
+            started = time.perf_counter()
+            await call()
+            results[agent] = (time.perf_counter() - started, usage)
+    return results
+
+
+async def live(runs: int, cultural_mode: str) -> None:
+    """Calls every agent with a different letter each run and prints cached-token ratios."""
+    mode = map_cultural_mode(cultural_mode)
+    latencies: Dict[str, List[float]] = {}
+    totals: Dict[str, List[int]] = {}
+
+    for run in range(runs):
+        letter = f"{LETTERS[run % len(LETTERS)]} (run {run})"
+        quiz = sample_submission(cultural_mode).model_copy(update={"free_write_letter": letter})
+        for agent, (seconds, usage) in (await _run_agents(quiz, mode)).items():
+            latencies.setdefault(agent, []).append(seconds)
+            total = totals.setdefault(agent, [0, 0])
+            total[0] += usage["prompt_tokens"]
+            total[1] += usage["cached_tokens"]
+
+    for agent, (prompt, cached) in totals.items():
+        ratio = cached / prompt if prompt else 0.0
+        print(f"{agent:>7}: {summarize(latencies[agent])}  | {cached} of {prompt} prompt tokens cached ({ratio:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=4, help="Calls per agent (the first one fills the cache)")
+    parser.add_argument("--mode", default="yoruba_inspired",
+                        choices=["yoruba_inspired", "secular", "turkish", "biblical"])
+    parser.add_argument("--dry-run", action="store_true", help="Only compare prefix sizes")
+    args = parser.parse_args()
+
+    prefix_sizes(args.mode)
+    if not args.dry_run:
+        asyncio.run(live(args.runs, args.mode))
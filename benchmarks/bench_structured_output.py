@@ -0,0 +1,124 @@
+"""
+Benchmark: format-instruction parsers vs native structured output, per agent.
+
+The parser engine appends PydanticOutputParser's format instructions to the
+prompt and parses the completion as text; the native engine sends the
+output schema as the provider's structured output setting
+(STRUCTURED_OUTPUT_METHOD) and validates the JSON directly. Compares prompt
+size, latency and how often the output fails to parse.
+
+Usage (from the project root):
+    # Prompt size only - no API calls
+    python -m benchmarks.bench_structured_output --dry-run
+
+    # Live comparison against the OpenAI API (costs real tokens)
+    python -m benchmarks.bench_structured_output --runs 10 --mode secular
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from langchain_core.exceptions import OutputParserException
+
+from backend.api.routes import map_cultural_mode
+from backend.agents.theme_extractor import _build_input_data, create_theme_extractor
+from backend.agents.affirmation_generator import create_affirmation_generator
+from backend.agents.poetry_composer import _build_input_vars, create_poetry_composer
+from backend.agents.fused_generator import build_fused_input, create_fused_generator
+from backend.agents.structured import StructuredOutputParser, strict_schema
+from backend.config import settings
+from backend.models.theme import ThemeData
+
+from benchmarks.common import collect_token_usage, count_tokens, sample_submission, summarize
+
+
+# Stand-in themes so the compose and affirm prompts can be rendered without an API call
+EXAMPLE_THEMES = ThemeData(**ThemeData.model_config["json_schema_extra"]["example"])
+
+
+def _agents(cultural_mode: str) -> Dict[str, Any]:
+    """Each agent's chain builder and input variables for the sample quiz."""
+    quiz = sample_submission(cultural_mode)
+    mode = map_cultural_mode(cultural_mode)
+    themes = {field: ", ".join(value) if isinstance(value, list) else value
+              for field, value in EXAMPLE_THEMES.model_dump().items()}
+
+    return {
+        "extract": (create_theme_extractor, _build_input_data(quiz)),
+        "compose": (lambda native: create_poetry_composer(mode, native=native),
+                    _build_input_vars(EXAMPLE_THEMES, quiz.free_write_letter, quiz.pronouns, quiz.display_name)),
+        "affirm": (create_affirmation_generator, themes),
+        "fused": (create_fused_generator, build_fused_input(quiz, mode)),
+    }
+
+
+def _prompt_tokens(chain: Any, variables: Dict[str, str]) -> int:
+    """Tokens in the rendered messages, plus the schema if it is sent as structured output."""
+    text = "\n".join(message.content for message in chain.first.format_messages(**variables))
+    tokens = count_tokens(text)
+    parser = chain.last
+    if isinstance(parser, StructuredOutputParser):
+        tokens += count_tokens(json.dumps(strict_schema(parser.pydantic_object)))
+    return tokens
+
+
+def prompt_sizes(cultural_mode: str) -> None:
+    """Prints each agent's prompt tokens with format instructions vs native structured output."""
+    print(f"Prompt tokens ({cultural_mode}, native = {settings.STRUCTURED_OUTPUT_METHOD}, schema included)")
+    for agent, (build, variables) in _agents(cultural_mode).items():
+        parser_tokens = _prompt_tokens(build(native=False), variables)
+        native_tokens = _prompt_tokens(build(native=True), variables)
+        print(f"  {agent:>7}: parser {parser_tokens:>5}  native {native_tokens:>5}  "
+              f"({(native_tokens - parser_tokens) / parser_tokens:+.0%})")
+
+
+async def _measure(chain: Any, variables: Dict[str, str], runs: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    failures = 0
+    with collect_token_usage() as usage:
+        for _ in range(runs):
+            started = time.perf_counter()
+            try:
+                await chain.ainvoke(variables)
+            except OutputParserException:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+    return {"latencies": latencies, "failures": failures, "usage": usage}
+
+
+async def live(runs: int, cultural_mode: str) -> None:
+    """Calls every agent with both engines and prints latency, tokens and parse failures."""
+    engines: Dict[str, Callable[[Any], Any]] = {
+        "parser": lambda build: build(native=False),
+        "native": lambda build: build(native=True),
+    }
+
+    for agent, (build, variables) in _agents(cultural_mode).items():
+        for engine, make in engines.items():
+            result = await _measure(make(build), variables, runs)
+            usage = result["usage"]
+            calls = max(usage["llm_calls"], 1)
+            print(f"{agent:>7} {engine}: {summarize(result['latencies'])}  "
+                  f"| prompt {usage['prompt_tokens'] // calls} + completion {usage['completion_tokens'] // calls} "
+                  f"tokens/call  | parse failures {result['failures']}/{runs}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Calls per agent and engine")
+    parser.add_argument("--mode", default="yoruba_inspired",
+                        choices=["yoruba_inspired", "secular", "turkish", "biblical"])
+    parser.add_argument("--method", choices=["json_schema", "function_calling"],
+                        help="Native structured output method (default STRUCTURED_OUTPUT_METHOD)")
+    parser.add_argument("--dry-run", action="store_true", help="Only compare prompt sizes")
+    args = parser.parse_args()
+
+    if args.method:
+        settings.STRUCTURED_OUTPUT_METHOD = args.method
+
+    prompt_sizes(args.mode)
+    if not args.dry_run:
+        asyncio.run(live(args.runs, args.mode))
@@ -0,0 +1,123 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Provides a realistic sample quiz submission, a prompt token counter that
+works offline, a way to collect token usage from every LLM call made
+inside a block of code without changing the agents themselves, and a way
+to switch off the reuse of earlier outputs so repeated runs stay cold.
+"""
+
+import statistics
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from langchain_core.tracers.context import collect_runs
+
+from backend.config import settings
+from backend.models.quiz import QuizSubmission
+from backend.services.memo import MEMOS
+
+
+# Representative submission: a full-length letter, like real traffic
+SAMPLE_QUIZ = {
+    "top_values": ["integrity", "compassion", "wisdom"],
+    "greatest_strength": "empathy",
+    "aspirational_trait": "confidence",
+    "metaphor_archetype": "river",
+    "energy_style": "healer",
+    "life_focus": "spirituality",
+    "cultural_mode": "yoruba_inspired",
+    "pronouns": "she_her",
+    "free_write_letter": """
+    Dear future self,
+
+    I hope you remember how far you've come. Right now, I'm learning to trust
+    my own voice and embrace my unique gifts. Sometimes it feels like I'm swimming
+    upstream, but I know that struggle builds strength.
+
+    I want you to know that I'm committed to helping others find their light,
+    even when mine feels dim. Every act of kindness creates ripples that extend
+    far beyond what we can see. Keep being a bridge between people, keep listening
+    deeply, and keep believing in the power of genuine connection.
+
+    With love and hope,
+    Your present self
+    """
+}
+
+
+def sample_submission(cultural_mode: str = "yoruba_inspired") -> QuizSubmission:
+    """Returns the sample quiz as a validated QuizSubmission."""
+    return QuizSubmission(**{**SAMPLE_QUIZ, "cultural_mode": cultural_mode})
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """
+    Counts prompt tokens with tiktoken.
+
+    Falls back to the usual ~4 characters per token estimate when the
+    tokenizer files can't be downloaded (e.g. offline CI).
+    """
+    try:
+        import tiktoken
+        return len(tiktoken.encoding_for_model(model).encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+@contextmanager
+def collect_token_usage() -> Iterator[Dict[str, int]]:
+    """
+    Sums prompt (and prompt-cached)/completion tokens of every LLM call made inside the block.
+
+    Usage:
+        with collect_token_usage() as usage:
+            await extract_themes(quiz)
+        print(usage["prompt_tokens"])
+    """
+    usage = {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "llm_calls": 0}
+
+    with collect_runs() as collector:
+        yield usage
+
+    def visit(run) -> None:
+        if run.run_type == "llm":
+            token_usage = ((run.outputs or {}).get("llm_output") or {}).get("token_usage") or {}
+            usage["prompt_tokens"] += token_usage.get("prompt_tokens", 0)
+            usage["cached_tokens"] += (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+            usage["completion_tokens"] += token_usage.get("completion_tokens", 0)
+            usage["llm_calls"] += 1
+        for child in run.child_runs:
+            visit(child)
+
+    for run in collector.traced_runs:
+        visit(run)
+
+
+@contextmanager
+def without_reuse() -> Iterator[None]:
+    """
+    Makes every call inside the block reach the LLM: no stage memo hits and
+    no near-duplicate letter reuse.
+
+    Otherwise repeating the same quiz measures the memos after the first
+    run, not the agents. Import the agent modules first, so their memos exist.
+    """
+    memos_enabled = {name: memo.cache.enabled for name, memo in MEMOS.items()}
+    similar_letters = settings.SIMILAR_LETTER_ENABLED
+    for memo in MEMOS.values():
+        memo.cache.enabled = False
+    settings.SIMILAR_LETTER_ENABLED = False
+    try:
+        yield
+    finally:
+        for name, enabled in memos_enabled.items():
+            MEMOS[name].cache.enabled = enabled
+        settings.SIMILAR_LETTER_ENABLED = similar_letters
+
+
+def summarize(samples: List[float]) -> str:
+    """Formats latency samples as median / p90 / max in seconds."""
+    ordered = sorted(samples)
+    p90 = ordered[min(len(ordered) - 1, int(round(0.9 * (len(ordered) - 1))))]
+    return f"median {statistics.median(ordered):.2f}s  p90 {p90:.2f}s  max {ordered[-1]:.2f}s"
@@ -15,6 +15,9 @@ const API_BASE_URL = window.location.hostname === 'localhost' || window.location
     ? 'http://localhost:8000'
     : 'https://oriki-api.onrender.com';  // UPDATE THIS after Render deployment
 
+// TTS voice for the audio version ('alloy' is warm and pleasant)
+const AUDIO_VOICE = 'alloy';
+
 // ============================================================================
 // QUIZ DATA - Hardcoded questions (will fetch from API later)
 // ============================================================================
@@ -1247,9 +1250,11 @@ function hideResultsError() {
  * Submit quiz data to the backend API for Oriki generation
  * Includes timeout handling (60 seconds) and cancellation support
  * @param {Object} quizData - The quiz submission matching QuizSubmission schema
+ * @param {Object} [options]
+ * @param {boolean} [options.fresh=false] - Skip the server's response cache (for regenerating)
  * @returns {Promise<Object>} - API response with poem, affirmations, and themes
  */
-async function submitQuizToAPI(quizData) {
+async function submitQuizToAPI(quizData, { fresh = false } = {}) {
     // Create an AbortController to allow request cancellation
     currentAbortController = new AbortController();
     const signal = currentAbortController.signal;
@@ -1283,6 +1288,10 @@ async function submitQuizToAPI(quizData) {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                // Lets the server skip work that can't finish before we give up
+                'X-Request-Timeout': String(TIMEOUT_MS / 1000),
+                // A cached response would give back the same poem
+                ...(fresh ? { 'Cache-Control': 'no-cache' } : {}),
             },
             body: JSON.stringify(quizData),
             signal: signal
@@ -1331,10 +1340,10 @@ async function submitQuizToAPI(quizData) {
  * Generate audio from text using the backend TTS API
  * Includes timeout handling (60 seconds)
  * @param {string} text - The text to convert to speech
- * @param {string} voice - The voice to use (default: 'alloy')
- * @returns {Promise<Object>} - API response with audio_base64 and duration_seconds
+ * @param {string} voice - The voice to use (default: AUDIO_VOICE)
+ * @returns {Promise<Object>} - API response with audio_url (or audio_base64) and duration_seconds
  */
-async function generateAudioFromAPI(text, voice = 'alloy') {
+async function generateAudioFromAPI(text, voice = AUDIO_VOICE) {
     // Create an AbortController for timeout
     const abortController = new AbortController();
     const signal = abortController.signal;
@@ -1351,10 +1360,14 @@ async function generateAudioFromAPI(text, voice = 'alloy') {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'X-Request-Timeout': String(TIMEOUT_MS / 1000),
             },
             body: JSON.stringify({
                 text: text,
-                voice: voice
+                voice: voice,
+                // Ask for a download URL instead of base64: smaller, and the
+                // audio element can start playing before it has the whole file
+                delivery: 'url'
             }),
             signal: signal
         });
@@ -1671,19 +1684,24 @@ async function generateAudio(poemLines, affirmations) {
 
     try {
         // Call the API to generate audio from the text
-        // Using the 'alloy' voice which is warm and pleasant
-        const response = await generateAudioFromAPI(fullText, 'alloy');
+        const response = await generateAudioFromAPI(fullText, AUDIO_VOICE);
 
         console.log('Audio generated successfully. Duration:', response.duration_seconds, 'seconds');
 
         // Validate the response
-        if (!response.audio_base64) {
+        if (!response.audio_url && !response.audio_base64) {
             throw new Error('No audio data received from server.');
         }
 
-        // Convert base64 audio to a data URL and set it as the audio source
-        const audioDataUrl = `data:audio/mpeg;base64,${response.audio_base64}`;
-        elements.audioElement.src = audioDataUrl;
+        if (response.audio_url) {
+            // Local-store URLs are relative to the API; S3 URLs are absolute
+            elements.audioElement.src = response.audio_url.startsWith('/')
+                ? `${API_BASE_URL}${response.audio_url}`
+                : response.audio_url;
+        } else {
+            // Older servers: convert base64 audio to a data URL
+            elements.audioElement.src = `data:audio/mpeg;base64,${response.audio_base64}`;
+        }
 
         // Hide loading state
         elements.audioLoading.classList.add('hidden');
@@ -2023,7 +2041,7 @@ async function regenerateOriki() {
 
     try {
         // Re-submit the same quiz data to get a new variation
-        const response = await submitQuizToAPI(quizState.lastSubmission);
+        const response = await submitQuizToAPI(quizState.lastSubmission, { fresh: true });
 
         console.log('Received regenerated response from API:', response);
 
@@ -0,0 +1,67 @@
+"""
+Tests for the build-once agent registry in backend/agents/registry.py
+"""
+
+import asyncio
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from backend.agents.registry import AgentRegistry, _async_clients
+
+
+def test_objects_are_built_once_lazily_or_eagerly():
+    builds = []
+    registry = AgentRegistry()
+    registry.register("a", lambda: builds.append("a") or object())
+    registry.register("b", lambda: builds.append("b") or object())
+
+    first = registry.get("a")
+    assert registry.get("a") is first
+    assert builds == ["a"]
+
+    registry.build()
+    registry.build()
+    assert builds == ["a", "b"]
+    assert registry.stats()["built"] == 2
+
+
+def test_warm_up_finds_clients_in_chains_and_survives_failures():
+    # Nothing listens on the discard port, so the connection is refused
+    llm = ChatOpenAI(api_key="test", base_url="http://127.0.0.1:9/v1", max_retries=0)
+    prompt = ChatPromptTemplate.from_template("{x}")
+
+    registry = AgentRegistry()
+    registry.register("llm", lambda: llm)
+    registry.register("chain", lambda: prompt | llm)
+    registry.build()
+
+    connected = asyncio.run(registry.warm_up(timeout=1))
+
+    assert connected == 0
+    # The same client is only warmed once, however many chains use it
+    assert registry.stats()["warmup_errors"] == 1
+
+
+def test_each_app_lifespan_builds_the_agents_on_an_open_client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.agents.registry import registry
+    from backend.config import settings
+    from backend.main import app
+    from backend.services.http import get_http_client
+
+    monkeypatch.setattr(settings, "AGENT_WARMUP_ENABLED", False)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+
+    with TestClient(app):
+        first = get_http_client()
+    assert first.is_closed
+
+    # The second lifespan (e.g. the next test) gets a new pool, not the closed one
+    with TestClient(app):
+        second = get_http_client()
+        assert not second.is_closed
+        assert registry.get("compose-llm").root_async_client._client is second
+        assert registry.get("tts-client")._client is second
+        assert list(_async_clients(registry.get("extract")))[0]._client is second
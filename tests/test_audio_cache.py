@@ -0,0 +1,231 @@
+"""
+Tests for the disk-backed TTS audio cache in backend/services/audio_cache.py
+"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+from backend.services.audio_cache import AudioCache, audio_key
+
+
+def test_key_ignores_spacing_but_not_line_breaks_or_voice():
+    key = audio_key("You are strong.\nYou are kind.", "nova", "tts-1", "mp3")
+
+    assert audio_key("  You are  strong.\r\nYou are kind. ", "nova", "tts-1", "mp3") == key
+    assert audio_key("You are strong. You are kind.", "nova", "tts-1", "mp3") != key
+    assert audio_key("You are strong.\nYou are kind.", "onyx", "tts-1", "mp3") != key
+    assert audio_key("You are strong.\nYou are kind.", "nova", "tts-1-hd", "mp3") != key
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    async def scenario():
+        cache = AudioCache(str(tmp_path), max_bytes=350)
+        for name in ("a", "b", "c"):
+            await cache.put(name * 64, "mp3", b"x" * 100)
+            # Distinct mtimes, oldest first
+            os.utime(cache.path_for(name * 64, "mp3"), (1000 + ord(name), 1000 + ord(name)))
+
+        # Using "a" makes "b" the least recently used
+        assert await cache.get("a" * 64, "mp3") == b"x" * 100
+        await cache.put("d" * 64, "mp3", b"x" * 100)
+
+        return cache, [await cache.get(name * 64, "mp3") is not None for name in "abcd"]
+
+    cache, present = asyncio.run(scenario())
+
+    assert present == [True, False, True, True]
+    assert cache.stats()["bytes"] == 300
+
+
+def test_index_survives_restart_and_ignores_temp_files(tmp_path):
+    async def scenario():
+        first = AudioCache(str(tmp_path), max_bytes=10_000)
+        await first.put("ab" * 32, "mp3", b"audio")
+
+        # A crashed write leaves a temp file behind; it must not count as an entry
+        shard = os.path.dirname(first.path_for("ab" * 32, "mp3"))
+        with open(os.path.join(shard, ".partial.tmp"), "wb") as f:
+            f.write(b"half")
+
+        second = AudioCache(str(tmp_path), max_bytes=10_000)
+        found = await second.start()
+        return found, await second.get("ab" * 32, "mp3")
+
+    assert asyncio.run(scenario()) == (1, b"audio")
+
+
+class _FakeSpeech:
+    """Stands in for client.audio.speech.with_streaming_response."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        chunks = self.chunks
+
+        class Response:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def iter_bytes(self, chunk_size):
+                for chunk in chunks:
+                    yield chunk
+
+        return Response()
+
+
+def test_audio_stream_relays_chunks_and_caches_the_result(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from backend.agents import audio_renderer
+    from backend.main import app
+
+    speech = _FakeSpeech([b"ID3", b"frame-1", b"frame-2"])
+    client = SimpleNamespace(audio=SimpleNamespace(speech=SimpleNamespace(with_streaming_response=speech)))
+    monkeypatch.setitem(audio_renderer.registry._built, "tts-client", client)
+    monkeypatch.setattr(audio_renderer, "audio_cache", AudioCache(str(tmp_path), max_bytes=10_000))
+    monkeypatch.setattr(audio_renderer.settings, "AGENT_WARMUP_ENABLED", False)
+    monkeypatch.setattr(audio_renderer.settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+
+    with TestClient(app) as http:
+        first = http.post("/api/v1/audio/stream", json={"text": "You are strong.", "voice": "nova"})
+        again = http.post("/api/v1/audio/stream", json={"text": "You are strong.", "voice": "nova"})
+
+    assert first.headers["content-type"] == "audio/mpeg"
+    assert first.content == again.content == b"ID3frame-1frame-2"
+    assert speech.calls == 1
+
+
+def test_audio_url_delivery_serves_ranges_and_etags(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from backend.api import routes
+    from backend.main import app
+    from backend.services.file_store import LocalFileStore
+
+    async def fake_generate_audio(text, voice):
+        return b"0123456789"
+
+    cache = AudioCache(str(tmp_path), max_bytes=10_000, enabled=False)
+    monkeypatch.setattr(routes, "generate_audio", fake_generate_audio)
+    monkeypatch.setattr(routes, "audio_cache", cache)
+    monkeypatch.setattr(routes, "audio_store", LocalFileStore(cache, ""))
+    monkeypatch.setattr(routes.settings, "AGENT_WARMUP_ENABLED", False)
+    monkeypatch.setattr(routes.settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+
+    with TestClient(app) as http:
+        body = http.post("/api/v1/audio", json={"text": "Hi", "delivery": "url"}).json()
+        url = body["audio_url"]
+
+        full = http.get(url)
+        partial = http.get(url, headers={"Range": "bytes=2-5"})
+        unchanged = http.get(url, headers={"If-None-Match": full.headers["etag"]})
+        missing = http.get("/api/v1/audio/files/..%2F..%2Fsecret.mp3")
+
+    assert body["audio_base64"] is None
+    # Stored even though the cache itself is disabled
+    assert (full.status_code, full.content) == (200, b"0123456789")
+    assert full.headers["content-type"] == "audio/mpeg"
+    assert (partial.status_code, partial.content) == (206, b"2345")
+    assert unchanged.status_code == 304
+    assert missing.status_code == 404
+
+
+def test_audio_index_of_an_empty_file_is_not_found(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from backend.api import routes
+    from backend.main import app
+    from backend.services.file_store import LocalFileStore
+
+    cache = AudioCache(str(tmp_path), max_bytes=10_000)
+    name = "ab" * 32 + ".mp3"
+    path = cache.path_for("ab" * 32, "mp3")
+    os.makedirs(os.path.dirname(path))
+    open(path, "wb").close()
+    monkeypatch.setattr(routes, "audio_store", LocalFileStore(cache, ""))
+    monkeypatch.setattr(routes.settings, "AGENT_WARMUP_ENABLED", False)
+    monkeypatch.setattr(routes.settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+
+    with TestClient(app) as http:
+        response = http.get(f"/api/v1/audio/files/{name}/index")
+
+    assert response.status_code == 404
+
+
+class _FakeSpeechCalls:
+    """Stands in for client.audio.speech, recording which texts were synthesized."""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def create(self, input, **kwargs):
+        from tests.test_mp3 import clip
+
+        self.inputs.append(input)
+        return SimpleNamespace(read=lambda: clip(len(self.inputs)))
+
+
+def test_segments_are_rendered_separately_and_cached_individually(monkeypatch, tmp_path):
+    from backend.agents import audio_renderer
+    from backend.services import mp3
+
+    speech = _FakeSpeechCalls()
+    monkeypatch.setitem(audio_renderer.registry._built, "tts-client", SimpleNamespace(audio=SimpleNamespace(speech=speech)))
+    monkeypatch.setattr(audio_renderer, "audio_cache", AudioCache(str(tmp_path), max_bytes=1_000_000))
+    monkeypatch.setattr(audio_renderer.settings, "AUDIO_SEGMENTED", True)
+
+    poem = "The one who walks with purpose,\nsteady as the mountain."
+
+    first = asyncio.run(audio_renderer.generate_audio(f"{poem}\n\nYou are worthy.", "nova"))
+    second = asyncio.run(audio_renderer.generate_audio(f"{poem}\n\nYou are brave.", "nova"))
+
+    # Only the new affirmation is synthesized the second time
+    assert sorted(speech.inputs[:3]) == sorted(["The one who walks with purpose,", "steady as the mountain.", "You are worthy."])
+    assert speech.inputs[3:] == ["You are brave."]
+
+    # Three clips of one frame each, joined into one stream with pauses between them
+    frames = mp3.audio_frames(first)
+    line_pause = round(audio_renderer.settings.AUDIO_LINE_PAUSE_SECONDS * 44100 / 1152)
+    section_pause = round(audio_renderer.settings.AUDIO_SECTION_PAUSE_SECONDS * 44100 / 1152)
+    assert len(frames) == 3 + line_pause + section_pause
+    assert first[:-417] == second[:-417] and first[-417:] != second[-417:]
+
+
+def test_stored_audio_index_reports_exact_duration_and_seek_points(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from backend.api import routes
+    from backend.main import app
+    from backend.services.file_store import LocalFileStore
+    from tests.test_mp3 import FRAME_LENGTH, clip
+
+    audio = clip(*range(100))
+
+    async def fake_generate_audio(text, voice):
+        return audio
+
+    cache = AudioCache(str(tmp_path), max_bytes=1_000_000)
+    monkeypatch.setattr(routes, "generate_audio", fake_generate_audio)
+    monkeypatch.setattr(routes, "audio_cache", cache)
+    monkeypatch.setattr(routes, "audio_store", LocalFileStore(cache, ""))
+    monkeypatch.setattr(routes.settings, "AGENT_WARMUP_ENABLED", False)
+    monkeypatch.setattr(routes.settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+
+    with TestClient(app) as http:
+        body = http.post("/api/v1/audio", json={"text": "You are strong.", "delivery": "url"}).json()
+        index = http.get(body["audio_url"] + "/index", params={"interval": 0.5}).json()
+        _, offset = index["seek_table"][2]
+        seeked = http.get(body["audio_url"], headers={"Range": f"bytes={offset}-"})
+
+    # 100 frames of 1152 samples at 44.1 kHz, measured rather than guessed from 3 words
+    assert body["duration_seconds"] == 2.6
+    assert index["frames"] == 100 and index["duration_seconds"] == 2.612
+    assert seeked.status_code == 206 and seeked.content[:4] == b"\xff\xfb\x90\xc0"
+    assert len(seeked.content) % FRAME_LENGTH == 128  # Whole frames, then the ID3v1 tag
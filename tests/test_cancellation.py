@@ -0,0 +1,72 @@
+"""
+Tests for disconnect handling and request deadlines in backend/services/cancellation.py
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.cancellation import (
+    ClientDisconnected,
+    Deadline,
+    DeadlineExceeded,
+    DisconnectGuard,
+)
+
+
+def test_disconnect_cancels_work():
+    cancelled = asyncio.Event()
+    polls = {"count": 0}
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def is_disconnected():
+        polls["count"] += 1
+        return polls["count"] >= 3
+
+    async def scenario():
+        guard = DisconnectGuard("test", poll_interval=0.01)
+        with pytest.raises(ClientDisconnected):
+            await guard.run(is_disconnected, work())
+        await asyncio.sleep(0)
+        return guard
+
+    guard = asyncio.run(scenario())
+
+    assert cancelled.is_set()
+    assert guard.stats() == {"cancelled_on_disconnect": 1}
+
+
+def test_connected_client_gets_result():
+    async def work():
+        await asyncio.sleep(0.03)
+        return "done"
+
+    async def is_disconnected():
+        return False
+
+    guard = DisconnectGuard("test", poll_interval=0.01)
+
+    assert asyncio.run(guard.run(is_disconnected, work())) == "done"
+    assert guard.cancelled == 0
+
+
+def test_deadline_budget():
+    deadline = Deadline(5)
+
+    assert 4 < deadline.remaining() <= 5
+    assert deadline.clamp(None) <= 5
+    assert deadline.clamp(1) == 1
+
+    deadline.require(1, "stage")
+    with pytest.raises(DeadlineExceeded):
+        deadline.require(10, "stage")
+
+    # Missing or oversized client timeouts fall back to the configured limits
+    assert Deadline.from_timeout(None).budget == 60
+    assert Deadline.from_timeout(10_000).budget == 120
@@ -0,0 +1,101 @@
+"""
+Tests for the stage DAG executor in backend/services/executor.py
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.cancellation import Deadline
+from backend.services.executor import PipelineExecutor, Stage, StageFailed, StagePolicy
+
+
+def test_dependencies_receive_upstream_results():
+    async def double(ctx):
+        return ctx["a"] * 2
+
+    async def source(ctx):
+        return ctx["x"] + 1
+
+    pipeline = PipelineExecutor([
+        Stage("b", double, depends_on=("a",)),
+        Stage("a", source),
+    ])
+
+    result = asyncio.run(pipeline.run({"x": 1}))
+
+    assert pipeline.order == ["a", "b"]
+    assert result.results == {"a": 2, "b": 4}
+    assert not result.partial
+
+
+def test_timeouts_are_retried_then_fail():
+    attempts = {"count": 0}
+
+    async def flaky(ctx):
+        attempts["count"] += 1
+        if attempts["count"] < 3:
+            await asyncio.sleep(10)
+        return "ok"
+
+    policy = StagePolicy(timeout=0.02, retries=2, backoff=0)
+
+    ok = asyncio.run(PipelineExecutor([Stage("s", flaky, policy=policy)]).run({}))
+    assert ok.results["s"] == "ok"
+    assert attempts["count"] == 3
+
+    attempts["count"] = 0
+    strict = StagePolicy(timeout=0.02, retries=1, backoff=0)
+    with pytest.raises(StageFailed) as exc_info:
+        asyncio.run(PipelineExecutor([Stage("s", flaky, policy=strict)]).run({}))
+    assert isinstance(exc_info.value.cause, TimeoutError)
+
+
+def test_degraded_stage_propagates_to_dependents():
+    async def failing(ctx):
+        raise RuntimeError("nope")
+
+    async def dependent(ctx):
+        raise AssertionError("should not run on a fallback value")
+
+    pipeline = PipelineExecutor([
+        Stage("a", failing, policy=StagePolicy(critical=False)),
+        Stage("b", dependent, depends_on=("a",), fallback=lambda ctx, e: "fallback"),
+    ])
+
+    result = asyncio.run(pipeline.run({}))
+
+    assert result.results == {"a": None, "b": "fallback"}
+    assert set(result.degraded) == {"a", "b"}
+
+
+def test_cycles_are_rejected():
+    async def noop(ctx):
+        return None
+
+    with pytest.raises(ValueError):
+        PipelineExecutor([
+            Stage("a", noop, depends_on=("b",)),
+            Stage("b", noop, depends_on=("a",)),
+        ])
+
+
+def test_deadline_clamps_timeouts_and_skips_late_stages():
+    async def slow(ctx):
+        await asyncio.sleep(10)
+
+    async def never(ctx):
+        raise AssertionError("should not start this close to the deadline")
+
+    # The 10s stage timeout is cut short by the 0.05s deadline
+    clamped = PipelineExecutor([Stage("s", slow, policy=StagePolicy(timeout=10))])
+    with pytest.raises(StageFailed) as exc_info:
+        asyncio.run(clamped.run({}, deadline=Deadline(0.05)))
+    assert isinstance(exc_info.value.cause, TimeoutError)
+
+    # A stage needing more time than is left fails without starting
+    late = PipelineExecutor([
+        Stage("s", never, policy=StagePolicy(min_time=5, critical=False)),
+    ])
+    result = asyncio.run(late.run({}, deadline=Deadline(1)))
+    assert result.degraded == {"s": "request deadline exceeded"}
@@ -0,0 +1,378 @@
+"""
+Tests for the generation pipeline orchestration in backend/api/routes.py
+
+These tests replace the LLM-backed agents with small async stubs so the
+orchestration logic (concurrency, cancellation, error mapping) can be
+checked without an OpenAI API key or network access.
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from backend.api import routes
+from backend.models.quiz import QuizSubmission
+from backend.models.theme import ThemeData
+from backend.models.poem import PoemOutput
+from backend.models.affirmations import AffirmationsOutput
+from backend.services.cache import MemoryCacheBackend, ResponseCache
+
+
+SAMPLE_QUIZ = {
+    "top_values": ["integrity", "compassion", "wisdom"],
+    "greatest_strength": "empathy",
+    "aspirational_trait": "confidence",
+    "metaphor_archetype": "river",
+    "energy_style": "healer",
+    "life_focus": "spirituality",
+    "cultural_mode": "yoruba_inspired",
+    "pronouns": "she_her",
+    "free_write_letter": "Dear future self, remember that you are strong and capable."
+}
+
+SAMPLE_THEMES = ThemeData(
+    values=["integrity", "compassion", "wisdom"],
+    emotional_tone="hopeful",
+    metaphors=["flowing river", "steady mountain"],
+    identity_markers=["healer", "learner", "bridge-builder"],
+    aspirations=["inspire change", "create connections"],
+    strengths=["empathy", "resilience", "creativity"],
+    key_themes=["transformation", "service", "growth"]
+)
+
+SAMPLE_POEM = PoemOutput(
+    poem_lines=["The one who walks with purpose, steady as the mountain,"],
+    cultural_mode="yoruba",
+    style_notes="Praise-naming with nature metaphors."
+)
+
+SAMPLE_AFFIRMATIONS = AffirmationsOutput(
+    affirmations=["I choose to embrace challenges as opportunities for growth"],
+    focus_areas=["growth mindset"]
+)
+
+
+@pytest.fixture
+def submission() -> QuizSubmission:
+    return QuizSubmission(**SAMPLE_QUIZ)
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch) -> ResponseCache:
+    """
+    An empty response cache, with snapshots off so tests don't share results
+    and connection warm-up off so the app's lifespan doesn't reach the network.
+    """
+    cache = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+    monkeypatch.setattr(routes, "response_cache", cache)
+    monkeypatch.setattr(routes.settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+    monkeypatch.setattr(routes.settings, "AGENT_WARMUP_ENABLED", False)
+    return cache
+
+
+async def fake_extract(submission):
+    return SAMPLE_THEMES
+
+
+def test_pipeline_runs_compose_and_affirm_concurrently(monkeypatch, submission):
+    """Both branches should be in flight at the same time."""
+    in_flight = {"count": 0, "peak": 0}
+
+    async def track():
+        in_flight["count"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["count"])
+        await asyncio.sleep(0.05)
+        in_flight["count"] -= 1
+
+    async def fake_compose(**kwargs):
+        await track()
+        return SAMPLE_POEM.model_copy()
+
+    async def fake_affirm(themes):
+        await track()
+        return SAMPLE_AFFIRMATIONS
+
+    monkeypatch.setattr(routes, "extract_themes", fake_extract)
+    monkeypatch.setattr(routes, "compose_poem", fake_compose)
+    monkeypatch.setattr(routes, "generate_affirmations", fake_affirm)
+
+    response = asyncio.run(routes.run_staged_pipeline(submission))
+
+    assert in_flight["peak"] == 2
+    assert response.poem.cultural_mode == "yoruba_inspired"
+    assert response.affirmations == SAMPLE_AFFIRMATIONS
+    assert not response.partial
+
+
+def test_pipeline_critical_failure_cancels_other_branch(monkeypatch, submission):
+    """A failing poem should cancel the affirmations and keep the 500 mapping."""
+    cancelled = asyncio.Event()
+
+    async def failing_compose(**kwargs):
+        raise RuntimeError("upstream exploded")
+
+    async def slow_affirm(themes):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(routes, "extract_themes", fake_extract)
+    monkeypatch.setattr(routes, "compose_poem", failing_compose)
+    monkeypatch.setattr(routes, "generate_affirmations", slow_affirm)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(routes.run_staged_pipeline(submission))
+
+    assert exc_info.value.status_code == 500
+    assert "Poetry generation failed" in exc_info.value.detail
+    assert cancelled.is_set()
+
+
+def test_pipeline_invalid_mode_maps_to_400(monkeypatch, submission):
+    """A ValueError from the composer is still reported as a 400 (and not retried)."""
+    calls = {"compose": 0}
+
+    async def bad_compose(**kwargs):
+        calls["compose"] += 1
+        raise ValueError("Invalid cultural_mode: klingon")
+
+    async def fake_affirm(themes):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(routes, "extract_themes", fake_extract)
+    monkeypatch.setattr(routes, "compose_poem", bad_compose)
+    monkeypatch.setattr(routes, "generate_affirmations", fake_affirm)
+    monkeypatch.setattr(routes.STAGED_PIPELINE.stages["compose"].policy, "retries", 2)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(routes.run_staged_pipeline(submission))
+
+    assert exc_info.value.status_code == 400
+    assert calls["compose"] == 1
+
+
+def test_pipeline_affirm_timeout_returns_partial(monkeypatch, submission):
+    """A slow affirmation call should not throw away a good poem."""
+
+    async def fake_compose(**kwargs):
+        return SAMPLE_POEM.model_copy()
+
+    async def hanging_affirm(themes):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(routes, "extract_themes", fake_extract)
+    monkeypatch.setattr(routes, "compose_poem", fake_compose)
+    monkeypatch.setattr(routes, "generate_affirmations", hanging_affirm)
+    monkeypatch.setattr(routes.STAGED_PIPELINE.stages["affirm"].policy, "timeout", 0.05)
+
+    response = asyncio.run(routes.run_staged_pipeline(submission))
+
+    assert response.partial
+    assert response.degraded_stages == ["affirm"]
+    assert response.poem.poem_lines == SAMPLE_POEM.poem_lines
+    assert response.affirmations.affirmations == []
+
+
+def test_stream_poem_emits_each_line_once(monkeypatch):
+    """stream_poem should yield every line exactly once, then the PoemOutput."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from backend.agents import poetry_composer
+
+    completion = (
+        '{"poem_lines": ["First line,", "Second line,", "Third line."], '
+        '"cultural_mode": "secular", "style_notes": "Modern and grounded."}'
+    )
+    monkeypatch.setitem(poetry_composer.registry._built, "compose-llm", FakeListChatModel(responses=[completion]))
+
+    async def collect():
+        return [item async for item in poetry_composer.stream_poem(SAMPLE_THEMES, "secular")]
+
+    events = asyncio.run(collect())
+
+    assert [value for kind, value in events if kind == "line"] == [
+        "First line,", "Second line,", "Third line."
+    ]
+    assert events[-1][0] == "poem"
+    assert events[-1][1].style_notes == "Modern and grounded."
+
+
+def test_generate_stream_event_order(monkeypatch, fresh_cache):
+    """The SSE endpoint should send themes, lines, poem, affirmations, complete."""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    async def fake_extract(submission):
+        return SAMPLE_THEMES
+
+    async def fake_stream(**kwargs):
+        yield "line", "The one who walks with purpose,"
+        yield "poem", SAMPLE_POEM.model_copy()
+
+    async def fake_affirm(themes):
+        return SAMPLE_AFFIRMATIONS
+
+    monkeypatch.setattr(routes, "extract_themes", fake_extract)
+    monkeypatch.setattr(routes, "stream_poem", fake_stream)
+    monkeypatch.setattr(routes, "generate_affirmations", fake_affirm)
+
+    with TestClient(app) as client:
+        response = client.post("/api/v1/generate/stream", json=SAMPLE_QUIZ)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        line.split(": ", 1)[1]
+        for line in response.text.splitlines()
+        if line.startswith("event: ")
+    ]
+    assert events == ["themes", "poem_line", "poem", "affirmations", "complete"]
+
+
+def test_generate_stream_maps_failures_like_generate(monkeypatch, fresh_cache):
+    """A bad poem is a 500 (not an invalid mode), and failed affirmations fall back to empty."""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    async def fake_extract(submission):
+        return SAMPLE_THEMES
+
+    async def invalid_poem(**kwargs):
+        yield "line", "The one who walks with purpose,"
+        PoemOutput.model_validate({"poem_lines": ["only lines"]})
+
+    async def valid_poem(**kwargs):
+        yield "poem", SAMPLE_POEM.model_copy()
+
+    async def failing_affirm(themes):
+        raise RuntimeError("upstream exploded")
+
+    monkeypatch.setattr(routes, "extract_themes", fake_extract)
+    monkeypatch.setattr(routes, "generate_affirmations", failing_affirm)
+
+    def events(body):
+        frames = [frame.split("\n") for frame in body.strip().split("\n\n")]
+        return [(lines[0].split(": ", 1)[1], json.loads(lines[1].split(": ", 1)[1])) for lines in frames]
+
+    with TestClient(app) as client:
+        monkeypatch.setattr(routes, "stream_poem", invalid_poem)
+        bad_poem = events(client.post("/api/v1/generate/stream", json=SAMPLE_QUIZ).text)
+        monkeypatch.setattr(routes, "stream_poem", valid_poem)
+        no_affirmations = events(client.post("/api/v1/generate/stream", json=SAMPLE_QUIZ).text)
+        # Only the six TTS voices are accepted for speculative audio
+        bad_voice = client.post("/api/v1/generate/stream?speculative_audio=robot", json=SAMPLE_QUIZ)
+
+    assert bad_poem[-1][0] == "error" and bad_poem[-1][1]["status_code"] == 500
+    assert [name for name, _ in no_affirmations] == ["themes", "poem", "affirmations", "complete"]
+    assert no_affirmations[2][1]["affirmations"] == []
+    assert no_affirmations[3][1]["partial"] is True
+    assert no_affirmations[3][1]["degraded_stages"] == ["affirm"]
+    assert bad_voice.status_code == 422
+
+
+def test_fused_prompt_sends_letter_once(submission):
+    """The fused prompt keeps the cultural guidance but includes the letter only once."""
+    from backend.agents.fused_generator import FUSED_PROMPT, build_fused_input
+
+    prompt = FUSED_PROMPT.format(**build_fused_input(submission, "yoruba"))
+
+    assert prompt.count(submission.free_write_letter) == 1
+    assert "DO NOT reference Òrìṣà deities" in prompt
+
+
+@pytest.mark.parametrize("mode", ["yoruba", "secular", "turkish", "biblical"])
+def test_prompts_put_user_content_after_an_identical_system_message(submission, mode):
+    """Each agent's system message is the same for every user, so the provider can cache it."""
+    from backend.agents.theme_extractor import THEME_EXTRACTION_PROMPT, _build_input_data
+    from backend.agents.affirmation_generator import AFFIRMATION_PROMPT
+    from backend.agents.poetry_composer import _build_input_vars, _select_prompt
+    from backend.agents.fused_generator import FUSED_PROMPT, build_fused_input
+
+    other = submission.model_copy(update={"free_write_letter": "To me in ten years: keep the door open."})
+    other_themes = SAMPLE_THEMES.model_copy(update={"values": ["courage"], "key_themes": ["rest"]})
+    poem_prompt, _ = _select_prompt(mode)
+
+    def affirm_vars(themes):
+        return {field: ", ".join(value) if isinstance(value, list) else value
+                for field, value in themes.model_dump().items()}
+
+    pairs = [
+        (THEME_EXTRACTION_PROMPT, _build_input_data(submission), _build_input_data(other)),
+        (poem_prompt, _build_input_vars(SAMPLE_THEMES, submission.free_write_letter, "she_her", None),
+         _build_input_vars(other_themes, other.free_write_letter, "he_him", None)),
+        (AFFIRMATION_PROMPT, affirm_vars(SAMPLE_THEMES), affirm_vars(other_themes)),
+        (FUSED_PROMPT, build_fused_input(submission, mode), build_fused_input(other, mode)),
+    ]
+    for prompt, first, second in pairs:
+        first_messages, second_messages = prompt.format_messages(**first), prompt.format_messages(**second)
+        assert first_messages[0].type == "system"
+        assert first_messages[0].content == second_messages[0].content
+        assert first_messages[-1].content != second_messages[-1].content
+        assert submission.free_write_letter not in first_messages[0].content
+
+
+def test_generate_engine_flag_selects_fused(monkeypatch, fresh_cache):
+    """?engine=fused should answer from a single fused call."""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.models.fused import FusedGenerationOutput
+
+    async def fake_fused(quiz, cultural_mode):
+        return FusedGenerationOutput(
+            themes=SAMPLE_THEMES,
+            poem=SAMPLE_POEM.model_copy(),
+            affirmations=SAMPLE_AFFIRMATIONS
+        )
+
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("staged agents should not run in fused mode")
+
+    monkeypatch.setattr(routes, "generate_fused", fake_fused)
+    monkeypatch.setattr(routes, "extract_themes", unexpected)
+
+    with TestClient(app) as client:
+        response = client.post("/api/v1/generate?engine=fused", json=SAMPLE_QUIZ)
+
+    assert response.status_code == 200
+    assert response.json()["poem"]["cultural_mode"] == "yoruba_inspired"
+
+
+def test_generate_serves_equivalent_submissions_from_cache(monkeypatch, fresh_cache):
+    """Whitespace and value order don't matter; Cache-Control: no-cache regenerates."""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.models.fused import FusedGenerationOutput
+
+    calls = {"count": 0}
+
+    async def fake_fused(quiz, cultural_mode):
+        calls["count"] += 1
+        return FusedGenerationOutput(
+            themes=SAMPLE_THEMES,
+            poem=SAMPLE_POEM.model_copy(),
+            affirmations=SAMPLE_AFFIRMATIONS
+        )
+
+    monkeypatch.setattr(routes, "generate_fused", fake_fused)
+
+    reordered = {
+        **SAMPLE_QUIZ,
+        "top_values": list(reversed(SAMPLE_QUIZ["top_values"])),
+        "free_write_letter": "  Dear future self,\n\nremember that you are strong   and capable. ",
+    }
+
+    with TestClient(app) as client:
+        first = client.post("/api/v1/generate?engine=fused", json=SAMPLE_QUIZ)
+        second = client.post("/api/v1/generate?engine=fused", json=reordered)
+        fresh = client.post(
+            "/api/v1/generate?engine=fused",
+            json=SAMPLE_QUIZ,
+            headers={"Cache-Control": "no-cache"}
+        )
+
+    assert first.json() == second.json() == fresh.json()
+    assert calls["count"] == 2
+    assert fresh_cache.stats()["hits"] == 1
+
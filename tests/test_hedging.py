@@ -0,0 +1,94 @@
+"""
+Tests for hedged requests in backend/services/hedging.py
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services import hedging
+from backend.services.hedging import HedgeBudget, Hedger, LatencyTracker
+
+
+@pytest.fixture(autouse=True)
+def hedgers(monkeypatch):
+    """Keeps the test hedgers out of the registry /stats and /metrics report."""
+    monkeypatch.setattr(hedging, "HEDGERS", {})
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile(95) is None
+
+    for ms in range(1, 101):
+        tracker.record(ms / 1000)
+
+    assert tracker.percentile(50) == 0.051
+    assert tracker.percentile(95) == 0.095
+
+
+def test_hedge_budget_caps_extra_calls():
+    budget = HedgeBudget(ratio=0.1)
+    spent = 0
+    for _ in range(100):
+        budget.deposit()
+        spent += budget.try_spend()
+
+    assert spent == 10
+
+
+def test_slow_primary_is_hedged_and_loser_cancelled():
+    calls = {"count": 0}
+    cancelled = asyncio.Event()
+
+    async def upstream():
+        calls["count"] += 1
+        if calls["count"] == 1:
+            # The first request hangs, as on a bad provider day
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return "fast answer"
+
+    async def scenario():
+        hedger = Hedger("test-slow", percentile=95, min_samples=1, budget_ratio=1.0, enabled=True)
+        hedger.tracker.record(0.02)
+        result = await hedger.call(upstream)
+        await asyncio.sleep(0)
+        return hedger, result
+
+    hedger, result = asyncio.run(scenario())
+
+    assert result == "fast answer"
+    assert calls["count"] == 2
+    assert cancelled.is_set()
+    assert hedger.stats()["hedges"] == 1
+    assert hedger.stats()["hedge_wins"] == 1
+    # The primary's elapsed time is recorded (at least the hedge delay),
+    # not the hedge's near-zero time from its own launch
+    assert hedger.tracker._samples[-1] >= 0.02
+
+
+def test_no_hedge_without_history_or_budget():
+    calls = {"count": 0}
+
+    async def upstream():
+        calls["count"] += 1
+        await asyncio.sleep(0.03)
+        return "ok"
+
+    async def scenario():
+        # Not enough samples yet
+        cold = Hedger("test-cold", min_samples=5, budget_ratio=1.0, enabled=True)
+        await cold.call(upstream)
+
+        # Enough samples, but no budget
+        broke = Hedger("test-broke", min_samples=1, budget_ratio=0.0, enabled=True)
+        broke.tracker.record(0.001)
+        await broke.call(upstream)
+
+    asyncio.run(scenario())
+
+    assert calls["count"] == 2
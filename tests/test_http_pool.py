@@ -0,0 +1,45 @@
+"""
+Tests for the shared upstream connection pool in backend/services/http.py
+"""
+
+import asyncio
+
+import httpx
+
+from backend.services import http
+
+
+def test_keepalive_limit_is_sized_from_job_workers(monkeypatch):
+    monkeypatch.setattr(http.settings, "HTTP_MAX_KEEPALIVE", 0)
+    monkeypatch.setattr(http.settings, "JOB_WORKERS", 4)
+    monkeypatch.setattr(http.settings, "HTTP_MAX_CONNECTIONS", 10)
+
+    limits = http.pool_limits()
+
+    assert limits.max_keepalive_connections == 2 * 4 * http.CALLS_PER_GENERATION
+    # Never below the keep-alive limit
+    assert limits.max_connections == limits.max_keepalive_connections
+
+
+def test_pool_stats_count_idle_and_active_connections():
+    async def handle(reader, writer):
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=1)) as client:
+            before = http.pool_stats(client)
+            await client.get(f"http://127.0.0.1:{port}/")
+            after = http.pool_stats(client)
+
+        server.close()
+        return before, after
+
+    before, after = asyncio.run(scenario())
+
+    assert (before["connections"], before["waiting"]) == (0, 0)
+    assert (after["connections"], after["idle"], after["active"]) == (1, 1, 0)
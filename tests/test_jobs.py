@@ -0,0 +1,143 @@
+"""
+Tests for the background job queue in backend/services/jobs.py
+
+Each test runs against both brokers: the in-memory one and the SQLite one
+(using a temporary database file).
+"""
+
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from backend.services.jobs import (
+    InMemoryBroker,
+    JobQueue,
+    QueueFullError,
+    SQLiteBroker,
+)
+
+
+class Echo(BaseModel):
+    text: str
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def broker(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBroker(str(tmp_path / "jobs.sqlite3"))
+    return InMemoryBroker()
+
+
+async def echo_handler(payload: str) -> Echo:
+    await asyncio.sleep(0.01)
+    return Echo.model_validate_json(payload)
+
+
+async def failing_handler(payload: str) -> Echo:
+    raise RuntimeError("upstream exploded")
+
+
+async def wait_for_status(queue: JobQueue, job_id: str, wanted: str) -> dict:
+    for _ in range(200):
+        job = await queue.status(job_id)
+        if job["status"] == wanted:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {wanted}: {job}")
+
+
+def test_jobs_run_and_report_results(broker):
+    async def scenario():
+        queue = JobQueue(broker, {"echo": echo_handler, "fail": failing_handler},
+                         workers=2, poll_interval=0.01)
+        await queue.start()
+        try:
+            ok = await queue.submit("echo", Echo(text="hello"))
+            bad = await queue.submit("fail", Echo(text="boom"))
+
+            done = await wait_for_status(queue, ok.id, "succeeded")
+            failed = await wait_for_status(queue, bad.id, "failed")
+        finally:
+            await queue.stop()
+        return done, failed
+
+    done, failed = asyncio.run(scenario())
+
+    assert done["result"] == {"text": "hello"}
+    assert "upstream exploded" in failed["error"]
+
+
+def test_queue_position_eta_and_max_depth(broker):
+    async def scenario():
+        # No workers started, so everything stays queued
+        queue = JobQueue(broker, {"echo": echo_handler}, workers=2, max_depth=3)
+
+        # Seed the ETA history with one finished 2-second job
+        seed = await broker.enqueue("echo", Echo(text="seed").model_dump_json(), 3)
+        claimed = await broker.claim()
+        claimed.started_at -= 2
+        await broker.finish(seed.id, "{}", None)
+        if isinstance(broker, SQLiteBroker):
+            await broker._run(lambda conn: conn.execute(
+                "UPDATE jobs SET started_at = finished_at - 2 WHERE id = ?", (seed.id,)
+            ))
+
+        jobs = [await queue.submit("echo", Echo(text=str(i))) for i in range(3)]
+        with pytest.raises(QueueFullError):
+            await queue.submit("echo", Echo(text="one too many"))
+
+        return [await queue.status(job.id) for job in jobs]
+
+    statuses = asyncio.run(scenario())
+
+    assert [job["queue_position"] for job in statuses] == [0, 1, 2]
+    # Third job: two jobs ahead shared by two workers, then its own ~2 s run
+    assert statuses[2]["eta_seconds"] == pytest.approx(4.0, abs=0.2)
+
+
+def test_jobs_of_a_dead_worker_fail_when_their_lease_runs_out(broker):
+    async def scenario():
+        await broker.enqueue("echo", Echo(text="orphan").model_dump_json(), 10)
+        orphan = await broker.claim(lease_seconds=0.05)  # Its worker never renews or finishes it
+
+        kept = await broker.enqueue("echo", Echo(text="kept").model_dump_json(), 10)
+        await broker.claim(lease_seconds=0.5)
+        await asyncio.sleep(0.1)
+        await broker.renew(kept.id, lease_seconds=0.5)  # Its worker renews it in time
+        await asyncio.sleep(0.1)
+
+        await broker.claim()
+        return await broker.get(orphan.id), await broker.get(kept.id), await broker.recent_durations()
+
+    orphan, kept, durations = asyncio.run(scenario())
+
+    assert orphan.status == "failed" and "stopped" in orphan.error
+    assert kept.status == "running"
+    # Failed jobs don't count towards the ETA
+    assert durations == []
+
+
+def test_workers_survive_broker_errors(broker):
+    claim = broker.claim
+    failures = []
+
+    async def flaky_claim(*args, **kwargs):
+        if len(failures) < 2:
+            failures.append(1)
+            raise RuntimeError("database is locked")
+        return await claim(*args, **kwargs)
+
+    broker.claim = flaky_claim
+
+    async def scenario():
+        queue = JobQueue(broker, {"echo": echo_handler}, workers=1, poll_interval=0.01)
+        await queue.start()
+        try:
+            job = await queue.submit("echo", Echo(text="hello"))
+            return await wait_for_status(queue, job.id, "succeeded")
+        finally:
+            await queue.stop()
+
+    assert asyncio.run(scenario())["result"] == {"text": "hello"}
+    assert len(failures) == 2
@@ -0,0 +1,57 @@
+"""
+Tests for per-agent memoization in backend/services/memo.py
+"""
+
+import asyncio
+
+from backend.agents.theme_extractor import input_fingerprint
+from backend.models.affirmations import AffirmationsOutput
+from backend.models.quiz import QuizSubmission
+from backend.services.memo import StageMemo, fingerprint, fresh_outputs
+
+
+QUIZ = {
+    "top_values": ["integrity", "compassion", "wisdom"],
+    "greatest_strength": "empathy",
+    "aspirational_trait": "confidence",
+    "metaphor_archetype": "river",
+    "energy_style": "healer",
+    "life_focus": "spirituality",
+    "cultural_mode": "yoruba_inspired",
+    "pronouns": "she_her",
+    "free_write_letter": "Dear future self, remember that you are strong."
+}
+
+
+def test_extraction_fingerprint_ignores_mode_and_pronouns():
+    original = QuizSubmission(**QUIZ)
+    switched = QuizSubmission(**{**QUIZ, "cultural_mode": "secular", "pronouns": "they_them"})
+    edited = QuizSubmission(**{**QUIZ, "free_write_letter": "A different letter."})
+
+    key = fingerprint("extract", input_fingerprint(original))
+
+    assert fingerprint("extract", input_fingerprint(switched)) == key
+    assert fingerprint("extract", input_fingerprint(edited)) != key
+
+
+def test_memo_reuses_outputs_and_fresh_skips_creative_stages():
+    calls = {"count": 0}
+
+    async def generate():
+        calls["count"] += 1
+        return AffirmationsOutput(affirmations=[f"I grow ({calls['count']})"], focus_areas=["growth"])
+
+    async def scenario():
+        memo = StageMemo("test-affirm", AffirmationsOutput, creative=True)
+        first = await memo.call({"themes": "same"}, generate)
+        again = await memo.call({"themes": "same"}, generate)
+        with fresh_outputs():
+            fresh = await memo.call({"themes": "same"}, generate)
+        return memo, first, again, fresh
+
+    memo, first, again, fresh = asyncio.run(scenario())
+
+    assert again == first and again is not first
+    assert fresh.affirmations == ["I grow (2)"]
+    assert calls["count"] == 2
+    assert memo.stats()["hits"] == 1
@@ -0,0 +1,114 @@
+"""
+Tests for the Prometheus metrics in backend/services/metrics.py
+"""
+
+import asyncio
+from uuid import uuid4
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from backend.services import metrics as m
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = m.MetricsRegistry()
+    latency = registry.histogram("t_seconds", "Test latency", ["stage"], buckets=(0.1, 1.0))
+    calls = registry.counter("t_calls_total", "Test calls", ["stage"])
+
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, stage="compose")
+    calls.inc(stage='say "hi"\n')
+
+    text = registry.render()
+
+    assert 't_seconds_bucket{stage="compose",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="compose",le="1.0"} 3' in text
+    assert 't_seconds_bucket{stage="compose",le="+Inf"} 4' in text
+    assert 't_seconds_sum{stage="compose"} 4.25' in text
+    assert 't_seconds_count{stage="compose"} 4' in text
+    assert 't_calls_total{stage="say \\"hi\\"\\n"} 1' in text
+    assert "# TYPE t_seconds histogram" in text
+
+
+def test_llm_handler_records_latency_tokens_first_token_and_errors():
+    handler = m.LLMMetricsHandler("test-agent")
+    labels = {"agent": "test-agent", "model": "gpt-test"}
+    run = uuid4()
+
+    handler.on_chat_model_start({}, [], run_id=run, invocation_params={"model": "gpt-test"})
+    handler.on_llm_new_token("Hi", run_id=run)
+    handler.on_llm_new_token(" there", run_id=run)
+    message = AIMessage("Hi there", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150})
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run)
+
+    failed = uuid4()
+    handler.on_chat_model_start({}, [], run_id=failed, invocation_params={"model_name": "gpt-test"})
+    handler.on_llm_error(TimeoutError(), run_id=failed)
+
+    assert m.LLM_TOKENS.value(kind="prompt", **labels) >= 120
+    assert m.LLM_TOKENS.value(kind="completion", **labels) >= 30
+    assert m.LLM_FIRST_TOKEN.count(**labels) == 1
+    assert m.LLM_LATENCY.count(outcome="ok", **labels) == 1
+    assert m.LLM_ERRORS.value(error="TimeoutError", **labels) == 1
+
+
+def test_cached_prompt_tokens_are_counted_per_agent():
+    handler = m.LLMMetricsHandler("cache-agent")
+    run = uuid4()
+    handler.on_chat_model_start({}, [], run_id=run, invocation_params={"model": "gpt-test"})
+    # Non-streaming langchain-openai reports cached tokens only in llm_output
+    response = LLMResult(
+        generations=[[ChatGeneration(message=AIMessage("ok"))]],
+        llm_output={"token_usage": {"prompt_tokens": 1200, "completion_tokens": 40,
+                                    "prompt_tokens_details": {"cached_tokens": 1024}}}
+    )
+    handler.on_llm_end(response, run_id=run)
+
+    streamed = AIMessage("ok", usage_metadata={"input_tokens": 100, "output_tokens": 1, "total_tokens": 101,
+                                               "input_token_details": {"cache_read": 64}})
+    assert m._cached_tokens(LLMResult(generations=[[ChatGeneration(message=streamed)]])) == 64
+
+    assert m.LLM_TOKENS.value(agent="cache-agent", model="gpt-test", kind="cached_prompt") == 1024
+    assert m.prompt_cache_stats()["cache-agent"] == {
+        "prompt_tokens": 1200, "cached_tokens": 1024, "cached_ratio": 0.853
+    }
+    assert 'oriki_llm_prompt_cache_ratio{agent="cache-agent"} 0.853' in m.metrics.render()
+
+
+def test_handler_sees_real_langchain_calls():
+    handler = m.LLMMetricsHandler("fake-agent")
+    llm = GenericFakeChatModel(messages=iter([AIMessage("one two")]), callbacks=[handler])
+
+    async def scenario():
+        return [chunk async for chunk in llm.astream("hello")]
+
+    asyncio.run(scenario())
+
+    assert m.LLM_LATENCY.count(agent="fake-agent", model="unknown", outcome="ok") == 1
+    assert m.LLM_FIRST_TOKEN.count(agent="fake-agent", model="unknown") == 1
+
+
+def test_metrics_endpoint_reports_routes_and_service_counters(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+    from backend.config import settings
+
+    monkeypatch.setattr(settings, "AGENT_WARMUP_ENABLED", False)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+
+    with TestClient(app) as http:
+        http.get("/health")
+        http.get("/api/v1/jobs/no-such-job")
+        response = http.get("/metrics")
+
+    text = response.text
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'oriki_http_requests_total{method="GET",route="/health",status="200"}' in text
+    # Path templates, not raw paths, so IDs don't create new series
+    assert 'route="/api/v1/jobs/{job_id}",status="404"' in text
+    assert "oriki_http_requests_in_flight 0" in text
+    assert 'oriki_response_cache_hit_ratio{cache="generate"}' in text
+    assert 'oriki_singleflight_in_flight{group="tts-segment"}' in text
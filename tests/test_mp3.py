@@ -0,0 +1,70 @@
+"""
+Tests for MP3 frame parsing and joining in backend/services/mp3.py
+"""
+
+from backend.services import mp3
+
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, mono, no CRC: 417-byte frames
+HEADER = bytes((0xFF, 0xFB, 0x90, 0xC0))
+FRAME_LENGTH = 417
+
+
+def frame(fill: int) -> bytes:
+    return HEADER + bytes((fill,)) * (FRAME_LENGTH - 4)
+
+
+def clip(*fills: int) -> bytes:
+    """An encoder-style file: ID3v2 tag, Info frame, audio frames, ID3v1 tag."""
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"tags!"
+    info = HEADER + bytes(17) + b"Info" + bytes(FRAME_LENGTH - 25)
+    return id3 + info + b"".join(frame(fill) for fill in fills) + b"TAG" + bytes(125)
+
+
+def test_header_fields():
+    header = mp3.parse_header(HEADER, 0)
+
+    assert (header.version, header.bitrate, header.sample_rate) == (1, 128_000, 44100)
+    assert header.length == FRAME_LENGTH
+    assert header.mono and not header.protected
+    assert mp3.parse_header(b"ID3\x04", 0) is None
+
+
+def test_concat_keeps_only_audio_frames_and_adds_silence():
+    joined = mp3.concat([clip(1, 2), clip(3)], pauses=[0.5, 9.0])
+
+    frames = [joined[offset:offset + header.length] for offset, header in mp3.iter_frames(joined)]
+    # 0.5 s at 1152 samples / 44.1 kHz per frame is 19 silent frames; no pause after the last clip
+    assert len(frames) == 2 + 19 + 1
+    assert frames[:2] == [frame(1), frame(2)] and frames[-1] == frame(3)
+    assert all(f[4:] == bytes(FRAME_LENGTH - 4) for f in frames[2:-1])
+    assert len(joined) == len(frames) * FRAME_LENGTH
+
+
+def test_junk_before_the_first_frame_is_skipped():
+    # \xff\xfb\x12 looks like a header, but no frame follows where it says
+    data = b"\x00\xff\xfb\x12" + frame(1) + frame(2)
+
+    assert mp3.audio_frames(data) == [frame(1), frame(2)]
+
+
+def test_index_measures_exact_duration_and_builds_a_seek_table():
+    data = clip(*range(100))  # 100 frames of 1152 samples at 44.1 kHz
+
+    index = mp3.index(memoryview(data), seek_interval=1.0)
+
+    assert index.frames == 100
+    assert abs(index.duration - 100 * 1152 / 44100) < 1e-9
+    assert index.bitrate == round(FRAME_LENGTH * 8 * 44100 / 1152)
+    # The first seek point is the first audio frame, after the ID3 tag and Info frame
+    first_audio = 15 + FRAME_LENGTH
+    assert index.seek_table[0] == (0.0, first_audio)
+    assert [round(t) for t, _ in index.seek_table] == [0, 1, 2]
+    assert all((offset - first_audio) % FRAME_LENGTH == 0 for _, offset in index.seek_table)
+    assert index.offset_at(1.5) == index.seek_table[1][1]
+    assert mp3.duration(data) == index.duration
+
+
+def test_index_of_non_mp3_data_is_empty():
+    assert mp3.duration(b"0123456789") == 0.0
+    assert mp3.index(b"").seek_table == []
@@ -0,0 +1,103 @@
+"""
+Tests for the sampling profiler in backend/services/profiling.py and its admin routes
+"""
+
+import asyncio
+import time
+
+from backend.services import profiling as p
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_samples_are_attributed_only_to_profiled_tasks_and_their_children():
+    profiler = p.SamplingProfiler(interval=0.001, trace_allocations=False)
+
+    async def profiled_work():
+        _busy(0.05)
+
+    async def unprofiled_request():
+        await asyncio.sleep(0)
+        _busy(0.05)
+
+    async def profiled_request():
+        with profiler.profile() as finish:
+            await asyncio.create_task(profiled_work())
+            finish("POST /api/v1/generate")
+
+    async def scenario():
+        await asyncio.gather(profiled_request(), unprofiled_request())
+
+    asyncio.run(scenario())
+
+    stats = profiler.stats()["POST /api/v1/generate"]
+    assert stats["requests"] == 1
+    assert stats["samples"] > 5
+    folded = profiler.folded("POST /api/v1/generate")
+    assert "profiled_work" in folded and "unprofiled_request" not in folded
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
+    assert profiler._tasks == {}
+
+
+def test_allocations_are_recorded_and_tracemalloc_is_switched_off_afterwards():
+    import tracemalloc
+
+    profiler = p.SamplingProfiler(interval=0.001)
+    kept = []
+
+    async def request():
+        with profiler.profile() as finish:
+            kept.append(bytearray(2_000_000))
+            finish("POST /api/v1/audio")
+
+    asyncio.run(request())
+
+    stats = profiler.stats()["POST /api/v1/audio"]
+    assert stats["peak_bytes"] >= 2_000_000
+    assert stats["top_allocations"][0]["bytes"] >= 2_000_000
+    assert "test_profiling.py" in stats["top_allocations"][0]["site"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_stacks_beyond_the_limit_are_merged():
+    profiler = p.SamplingProfiler(max_stacks=2)
+    profile = p.RequestProfile()
+    profile.stacks.update({"a": 3, "a;b": 2, "a;c": 1, "d": 1})
+
+    profiler._merge("GET /x", profile)
+
+    assert profiler.endpoints["GET /x"].stacks == {"a": 3, "a;b": 2, p.OTHER_STACKS: 2}
+    assert profiler.stats()["GET /x"]["top_frames"][0] == {"frame": "a", "share": 0.429}
+
+
+def test_debug_header_profiles_a_request_and_admin_routes_serve_it(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+    from backend.config import settings
+
+    monkeypatch.setattr(settings, "AGENT_WARMUP_ENABLED", False)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    p.profiler.reset()
+
+    with TestClient(app) as http:
+        http.get("/api/v1/quiz/questions", headers={"X-Profile": "wrong"})
+        http.get("/api/v1/quiz/questions", headers={"X-Profile": "s3cret"})
+
+        admin = {"X-Admin-Token": "s3cret"}
+        assert http.get("/api/v1/admin/profiles").status_code == 401
+        summary = http.get("/api/v1/admin/profiles", headers=admin).json()
+        folded = http.get("/api/v1/admin/profiles/flamegraph", headers=admin,
+                          params={"endpoint": "GET /api/v1/quiz/questions"})
+        missing = http.get("/api/v1/admin/profiles/flamegraph", headers=admin, params={"endpoint": "GET /nope"})
+        assert http.delete("/api/v1/admin/profiles", headers=admin).status_code == 204
+
+    assert summary["endpoints"]["GET /api/v1/quiz/questions"]["requests"] == 1
+    assert folded.status_code == 200
+    assert missing.status_code == 404
+    assert p.profiler.endpoints == {}
@@ -0,0 +1,75 @@
+"""
+Tests for the response cache in backend/services/cache.py
+
+Eviction tests run against both local backends: the in-memory one and the
+SQLite one (using a temporary database file).
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.cache import (
+    MemoryCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_entries: int):
+        if request.param == "sqlite":
+            return SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries)
+        return MemoryCacheBackend(max_entries)
+    return make
+
+
+def test_expensive_entries_outlive_cheap_ones(make_backend):
+    async def scenario():
+        cache = ResponseCache(make_backend(max_entries=2), ttl=60)
+        await cache.set("expensive", "poem", cost=30.0)
+        await cache.set("cheap", "poem", cost=1.0)
+
+        # Cheap but recently read still loses to expensive-but-older
+        assert await cache.get("cheap") == "poem"
+        await cache.set("new", "poem", cost=5.0)
+
+        return cache, [await cache.get(key) for key in ("expensive", "cheap", "new")]
+
+    cache, values = asyncio.run(scenario())
+
+    assert values == ["poem", None, "poem"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire(make_backend):
+    async def scenario():
+        cache = ResponseCache(make_backend(max_entries=10), ttl=0.05)
+        await cache.set("key", "poem", cost=1.0)
+        hit = await cache.get("key")
+        await asyncio.sleep(0.1)
+        return hit, await cache.get("key")
+
+    assert asyncio.run(scenario()) == ("poem", None)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+
+    async def scenario():
+        before = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+        await before.set("a", "poem a", cost=3.0)
+        await before.set("b", "poem b", cost=4.0)
+        saved = await before.save_snapshot(path)
+
+        after = ResponseCache(MemoryCacheBackend(max_entries=10), ttl=60)
+        loaded = await after.load_snapshot(path)
+        missing = await after.load_snapshot(str(tmp_path / "missing.json"))
+        return saved, loaded, missing, await after.get("b"), after.stats()
+
+    saved, loaded, missing, value, stats = asyncio.run(scenario())
+
+    assert (saved, loaded, missing) == (2, 2, 0)
+    assert value == "poem b"
+    assert stats["saved_seconds"] == 4.0
@@ -0,0 +1,85 @@
+"""
+Tests for near-duplicate letter detection in backend/services/similarity.py
+"""
+
+from backend.services.similarity import LetterIndex
+
+
+LETTER = (
+    "Dear future self, I hope you remember how far you've come. Right now I am "
+    "learning to rest without guilt. The garden taught me that growth happens in "
+    "seasons, and that the quiet months matter as much as the harvest. With love."
+)
+
+OTHER = (
+    "Dear future self, I hope you remember how far you've come. I started the "
+    "business this year even though everyone said to wait. Remember the fear and "
+    "the courage, and keep choosing the brave thing. With love."
+)
+
+
+def test_near_copy_in_same_group_reuses_value():
+    index = LetterIndex(threshold=0.8)
+    index.add("answers", LETTER, "themes")
+
+    rewrapped = LETTER.replace(". ", ".\n\n").upper()
+    score, value = index.lookup("answers", rewrapped)
+
+    assert value == "themes"
+    assert score >= 0.8
+    assert index.stats()["matches"] == 1
+
+
+def test_different_letter_or_group_does_not_match():
+    index = LetterIndex(threshold=0.8)
+    index.add("answers", LETTER, "themes")
+
+    assert index.lookup("answers", OTHER) is None
+    assert index.lookup("other answers", LETTER) is None
+    assert index.stats()["match_ratio"] == 0.0
+
+
+def test_evaluate_reports_false_matches_and_misses():
+    index = LetterIndex(threshold=0.8)
+    result = index.evaluate([
+        (LETTER, LETTER + " P.S. Drink water.", True),
+        (LETTER, OTHER, False),
+    ])
+
+    assert result == {"threshold": 0.8, "pairs": 2, "false_match_rate": 0.0, "miss_rate": 0.0}
+    assert index.stats()["evaluation"] == result
+
+
+def test_oldest_entries_are_evicted():
+    index = LetterIndex(threshold=0.8, max_entries=1)
+    index.add("answers", LETTER, "first")
+    index.add("answers", OTHER, "second")
+
+    assert index.lookup("answers", LETTER) is None
+    assert index.lookup("answers", OTHER)[1] == "second"
+    assert index.stats()["entries"] == 1
+
+
+def test_extraction_computes_each_letters_signature_once(monkeypatch):
+    import asyncio
+
+    from backend.agents import theme_extractor
+    from backend.models.quiz import QuizSubmission
+    from backend.models.theme import ThemeData
+    from tests.test_generation_pipeline import SAMPLE_QUIZ
+
+    index = LetterIndex(threshold=0.8)
+    signatures = []
+    signature = index.signature
+    monkeypatch.setattr(index, "signature", lambda letter: signatures.append(letter) or signature(letter))
+    monkeypatch.setattr(theme_extractor, "letter_index", index)
+
+    async def run():
+        return ThemeData(**ThemeData.model_config["json_schema_extra"]["example"])
+
+    quiz = QuizSubmission(**SAMPLE_QUIZ)
+    asyncio.run(theme_extractor._extract_or_reuse(quiz, run))
+
+    # Once for the lookup that missed and the add that followed
+    assert signatures == [quiz.free_write_letter]
+    assert index.stats()["entries"] == 1
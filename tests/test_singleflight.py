@@ -0,0 +1,79 @@
+"""
+Tests for in-flight request coalescing in backend/services/singleflight.py
+"""
+
+import asyncio
+
+from backend.services.singleflight import SingleFlight, request_key
+from backend.models.audio import AudioRequest
+
+
+def test_request_key_is_canonical():
+    a = AudioRequest(text="You are strong", voice="nova")
+    b = AudioRequest.model_validate_json('{"voice": "nova", "text": "You are strong"}')
+
+    assert request_key("audio", a) == request_key("audio", b)
+    assert request_key("audio", a) != request_key("generate", a)
+    assert request_key("audio", a) != request_key("audio", a, engine="fused")
+
+
+def test_concurrent_duplicates_share_one_call():
+    calls = {"count": 0}
+
+    async def upstream():
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def scenario():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("k", upstream) for _ in range(5)))
+        # After the call finishes, a new request starts a fresh call
+        await flight.do("k", upstream)
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+
+    assert results == ["result"] * 5
+    assert calls["count"] == 2
+    assert flight.stats() == {"hits": 4, "misses": 2, "hit_ratio": 0.667, "in_flight": 0}
+
+
+def test_errors_are_shared_and_last_waiter_cancels():
+    cancelled = asyncio.Event()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def scenario():
+        flight = SingleFlight("test")
+
+        outcomes = await asyncio.gather(
+            flight.do("err", failing), flight.do("err", failing), return_exceptions=True
+        )
+
+        # One of two waiters leaving keeps the call alive; both leaving cancels it
+        first = asyncio.ensure_future(flight.do("slow", slow))
+        second = asyncio.ensure_future(flight.do("slow", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        still_running = not cancelled.is_set()
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0)
+        return outcomes, still_running
+
+    outcomes, still_running = asyncio.run(scenario())
+
+    assert all(isinstance(e, RuntimeError) for e in outcomes)
+    assert still_running
+    assert cancelled.is_set()
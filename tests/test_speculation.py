@@ -0,0 +1,88 @@
+"""
+Tests for speculative TTS rendering (backend/services/speculation.py and
+its use in backend/agents/audio_renderer.py)
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from backend.services.audio_cache import AudioCache
+from backend.services.speculation import CallBudget, SpeculativeRenderer
+
+
+def test_budget_caps_speculative_characters():
+    rendered = []
+
+    async def render(segment, voice):
+        rendered.append(segment)
+
+    async def scenario():
+        speculative = SpeculativeRenderer(render, lambda s, v: s == "cached", CallBudget(10, window=60))
+        started = speculative.submit(["12345", "cached", "123456", "1234"], "nova")
+        await asyncio.sleep(0)
+        return started, speculative.stats()
+
+    started, stats = asyncio.run(scenario())
+
+    # "123456" would take the spend past 10 characters; "1234" still fits
+    assert started == 2 and rendered == ["12345", "1234"]
+    assert (stats["already_cached"], stats["over_budget"], stats["budget_remaining"]) == (1, 1, 1)
+
+
+def test_failures_are_counted_not_raised():
+    async def render(segment, voice):
+        raise RuntimeError("TTS is down")
+
+    async def scenario():
+        speculative = SpeculativeRenderer(render, lambda s, v: False, CallBudget(100, window=60))
+        speculative.submit(["You are brave."], "nova")
+        await asyncio.sleep(0.01)
+        return speculative.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert (stats["started"], stats["failed"], stats["in_flight"]) == (1, 1, 0)
+
+
+class _SlowSpeech:
+    """Stands in for client.audio.speech, taking a moment per call."""
+
+    def __init__(self):
+        self.inputs = []
+
+    async def create(self, input, **kwargs):
+        from tests.test_mp3 import clip
+
+        self.inputs.append(input)
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(read=lambda: clip(1))
+
+
+def test_audio_request_joins_speculative_renders_in_flight(monkeypatch, tmp_path):
+    from backend.agents import audio_renderer
+
+    speech = _SlowSpeech()
+    monkeypatch.setitem(audio_renderer.registry._built, "tts-client", SimpleNamespace(audio=SimpleNamespace(speech=speech)))
+    monkeypatch.setattr(audio_renderer, "audio_cache", AudioCache(str(tmp_path), max_bytes=1_000_000))
+    monkeypatch.setattr(audio_renderer.settings, "AUDIO_SEGMENTED", True)
+    monkeypatch.setattr(
+        audio_renderer,
+        "speculative_tts",
+        SpeculativeRenderer(audio_renderer._synthesize, lambda s, v: False, CallBudget(1000, window=60))
+    )
+
+    poem = ["The one who walks with purpose,", "steady as the mountain."]
+
+    async def scenario():
+        # Generation hands over the poem lines as they are final...
+        for line in poem:
+            audio_renderer.speculate_audio(line, "alloy")
+        await asyncio.sleep(0.01)
+        # ...and the client asks for the audio while they are still rendering
+        return await audio_renderer.generate_audio("\n".join(poem) + "\n\nYou are worthy.", "alloy")
+
+    audio = asyncio.run(scenario())
+
+    assert audio
+    # Each line was synthesized exactly once
+    assert sorted(speech.inputs) == sorted(poem + ["You are worthy."])
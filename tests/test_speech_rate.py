@@ -0,0 +1,45 @@
+"""
+Tests for per-voice speaking-rate calibration in backend/services/speech_rate.py
+"""
+
+import asyncio
+
+from backend.services.speech_rate import DEFAULT_WORDS_PER_SECOND, SpeechRateCalibration
+
+
+def test_rate_is_learned_per_voice_once_there_are_enough_words():
+    calibration = SpeechRateCalibration(min_words=20)
+
+    calibration.observe("onyx", words=10, seconds=5.0)
+    assert calibration.words_per_second("onyx") == DEFAULT_WORDS_PER_SECOND
+
+    calibration.observe("onyx", words=30, seconds=15.0)
+    calibration.observe("onyx", words=1, seconds=0.1)  # Too short to count
+    assert calibration.words_per_second("onyx") == 2.0
+    assert calibration.words_per_second("nova") == DEFAULT_WORDS_PER_SECOND
+    assert calibration.words_per_second(None) == DEFAULT_WORDS_PER_SECOND
+
+
+def test_old_clips_fade_out_past_max_words():
+    calibration = SpeechRateCalibration(min_words=10, max_words=100)
+
+    calibration.observe("nova", words=100, seconds=50.0)  # 2 words/s
+    for _ in range(20):
+        calibration.observe("nova", words=50, seconds=12.5)  # The voice got faster: 4 words/s
+
+    assert abs(calibration.words_per_second("nova") - 4.0) < 0.05
+
+
+def test_rates_survive_a_restart(tmp_path):
+    path = str(tmp_path / "rates" / "speech_rate.json")
+
+    async def scenario():
+        first = SpeechRateCalibration(min_words=10)
+        first.observe("fable", words=30, seconds=10.0)
+        written = await first.save(path)
+        unchanged = await first.save(path)
+
+        second = SpeechRateCalibration(min_words=10)
+        return written, unchanged, await second.load(path), second.words_per_second("fable")
+
+    assert asyncio.run(scenario()) == (True, False, 1, 3.0)
@@ -0,0 +1,88 @@
+"""
+Tests for native structured output in backend/agents/structured.py
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_openai import ChatOpenAI
+
+from backend.agents import structured as s
+from backend.agents.affirmation_generator import AFFIRMATION_PROMPT, parser as affirm_parser
+from backend.agents.registry import _async_clients
+from backend.models.affirmations import AffirmationsOutput
+from backend.models.fused import FusedGenerationOutput
+
+
+THEMES = {
+    "values": "integrity", "emotional_tone": "hopeful", "metaphors": "river", "identity_markers": "healer",
+    "aspirations": "teach", "strengths": "empathy", "key_themes": "growth",
+}
+
+COMPLETION = '{"affirmations": ["I choose rest"], "focus_areas": ["self-compassion"]}'
+
+
+def test_strict_schema_inlines_nested_models_and_requires_every_field():
+    schema = s.strict_schema(FusedGenerationOutput)
+
+    assert "$defs" not in schema and "$ref" not in str(schema)
+    assert schema["required"] == ["themes", "poem", "affirmations"]
+    poem = schema["properties"]["poem"]
+    assert poem["additionalProperties"] is False
+    assert poem["required"] == ["poem_lines", "cultural_mode", "style_notes"]
+    assert "example" not in schema["properties"]["themes"]
+
+
+def test_native_chain_sends_the_schema_instead_of_format_instructions():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(COMPLETION)]))
+
+    parser_chain = s.structured_chain("affirm", AFFIRMATION_PROMPT, llm, affirm_parser, native=False)
+    native_chain = s.structured_chain("affirm", AFFIRMATION_PROMPT, llm, affirm_parser, native=True)
+
+    parser_prompt = parser_chain.first.format_messages(**THEMES)[0].content
+    native_prompt = native_chain.first.format_messages(**THEMES)[0].content
+    assert '"properties"' in parser_prompt and '"properties"' not in native_prompt
+    response_format = native_chain.steps[1].kwargs["response_format"]
+    assert response_format["json_schema"] == {
+        "name": "AffirmationsOutput", "schema": s.strict_schema(AffirmationsOutput), "strict": True
+    }
+
+    result = asyncio.run(native_chain.ainvoke(THEMES))
+    assert result == AffirmationsOutput(affirmations=["I choose rest"], focus_areas=["self-compassion"])
+
+
+def test_parser_reads_tool_calls_and_rejects_refusals_and_invalid_json():
+    tool_parser = s.StructuredOutputParser(pydantic_object=AffirmationsOutput, method="function_calling")
+    called = AIMessage("", additional_kwargs={"tool_calls": [
+        {"id": "1", "type": "function", "function": {"name": "AffirmationsOutput", "arguments": COMPLETION}}
+    ]})
+    assert tool_parser.parse_result([ChatGeneration(message=called)]).focus_areas == ["self-compassion"]
+
+    json_parser = s.StructuredOutputParser(pydantic_object=AffirmationsOutput)
+    for message in (
+        AIMessage("", additional_kwargs={"refusal": "I can't help with that"}),
+        AIMessage('{"affirmations": ["I choose rest"]}'),
+        AIMessage("Here you go: {"),
+    ):
+        with pytest.raises(OutputParserException):
+            json_parser.parse_result([ChatGeneration(message=message)])
+    with pytest.raises(OutputParserException):
+        tool_parser.parse_result([ChatGeneration(message=AIMessage(COMPLETION))])
+
+
+def test_agents_are_switched_individually(monkeypatch):
+    monkeypatch.setattr(s.settings, "STRUCTURED_OUTPUT_AGENTS", "affirm, fused")
+    assert s.native_agents() == ["affirm", "fused"]
+    assert s.uses_native("affirm") and not s.uses_native("compose")
+
+    monkeypatch.setattr(s.settings, "STRUCTURED_OUTPUT_AGENTS", "all")
+    assert s.native_agents() == list(s.AGENTS)
+
+    # The registry still finds the client behind the bound model to warm it up
+    llm = ChatOpenAI(api_key="test")
+    chain = s.structured_chain("affirm", AFFIRMATION_PROMPT, llm, affirm_parser)
+    assert list(_async_clients(chain)) == [llm.root_async_client]
@@ -0,0 +1,133 @@
+"""
+Tests for request tracing in backend/services/tracing.py and the admin waterfall
+"""
+
+import asyncio
+import json
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from backend.services import tracing as t
+
+
+def test_spans_nest_across_tasks_and_complete_with_the_root():
+    tracer = t.Tracer()
+
+    async def stage(name):
+        with tracer.span(name, model="gpt-test"):
+            await asyncio.sleep(0.01)
+
+    async def request():
+        with tracer.span("POST /generate", cultural_mode="yoruba_inspired"):
+            await stage("extract")
+            await asyncio.gather(stage("compose"), stage("affirm"))
+            tracer.annotate(partial=False)
+
+    asyncio.run(request())
+
+    [trace] = tracer.recent
+    root = trace.root
+    assert root.name == "POST /generate"
+    assert root.attributes == {"cultural_mode": "yoruba_inspired", "partial": False}
+    assert [span.name for span in trace.spans[1:]] == ["extract", "compose", "affirm"]
+    assert {span.parent_id for span in trace.spans[1:]} == {root.span_id}
+    assert {span.trace_id for span in trace.spans} == {root.trace_id}
+    assert trace.duration >= 0.02
+
+
+def test_failed_span_records_the_error_and_spans_after_the_trace_are_dropped():
+    tracer = t.Tracer()
+    late = None
+
+    try:
+        with tracer.span("POST /audio"):
+            late = tracer.start("speculative tts")
+            with tracer.span("tts"):
+                raise TimeoutError("upstream")
+    except TimeoutError:
+        pass
+    tracer.end(late)
+
+    [trace] = tracer.recent
+    assert [span.name for span in trace.spans] == ["POST /audio", "tts"]
+    assert trace.spans[1].error == "TimeoutError: upstream"
+    assert tracer._open == {}
+
+
+def test_langchain_runs_become_spans_under_the_current_span():
+    tracer = t.Tracer()
+    handler = t.TracingCallbackHandler(tracer)
+    chain = (
+        ChatPromptTemplate.from_messages([("human", "{letter}")])
+        | GenericFakeChatModel(messages=iter([AIMessage("a poem")] * 2))
+        | StrOutputParser()
+    )
+
+    async def request():
+        # Outside a traced request: ignored
+        await chain.ainvoke({"letter": "warmup"}, config={"callbacks": [handler]})
+        with tracer.span("compose"):
+            return await chain.ainvoke({"letter": "Dear me"}, config={"callbacks": [handler]})
+
+    assert asyncio.run(request()) == "a poem"
+
+    [trace] = tracer.recent
+    names = [span.name for span in trace.spans]
+    assert names[:2] == ["compose", "RunnableSequence"]
+    assert set(names[2:]) == {"ChatPromptTemplate", "llm", "StrOutputParser"}
+    by_id = {span.span_id: span for span in trace.spans}
+    assert all(by_id[span.parent_id].name == "RunnableSequence" for span in trace.spans[2:])
+    assert handler._spans == {}
+
+
+def test_exporters_write_jsonl_and_otlp(tmp_path):
+    tracer = t.Tracer()
+    path = tmp_path / "traces.jsonl"
+    tracer.exporters.append(t.JsonlExporter(str(path)))
+
+    with tracer.span("POST /generate", letter_length=120):
+        with tracer.span("llm gpt-test", model="gpt-test", prompt_tokens=900):
+            pass
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["POST /generate", "llm gpt-test"]
+    assert spans[1]["attributes"] == {"model": "gpt-test", "prompt_tokens": 900}
+
+    payload = t.OtlpExporter("http://collector/v1/traces", client=None).payload(tracer.recent[0])
+    otlp_spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert otlp_spans[1]["parentSpanId"] == otlp_spans[0]["spanId"]
+    assert {"key": "prompt_tokens", "value": {"intValue": "900"}} in otlp_spans[1]["attributes"]
+    assert "parentSpanId" not in otlp_spans[0]
+
+
+def test_admin_traces_requires_the_token_and_renders_a_waterfall(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+    from backend.config import settings
+
+    monkeypatch.setattr(settings, "AGENT_WARMUP_ENABLED", False)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SNAPSHOT_PATH", "")
+    monkeypatch.setattr(t.tracer, "recent", t.tracer.recent.__class__(maxlen=10))
+
+    with t.tracer.span("POST /generate", cultural_mode="greek_inspired"):
+        with t.tracer.span("extract"):
+            pass
+
+    with TestClient(app) as http:
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+        assert http.get("/api/v1/admin/traces").status_code == 404
+
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+        assert http.get("/api/v1/admin/traces", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+        page = http.get("/api/v1/admin/traces?min_seconds=0&token=s3cret")
+        data = http.get("/api/v1/admin/traces", params={"min_seconds": 0, "format": "json"},
+                        headers={"X-Admin-Token": "s3cret"}).json()
+
+    assert page.status_code == 200
+    assert "POST /generate" in page.text and "cultural_mode=greek_inspired" in page.text
+    assert [span["name"] for span in data["traces"][0]] == ["POST /generate", "extract"]